@@ -9,6 +9,7 @@ from components.performance import show_performance
 from components.report import show_report
 from utils.styling import apply_custom_styling, display_header, create_sidebar, create_footer
 from utils.data_generator import generate_initial_data
+from utils.bootstrap import start_services, after_page
 
 # Set up page config with improved layout and title
 st.set_page_config(
@@ -31,20 +32,25 @@ if not os.path.exists("assets"):
 # Generate initial data if needed
 generate_initial_data()
 
+# Map the cached tables of the last run back in before serving the first page
+start_services()
+
 # Session state initialization
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.scope = {}
 
 # Authentication system
 if not st.session_state.authenticated:
     authenticate()
 else:
     # Display header with user info
-    display_header(f"Welcome, {st.session_state.username} ({st.session_state.role})")
+    display_header(f"Welcome, {st.session_state.username} ({st.session_state.role})", st.session_state.username)
     
     # Create sidebar with navigation
+    previous_page = st.session_state.get("current_page")
     selected_page = create_sidebar()
     
     # Content based on selection
@@ -64,9 +70,13 @@ else:
     # Add a footer
     create_footer()
     
+    # While the user reads this page, warm the pages they usually open next
+    after_page(previous_page, selected_page)
+    
     # Logout button
     if st.sidebar.button("Logout", key="logout"):
         st.session_state.authenticated = False
         st.session_state.username = ""
         st.session_state.role = ""
+        st.session_state.scope = {}
         st.rerun() 
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""Server start-up: time to ready, to the first report and to the first page job, cold vs warm-started.
+
+Each start is a fresh Python process. "cold" has no table cache and no
+report snapshots; "warm" restarts with the Arrow table cache and the
+report snapshots left by the previous run. After warm-up the child opens
+the Report page (served from the snapshot when it can) and then runs the
+Sales page's job on the page job workers, as the Sales page does.
+
+    python benchmarks/cold_start.py --scale 100 --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+REPORT_PERIOD = "Last Year"
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with every fact table repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "*.log", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    for name in ("sales", "purchases", "expenses", "performance"):
+        path = os.path.join(data_dir, f"{name}.csv")
+        pd.concat([pd.read_csv(path)] * scale, ignore_index=True).to_csv(path, index=False)
+
+def child():
+    """One server start: warm up, then serve the first report and the first
+    page job; prints timings as JSON"""
+    started = time.perf_counter()
+    from utils.data_loader import DATA_DIR, data_version
+    from utils.offload import page_jobs
+    from utils.report_engine import VIEW_TABLES, _today, build_report, build_sales_view
+    from utils.report_snapshots import snapshot_report
+    from utils.warmup import warm_up
+    imported = time.perf_counter()
+    warm_up()
+    ready = time.perf_counter()
+    today = _today()
+    report = snapshot_report(REPORT_PERIOD, today, data_version(*VIEW_TABLES['report']))
+    if report is None:
+        build_report(REPORT_PERIOD, today)
+    first_report = time.perf_counter()
+    page_jobs.submit(("sales", today, data_version(*VIEW_TABLES['sales']), DATA_DIR, ()),
+                     build_sales_view, today, data_dir=DATA_DIR).result()
+    first_job = time.perf_counter()
+    print(json.dumps({
+        "import ms": (imported - started) * 1000,
+        "ready ms": (ready - started) * 1000,
+        "first report ms": (first_report - started) * 1000,
+        "first page job ms": (first_job - first_report) * 1000,
+    }))
+
+def start(directory):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=directory,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="copies of the sample fact table rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_dataset(directory, args.scale)
+        data_dir = os.path.join(directory, "data")
+        results = {"cold": [], "warm": []}
+        for _ in range(args.repeat):
+            shutil.rmtree(os.path.join(data_dir, "_table_cache"), ignore_errors=True)
+            if os.path.exists(os.path.join(data_dir, "report_snapshots.pkl.gz")):
+                os.remove(os.path.join(data_dir, "report_snapshots.pkl.gz"))
+            results["cold"].append(start(directory))
+            # What the previous run leaves behind: the table cache and the nightly snapshots
+            subprocess.run([sys.executable, os.path.join(ROOT, "precompute_reports.py"), "--period", REPORT_PERIOD],
+                           cwd=directory, check=True, capture_output=True)
+            results["warm"].append(start(directory))
+
+        rows = [{"start": mode, **{key: statistics.median(run[key] for run in runs) for key in runs[0]}}
+                for mode, runs in results.items()]
+        print(f"Median of {args.repeat} starts, fact tables at scale {args.scale}:")
+        print(pd.DataFrame(rows).set_index("start").round(1).to_string())
+
+if __name__ == "__main__":
+    main()
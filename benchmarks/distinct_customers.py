@@ -0,0 +1,78 @@
+"""Distinct customers of arbitrary windows and store unions: rescanning customer_id vs merging daily sketches.
+
+    python benchmarks/distinct_customers.py --rows 2000000 --customers 500000 --stores 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from utils.sketches import DailyDistinct, DailySketches
+
+def build_sales(rows, customers, days, seed):
+    """Synthetic sales rows: a date and a customer id per row"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, days, size=rows), unit="D")
+    return pd.DataFrame({'date': dates, 'customer_id': rng.integers(0, customers, size=rows)})
+
+def timed_ms(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="sales rows per store")
+    parser.add_argument("--customers", type=int, default=500_000)
+    parser.add_argument("--stores", type=int, default=4)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--windows", type=int, default=20, help="random windows counted")
+    args = parser.parse_args()
+
+    stores = [build_sales(args.rows, args.customers, args.days, seed) for seed in range(args.stores)]
+    sketches, build_ms = zip(*(timed_ms(lambda df=df: DailySketches.from_values(df['date'], df['customer_id']))
+                               for df in stores))
+    exact, exact_build_ms = zip(*(timed_ms(lambda df=df: DailyDistinct.from_values(df['date'], df['customer_id']))
+                                  for df in stores))
+    all_sales = pd.concat(stores, ignore_index=True)
+    merged, merge_ms = timed_ms(lambda: sketches[0].merge(sketches[1]) if len(sketches) > 1 else sketches[0])
+    for sketch in sketches[2:]:
+        merged = merged.merge(sketch)
+    merged_exact = exact[0]
+    for pairs in exact[1:]:
+        merged_exact = merged_exact.merge(pairs)
+
+    rng = np.random.default_rng(0)
+    rescan, sketch, exact_window, errors = [], [], [], []
+    for _ in range(args.windows):
+        first, last = sorted(rng.integers(0, args.days, size=2))
+        start = pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(first))
+        end = pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(last) + 1)
+        truth, ms = timed_ms(lambda: all_sales.loc[(all_sales['date'] >= start) & (all_sales['date'] < end), 'customer_id'].nunique())
+        rescan.append(ms)
+        estimate, ms = timed_ms(lambda: merged.count(start, end))
+        sketch.append(ms)
+        counted, ms = timed_ms(lambda: merged_exact.count(start, end))
+        exact_window.append(ms)
+        assert counted == truth
+        errors.append(abs(estimate - truth) / truth * 100)
+
+    print(f"{args.stores} stores x {args.rows:,} rows, {args.customers:,} customers over {args.days} days; "
+          f"median of {args.windows} random windows across every store:")
+    print(f"  rescan customer_id     {statistics.median(rescan):8.1f} ms")
+    print(f"  merged daily sketches  {statistics.median(sketch):8.1f} ms  "
+          f"(error median {statistics.median(errors):.2f}%, max {max(errors):.2f}%)")
+    print(f"  exact daily pairs      {statistics.median(exact_window):8.1f} ms")
+    print(f"sketch build {statistics.median(build_ms):.0f} ms/store, "
+          f"{sketches[0].registers.nbytes / 2**20:.1f} MiB/store; merge of two stores {merge_ms:.1f} ms")
+    print(f"exact build {statistics.median(exact_build_ms):.0f} ms/store, "
+          f"{exact[0].pairs.memory_usage(deep=True).sum() / 2**20:.1f} MiB/store")
+
+if __name__ == "__main__":
+    main()
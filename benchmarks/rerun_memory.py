@@ -0,0 +1,83 @@
+"""Memory allocated by one Sales-style rerun: defensive copies and per-row labels vs copy-on-write and calendar keys.
+
+Each rerun loads sales (the loader's kept frame) and builds a monthly trend
+of the last year and a daily trend of the last 30 days. "copies" does what
+the pages did before: deep-copy the loaded frame, copy the filtered slice
+and assign a per-row month string (or date) column to group on.
+"copy-on-write" takes the loader's frame as is and groups on the integer
+day_key / month_key columns with calendar_totals().
+
+    python benchmarks/rerun_memory.py --scale 100 --reruns 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with the sales rows repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    path = os.path.join(data_dir, "sales.csv")
+    df = pd.concat([pd.read_csv(path)] * scale, ignore_index=True)
+    df.to_csv(path, index=False)
+    return data_dir, len(df)
+
+def rerun_with_copies(data_dir):
+    from utils.data_loader import load_table
+    sales = load_table("sales", data_dir).copy()
+    today = sales["date"].max()
+    year = sales[sales["date"] >= today - pd.Timedelta(days=365)].copy()
+    year["month"] = year["date"].dt.to_period("M").astype(str)
+    monthly = year.groupby("month")["total_price"].sum().reset_index()
+    month = sales[sales["date"] >= today - pd.Timedelta(days=30)].copy()
+    month["day"] = month["date"].dt.date
+    daily = month.groupby("day")["total_price"].sum().reset_index()
+    return monthly, daily
+
+def rerun_copy_on_write(data_dir):
+    from utils.data_loader import calendar_totals, load_table
+    sales = load_table("sales", data_dir)
+    today = sales["date"].max()
+    monthly = calendar_totals(sales[sales["date"] >= today - pd.Timedelta(days=365)], "month", ["total_price"])
+    daily = calendar_totals(sales[sales["date"] >= today - pd.Timedelta(days=30)], "date", ["total_price"])
+    return monthly, daily
+
+def measure(rerun, data_dir, reruns):
+    """Return the median peak traced allocation (MiB) and time (ms) of a rerun"""
+    rerun(data_dir)  # the loader's first parse is not part of a rerun
+    peaks, times = [], []
+    for _ in range(reruns):
+        tracemalloc.start()
+        started = time.perf_counter()
+        rerun(data_dir)
+        times.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+    return statistics.median(peaks), statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="times the sample sales rows are repeated")
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir, rows = build_dataset(directory, args.scale)
+        print(f"{rows:,} sales rows, pandas {pd.__version__}; median of {args.reruns} reruns:")
+        for label, rerun in (("copies", rerun_with_copies), ("copy-on-write", rerun_copy_on_write)):
+            peak, ms = measure(rerun, data_dir, args.reruns)
+            print(f"  {label:14s} peak allocated {peak:8.1f} MiB  {ms:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Concurrent-session latency with heavy report aggregations in-process vs offloaded.
+
+Simulates a Streamlit server: a few "heavy" sessions keep opening the All
+Time report while "light" sessions rerun a small page; reports the light
+sessions' latency percentiles for each execution mode.
+
+    python benchmarks/session_latency.py --scale 100 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with sales and performance repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    rows = {}
+    for name in ("sales", "performance"):
+        path = os.path.join(data_dir, f"{name}.csv")
+        df = pd.concat([pd.read_csv(path)] * scale, ignore_index=True)
+        df.to_csv(path, index=False)
+        rows[name] = len(df)
+    return rows["sales"]
+
+def heavy_session(submit, stop, durations):
+    """Keep requesting the All Time report, like a manager reopening it"""
+    from utils.report_engine import build_report
+    while not stop.is_set():
+        started = time.perf_counter()
+        submit(build_report, "All Time").result()
+        durations.append(time.perf_counter() - started)
+
+def light_session(stop, latencies):
+    """Rerun a small page: a little pandas work plus Python-level rendering"""
+    df = pd.DataFrame({"product_id": range(200), "value": range(200)})
+    while not stop.is_set():
+        started = time.perf_counter()
+        df.groupby(df["product_id"] % 8)["value"].sum()
+        "".join(f"<div>{i}</div>" for i in range(2000))
+        latencies.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def run(mode, heavy, light, seconds, workers):
+    if mode == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    # Warm up: parse the tables once and start the workers
+    from utils.report_engine import build_report
+    for future in [executor.submit(build_report, "All Time") for _ in range(workers)]:
+        future.result()
+
+    stop = threading.Event()
+    heavy_durations, latencies = [], []
+    threads = [threading.Thread(target=heavy_session, args=(executor.submit, stop, heavy_durations)) for _ in range(heavy)]
+    threads += [threading.Thread(target=light_session, args=(stop, latencies)) for _ in range(light)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    executor.shutdown()
+
+    ms = [value * 1000 for value in latencies]
+    return {
+        "mode": mode,
+        "light p50 ms": statistics.median(ms),
+        "light p95 ms": percentile(ms, 0.95),
+        "light p99 ms": percentile(ms, 0.99),
+        "light reruns": len(ms),
+        "reports/s": len(heavy_durations) / seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="copies of the sample sales/performance rows")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--heavy", type=int, default=2, help="sessions reopening the All Time report")
+    parser.add_argument("--light", type=int, default=4, help="sessions rerunning a small page")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = build_dataset(directory, args.scale)
+        os.chdir(directory)  # DATA_DIR is relative
+        os.environ["DASHBOARD_TABLE_CACHE_DIR"] = os.path.join(directory, "table_cache")
+        print(f"{rows:,} sales rows, {args.heavy} heavy + {args.light} light sessions, {args.seconds:.0f}s per mode")
+
+        results = [run(mode, args.heavy, args.light, args.seconds, args.workers) for mode in ("thread", "process")]
+        print(pd.DataFrame(results).set_index("mode").round(2).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cold table loading: the Dashboard's tables parsed one after another vs concurrently.
+
+    python benchmarks/table_loading.py --scale 100 --repeat 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+TABLES = ('sales', 'inventory', 'purchases', 'expenses', 'performance')
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with every fact table repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "*.log", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    for name in ("sales", "purchases", "expenses", "performance"):
+        path = os.path.join(data_dir, f"{name}.csv")
+        pd.concat([pd.read_csv(path)] * scale, ignore_index=True).to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="copies of the sample fact table rows")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_dataset(directory, args.scale)
+        os.chdir(directory)  # DATA_DIR is relative
+        from utils import metrics
+        from utils.data_loader import DATA_DIR, _load_pool, load_table
+        from utils.storage import read_snapshot
+
+        sequential, parallel = [], []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            for name in TABLES:
+                load_table(name)
+            sequential.append(time.perf_counter() - started)
+        # Per-table times from the sequential runs, without contention
+        per_table = {row["table"]: row["p50_ms"] for row in metrics.summary() if row["metric"] == "table_load"}
+
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            # What load_tables() does on a table cache miss
+            read_snapshot(DATA_DIR, TABLES, load_table, executor=_load_pool)
+            parallel.append(time.perf_counter() - started)
+
+        print(f"Median of {args.repeat} runs, {len(TABLES)} tables at scale {args.scale}, {os.cpu_count()} CPU(s):")
+        print(f"  sequential      {statistics.median(sequential) * 1000:8.1f} ms")
+        print(f"  parallel        {statistics.median(parallel) * 1000:8.1f} ms")
+        print(f"  largest table   {max(per_table.values()):8.1f} ms ({max(per_table, key=per_table.get)})")
+        print(f"  sum of tables   {sum(per_table.values()):8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Resident bytes of each loaded table: Python object strings vs Arrow-backed strings and dictionary-encoded labels.
+
+"object" converts every text column of the loaded frame back to Python
+string objects, as pandas 2 loaded them before; "loaded" is the frame as
+load_tables() returns it now.
+
+    python benchmarks/table_memory.py --scale 100
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with the fact tables repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    for name in ("sales", "purchases", "expenses", "performance"):
+        path = os.path.join(data_dir, f"{name}.csv")
+        pd.concat([pd.read_csv(path)] * scale, ignore_index=True).to_csv(path, index=False)
+    return data_dir
+
+def as_objects(df):
+    """The frame with its text columns held as Python string objects"""
+    text = [column for column, dtype in df.dtypes.items()
+            if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)) or dtype == object]
+    return df.astype({column: object for column in text}), text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="times the sample fact rows are repeated")
+    args = parser.parse_args()
+
+    from utils.data_loader import TABLE_NAMES, load_tables
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = build_dataset(directory, args.scale)
+        frames = load_tables(*TABLE_NAMES, data_dir=data_dir)
+        print(f"pandas {pd.__version__}, fact tables x{args.scale}; deep memory_usage() per table:")
+        print(f"  {'table':12s} {'rows':>10s} {'object':>10s} {'loaded':>10s}  text columns")
+        totals = [0, 0]
+        for name, df in zip(TABLE_NAMES, frames):
+            objects, text = as_objects(df)
+            before, after = objects.memory_usage(deep=True).sum(), df.memory_usage(deep=True).sum()
+            totals[0] += before
+            totals[1] += after
+            print(f"  {name:12s} {len(df):>10,} {before / 2**20:>8.2f}Mi {after / 2**20:>8.2f}Mi  {', '.join(text)}")
+        print(f"  {'total':12s} {'':>10s} {totals[0] / 2**20:>8.2f}Mi {totals[1] / 2**20:>8.2f}Mi")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Reloading sales.csv after rows are appended: full reparse vs parsing only the tail.
+
+Both include writing the table cache: the whole table after a full reparse,
+a delta file holding the new rows after a tail parse.
+
+    python benchmarks/tail_ingestion.py --scale 100 --append 3000
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+def build_dataset(directory, scale):
+    """Copy the sample data into directory with the sales rows repeated `scale` times"""
+    data_dir = os.path.join(directory, "data")
+    shutil.copytree(os.path.join(ROOT, "data"), data_dir,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "*.log", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    path = os.path.join(data_dir, "sales.csv")
+    sales = pd.concat([pd.read_csv(path)] * scale, ignore_index=True)
+    sales.to_csv(path, index=False)
+    return path, sales
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=100, help="copies of the sample sales rows")
+    parser.add_argument("--append", type=int, default=3000, help="rows appended before each reload")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path, sales = build_dataset(directory, args.scale)
+        os.chdir(directory)  # DATA_DIR is relative
+        from utils import data_loader, table_cache
+
+        new_rows = sales.tail(args.append)
+        data_loader.load_tables("sales")
+        full, tail = [], []
+        for _ in range(args.repeat):
+            new_rows.to_csv(path, mode="a", header=False, index=False)
+
+            started = time.perf_counter()
+            incremental, = data_loader.load_tables("sales")
+            tail.append(time.perf_counter() - started)
+
+            # Forget the last load and its cache file: parse and cache everything
+            data_loader._tails.clear()
+            os.remove(table_cache.cached_path("sales", data_loader.data_version("sales")))
+            started = time.perf_counter()
+            reparsed, = data_loader.load_tables("sales")
+            full.append(time.perf_counter() - started)
+            pd.testing.assert_frame_equal(incremental, reparsed)
+
+        print(f"{len(reparsed):,} sales rows, {args.append:,} appended per reload, median of {args.repeat}:")
+        print(f"  full reparse and cache   {statistics.median(full) * 1000:8.1f} ms")
+        print(f"  tail only and delta      {statistics.median(tail) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 import streamlit as st
-import os
 import hashlib
-from PIL import Image
-from utils.image_handler import ensure_images_exist
+from utils.image_handler import ensure_images_exist, get_login_image_bytes
 from utils.styling import warning_banner, info_banner
+from utils.scopes import user_scope
 
 def authenticate():
     """Handle user authentication and return authentication status"""
     # Ensure required images exist
     ensure_images_exist()
     
-    # Mock user data for demonstration
+    # Mock user data for demonstration; a user's optional "scope" (e.g.
+    # {"category": "Electronics"}) narrows the data scope of their role
     users = {
         "admin": {
             "password": "admin123",
@@ -23,39 +23,28 @@ def authenticate():
         "store": {
             "password": "store123",
             "role": "Store Manager"
+        },
+        "category": {
+            "password": "category123",
+            "role": "Category Manager"
         }
     }
     
-    # Check if assets directory exists and create if not
-    if not os.path.exists("assets"):
-        os.makedirs("assets")
-    
-    # Apply custom padding to the main container
-    st.markdown("""
-    <style>
-    .main .block-container {
-        max-width: 1200px;
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
     # Login page layout with two columns
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.markdown("""
-        <div style="text-align: center; margin-bottom: 2rem;">
-            <h1 style="color: #1e88e5; font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;">Business Management Dashboard</h1>
-            <p style="color: #6c757d; font-size: 1.1rem;">Sign in to access your dashboard</p>
+        <div class="login-page login-title">
+            <h1>Business Management Dashboard</h1>
+            <p>Sign in to access your dashboard</p>
         </div>
         """, unsafe_allow_html=True)
         
         # Stylish login container
         st.markdown("""
-        <div style="background-color: white; padding: 2.5rem; border-radius: 8px; box-shadow: 0 4px 20px rgba(0,0,0,0.1); border-top: 4px solid #1e88e5; margin-bottom: 1.5rem;">
-            <h3 style="color: #212529; text-align: center; margin-bottom: 1.5rem; font-weight: 600;">Login to Your Account</h3>
+        <div class="login-box">
+            <h3>Login to Your Account</h3>
         """, unsafe_allow_html=True)
         
         # Login form
@@ -64,17 +53,18 @@ def authenticate():
             password = st.text_input("Password", type="password", placeholder="Enter your password")
             
             # Role selection dropdown with better styling
-            role_options = ["Admin", "Manager", "Store Manager"]
+            role_options = ["Admin", "Manager", "Store Manager", "Category Manager"]
             role = st.selectbox("Select Role", role_options)
             
             # Info about available accounts
             st.markdown("""
-            <div style="background-color: #e3f2fd; padding: 1rem; border-radius: 8px; margin: 1rem 0; font-size: 0.9rem;">
-                <p style="margin-bottom: 0.5rem; font-weight: 600;">Available Demo Accounts:</p>
-                <ul style="margin-bottom: 0; padding-left: 1.5rem;">
+            <div class="login-accounts">
+                <p>Available Demo Accounts:</p>
+                <ul>
                     <li><strong>Admin:</strong> username: admin, password: admin123</li>
                     <li><strong>Manager:</strong> username: manager, password: manager123</li>
                     <li><strong>Store Manager:</strong> username: store, password: store123</li>
+                    <li><strong>Category Manager:</strong> username: category, password: category123</li>
                 </ul>
             </div>
             """, unsafe_allow_html=True)
@@ -86,40 +76,38 @@ def authenticate():
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
-        # Display logo/welcome image
-        if os.path.exists("assets/login_image.png"):
-            image = Image.open("assets/login_image.png")
-            st.image(image, use_column_width=True)
+        # Display logo/welcome image from the shared in-memory encoding
+        st.image(get_login_image_bytes("large"), use_column_width=True)
         
         # Display welcome information
         st.markdown("""
-        <div style="background-color: white; padding: 2rem; border-radius: 8px; margin-top: 1rem; box-shadow: 0 4px 20px rgba(0,0,0,0.1); border-top: 4px solid #28a745;">
-            <h4 style="color: #212529; margin-bottom: 1rem; font-weight: 600;">Welcome to the Business Dashboard</h4>
+        <div class="login-welcome">
+            <h4>Welcome to the Business Dashboard</h4>
             
-            <p style="color: #6c757d; margin-bottom: 1.5rem;">A complete solution to manage and monitor all aspects of your business operations.</p>
+            <p>A complete solution to manage and monitor all aspects of your business operations.</p>
             
-            <div style="margin-bottom: 1.5rem;">
-                <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-                    <div style="background-color: #e3f2fd; width: 40px; height: 40px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 1rem; color: #1e88e5; font-size: 1.25rem;">📊</div>
+            <div class="login-features">
+                <div class="login-feature">
+                    <div class="login-feature-icon analytics">📊</div>
                     <div>
-                        <p style="margin: 0; font-weight: 600; color: #212529;">Data Analytics</p>
-                        <p style="margin: 0; color: #6c757d; font-size: 0.9rem;">Real-time metrics and visualizations</p>
+                        <p class="feature-name">Data Analytics</p>
+                        <p class="feature-detail">Real-time metrics and visualizations</p>
                     </div>
                 </div>
                 
-                <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-                    <div style="background-color: #e8f5e9; width: 40px; height: 40px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 1rem; color: #28a745; font-size: 1.25rem;">📦</div>
+                <div class="login-feature">
+                    <div class="login-feature-icon inventory">📦</div>
                     <div>
-                        <p style="margin: 0; font-weight: 600; color: #212529;">Inventory Management</p>
-                        <p style="margin: 0; color: #6c757d; font-size: 0.9rem;">Track stock levels and automate ordering</p>
+                        <p class="feature-name">Inventory Management</p>
+                        <p class="feature-detail">Track stock levels and automate ordering</p>
                     </div>
                 </div>
                 
-                <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-                    <div style="background-color: #fff8e1; width: 40px; height: 40px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 1rem; color: #ffc107; font-size: 1.25rem;">💰</div>
+                <div class="login-feature">
+                    <div class="login-feature-icon sales">💰</div>
                     <div>
-                        <p style="margin: 0; font-weight: 600; color: #212529;">Sales & Performance</p>
-                        <p style="margin: 0; color: #6c757d; font-size: 0.9rem;">Comprehensive sales tracking and reporting</p>
+                        <p class="feature-name">Sales & Performance</p>
+                        <p class="feature-detail">Comprehensive sales tracking and reporting</p>
                     </div>
                 </div>
             </div>
@@ -137,6 +125,7 @@ def authenticate():
             st.session_state.authenticated = True
             st.session_state.username = username
             st.session_state.role = role
+            st.session_state.scope = user_scope(role, users[username].get("scope"))
             st.rerun()
         else:
             # Failed login
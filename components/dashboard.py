@@ -3,53 +3,70 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 from utils.styling import kpi_metric, card, info_banner, stat_row
+from utils.jobs import SingleFlight
+from utils.live_sales import LIVE_INTERVAL, get_live_sales
+from utils.report_engine import VIEW_TABLES, build_dashboard_view
+from utils.shards import shard_versions
+from utils.scopes import row_scope, scope_label, scope_stores
+from utils.stores import ALL_STORES, store_dirs
 
-def show_dashboard():
-    """Display the main dashboard with KPIs and charts"""
-    
-    # User info banner
-    info_banner("You have full access to all dashboard features and data")
-    
-    # Load data
-    sales_df = pd.read_csv('data/sales.csv')
-    inventory_df = pd.read_csv('data/inventory.csv')
-    purchases_df = pd.read_csv('data/purchases.csv')
-    expenses_df = pd.read_csv('data/expenses.csv')
-    
-    # Convert date columns to datetime
-    sales_df['date'] = pd.to_datetime(sales_df['date'])
-    purchases_df['date'] = pd.to_datetime(purchases_df['date'])
-    expenses_df['date'] = pd.to_datetime(expenses_df['date'])
-    
-    # Filter data for the last 30 days
-    last_30_days = datetime.now() - timedelta(days=30)
-    sales_last_30days = sales_df[sales_df['date'] >= last_30_days]
-    
-    # Calculate current month and previous month data for comparison
-    current_month = sales_df['date'].dt.to_period('M').max()
-    previous_month = current_month - 1
-    
-    sales_current_month = sales_df[sales_df['date'].dt.to_period('M') == current_month]
-    sales_previous_month = sales_df[sales_df['date'].dt.to_period('M') == previous_month]
-    
+# Sessions opening the Dashboard at the same time share one computation
+_dashboard_flights = SingleFlight("dashboard")
+
+def _change_percent(value, previous):
+    return ((value - previous) / previous * 100) if previous > 0 else 0
+
+def sales_kpi(total_sales, prev_sales):
+    """Show the TOTAL SALES card"""
+    sales_change_percent = _change_percent(total_sales, prev_sales)
+    st.markdown(kpi_metric(
+        title="TOTAL SALES", 
+        value=f"${total_sales:,.0f}" if total_sales > 1000 else f"${total_sales:,.2f}", 
+        trend="up" if sales_change_percent > 0 else "down", 
+        trend_value=f"{abs(sales_change_percent):.1f}% vs last month"), 
+        unsafe_allow_html=True
+    )
+
+def orders_kpi(total_orders, prev_orders):
+    """Show the TOTAL ORDERS card"""
+    orders_change_percent = _change_percent(total_orders, prev_orders)
+    st.markdown(kpi_metric(
+        title="TOTAL ORDERS", 
+        value=f"{total_orders}", 
+        trend="up" if orders_change_percent > 0 else "down", 
+        trend_value=f"{abs(orders_change_percent):.1f}% vs last month"), 
+        unsafe_allow_html=True
+    )
+
+def customers_kpi(total_customers, prev_customers, exact=True):
+    """Show the TOTAL CUSTOMERS card, marked as an estimate when counted from sketches"""
+    customers_change_percent = _change_percent(total_customers, prev_customers)
+    st.markdown(kpi_metric(
+        title="TOTAL CUSTOMERS" if exact else "TOTAL CUSTOMERS (EST.)", 
+        value=f"{total_customers}", 
+        trend="up" if customers_change_percent > 0 else "down", 
+        trend_value=f"{abs(customers_change_percent):.1f}% vs last month"), 
+        unsafe_allow_html=True
+    )
+
+def month_kpis(current, previous):
+    """Show the KPI cards of the current month against the previous one"""
     # Calculate KPIs
-    total_sales = sales_current_month['total_price'].sum()
-    prev_sales = sales_previous_month['total_price'].sum()
+    total_sales = current['sales']
+    prev_sales = previous['sales']
     sales_change_percent = ((total_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
     
-    total_orders = len(sales_current_month)
-    prev_orders = len(sales_previous_month)
-    orders_change_percent = ((total_orders - prev_orders) / prev_orders * 100) if prev_orders > 0 else 0
+    total_orders = current['orders']
+    prev_orders = previous['orders']
     
-    total_customers = len(sales_current_month['customer_id'].unique())
-    prev_customers = len(sales_previous_month['customer_id'].unique())
-    customers_change_percent = ((total_customers - prev_customers) / prev_customers * 100) if prev_customers > 0 else 0
+    total_customers = current['customers']
+    prev_customers = previous['customers']
     
-    avg_order_value = sales_current_month['total_price'].mean()
-    prev_avg_order = sales_previous_month['total_price'].mean()
+    avg_order_value = current['avg_order_value']
+    prev_avg_order = previous['avg_order_value']
     aov_change_percent = ((avg_order_value - prev_avg_order) / prev_avg_order * 100) if prev_avg_order > 0 else 0
     
     conversion_rate = 3.5  # Example value
@@ -59,36 +76,16 @@ def show_dashboard():
     revenue_growth = sales_change_percent
     
     # First row of KPIs
-    st.markdown("<h2>Key Performance Indicators</h2>", unsafe_allow_html=True)
-    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.markdown(kpi_metric(
-            title="TOTAL SALES", 
-            value=f"${total_sales:,.0f}" if total_sales > 1000 else f"${total_sales:,.2f}", 
-            trend="up" if sales_change_percent > 0 else "down", 
-            trend_value=f"{abs(sales_change_percent):.1f}% vs last month"), 
-            unsafe_allow_html=True
-        )
+        sales_kpi(total_sales, prev_sales)
     
     with col2:
-        st.markdown(kpi_metric(
-            title="TOTAL ORDERS", 
-            value=f"{total_orders}", 
-            trend="up" if orders_change_percent > 0 else "down", 
-            trend_value=f"{abs(orders_change_percent):.1f}% vs last month"), 
-            unsafe_allow_html=True
-        )
+        orders_kpi(total_orders, prev_orders)
     
     with col3:
-        st.markdown(kpi_metric(
-            title="TOTAL CUSTOMERS", 
-            value=f"{total_customers}", 
-            trend="up" if customers_change_percent > 0 else "down", 
-            trend_value=f"{abs(customers_change_percent):.1f}% vs last month"), 
-            unsafe_allow_html=True
-        )
+        customers_kpi(total_customers, prev_customers, current['customers_exact'])
     
     # Second row of KPIs
     col4, col5, col6 = st.columns(3)
@@ -119,6 +116,106 @@ def show_dashboard():
             trend_value=f"{abs(revenue_growth):.1f}% vs last month"), 
             unsafe_allow_html=True
         )
+
+def daily_sales_chart(daily_sales):
+    """Draw the daily sales trend of the last 15 days with a moving average"""
+    fig2 = px.line(
+        daily_sales,
+        x='date',
+        y='total_price',
+        labels={'date': '', 'total_price': 'Revenue ($)'},
+        title='Daily Sales Trend (Last 15 Days)'
+    )
+
+    fig2.update_traces(line=dict(color='#2ecc71', width=3), 
+                      mode='lines+markers',
+                      marker=dict(size=8, color='#27ae60'))
+    fig2.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        title={
+            'font': {'size': 20, 'color': '#2c3e50', 'family': 'Arial, sans-serif'},
+            'x': 0.05,
+            'xanchor': 'left',
+            'y': 0.95
+        },
+        margin=dict(l=20, r=20, t=50, b=30),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='#f0f0f0',
+            tickfont=dict(family='Arial, sans-serif', size=12, color='#7f8c8d'),
+            tickformat='%b %d'
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='#f0f0f0',
+            tickfont=dict(family='Arial, sans-serif', size=12, color='#7f8c8d'),
+            tickprefix='$',
+            title='Revenue ($)'
+        ),
+        height=400,
+        width=None
+    )
+
+    # Add a moving average line
+    window_size = 3
+    moving_avg = daily_sales['total_price'].rolling(window=window_size, min_periods=1).mean()
+
+    fig2.add_trace(go.Scatter(
+        x=daily_sales['date'],
+        y=moving_avg,
+        mode='lines',
+        name=f'{window_size}-Day Moving Avg',
+        line=dict(color='#f39c12', width=2, dash='solid'),
+    ))
+
+    st.plotly_chart(fig2, use_container_width=True)
+
+# Live mode: only these elements rerun on the timer, from the running
+# totals of utils/live_sales.py rather than the full sales history
+def _live_month_kpis_body(data_dirs):
+    # All month cards in one fragment, so they tick from the same totals
+    month_kpis(*get_live_sales(*data_dirs).month_totals())
+
+def _live_daily_sales_chart_body(data_dirs, today):
+    daily_sales_chart(get_live_sales(*data_dirs).daily_trend(today))
+
+LIVE_SUPPORTED = hasattr(st, "fragment")
+if LIVE_SUPPORTED:
+    _live_month_kpis = st.fragment(run_every=LIVE_INTERVAL)(_live_month_kpis_body)
+    _live_daily_sales_chart = st.fragment(run_every=LIVE_INTERVAL)(_live_daily_sales_chart_body)
+
+def show_dashboard():
+    """Display the main dashboard with KPIs and charts"""
+    
+    # User info banner: what the user's scope lets them see
+    scope = st.session_state.get("scope", {})
+    if scope:
+        info_banner(f"Your access is limited to {scope_label(scope)}")
+    else:
+        info_banner("You have full access to all dashboard features and data")
+    
+    # With several stores in the user's scope, show one store or the totals
+    # across all of them; a store manager only ever touches their own store
+    stores = scope_stores(scope)
+    store = st.selectbox("Store", [ALL_STORES, *stores], key="dashboard_store") if len(stores) > 1 else stores[0]
+    data_dirs = store_dirs(store)
+    rows = row_scope(scope)
+    
+    # The live rollup covers every row of a store, so it is off for row scopes
+    live = LIVE_SUPPORTED and not rows and st.toggle("Live updates", key="dashboard_live",
+                                                     help="Refresh this month's KPIs and the daily trend as new sales arrive")
+    
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    view = _dashboard_flights.do(("dashboard", today, tuple(data_dirs), rows, shard_versions(VIEW_TABLES['dashboard'], data_dirs)),
+                                 build_dashboard_view, data_dirs, today, rows)
+    current, previous = view['current_month'], view['previous_month']
+    
+    st.markdown("<h2>Key Performance Indicators</h2>", unsafe_allow_html=True)
+    if live:
+        _live_month_kpis(data_dirs)
+    else:
+        month_kpis(current, previous)
     
     # Charts row with sales overview
     st.markdown("<h2>Sales Overview</h2>", unsafe_allow_html=True)
@@ -128,11 +225,10 @@ def show_dashboard():
     
     with chart_col1:
         # Create the Monthly Sales chart
-        monthly_sales = sales_df.set_index('date').resample('ME')['total_price'].sum().reset_index()
-        monthly_sales['month'] = monthly_sales['date'].dt.strftime('%b')
+        monthly_sales = view['monthly_sales']
         
         fig1 = px.bar(
-            monthly_sales.tail(12),
+            monthly_sales,
             x='month',
             y='total_price',
             labels={'month': '', 'total_price': 'Revenue ($)'},
@@ -169,7 +265,7 @@ def show_dashboard():
         )
         
         # Add a trend line
-        monthly_revenue = monthly_sales.tail(12)['total_price']
+        monthly_revenue = monthly_sales['total_price']
         x = list(range(len(monthly_revenue)))
         
         trend_line = np.polyfit(x, monthly_revenue, 1)
@@ -177,7 +273,7 @@ def show_dashboard():
         trend_values = trend_fn(x)
         
         fig1.add_trace(go.Scatter(
-            x=monthly_sales.tail(12)['month'],
+            x=monthly_sales['month'],
             y=trend_values,
             mode='lines',
             name='Trend',
@@ -188,60 +284,10 @@ def show_dashboard():
         
     with chart_col2:
         # Create daily sales trend chart
-        daily_sales = sales_last_30days.set_index('date').resample('D')['total_price'].sum().reset_index()
-        daily_sales = daily_sales.tail(15)  # Last 15 days for better visibility
-        
-        fig2 = px.line(
-            daily_sales,
-            x='date',
-            y='total_price',
-            labels={'date': '', 'total_price': 'Revenue ($)'},
-            title='Daily Sales Trend (Last 15 Days)'
-        )
-        
-        fig2.update_traces(line=dict(color='#2ecc71', width=3), 
-                          mode='lines+markers',
-                          marker=dict(size=8, color='#27ae60'))
-        fig2.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            title={
-                'font': {'size': 20, 'color': '#2c3e50', 'family': 'Arial, sans-serif'},
-                'x': 0.05,
-                'xanchor': 'left',
-                'y': 0.95
-            },
-            margin=dict(l=20, r=20, t=50, b=30),
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='#f0f0f0',
-                tickfont=dict(family='Arial, sans-serif', size=12, color='#7f8c8d'),
-                tickformat='%b %d'
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='#f0f0f0',
-                tickfont=dict(family='Arial, sans-serif', size=12, color='#7f8c8d'),
-                tickprefix='$',
-                title='Revenue ($)'
-            ),
-            height=400,
-            width=None
-        )
-        
-        # Add a moving average line
-        window_size = 3
-        daily_sales['moving_avg'] = daily_sales['total_price'].rolling(window=window_size, min_periods=1).mean()
-        
-        fig2.add_trace(go.Scatter(
-            x=daily_sales['date'],
-            y=daily_sales['moving_avg'],
-            mode='lines',
-            name=f'{window_size}-Day Moving Avg',
-            line=dict(color='#f39c12', width=2, dash='solid'),
-        ))
-        
-        st.plotly_chart(fig2, use_container_width=True)
+        if live:
+            _live_daily_sales_chart(data_dirs, today)
+        else:
+            daily_sales_chart(view['daily_sales'])
     
     # Additional data insights
     st.markdown("<h2>Business Insights</h2>", unsafe_allow_html=True)
@@ -250,9 +296,7 @@ def show_dashboard():
     
     with insight_col1:
         # Payment methods distribution
-        payment_counts = sales_df['payment_method'].value_counts().reset_index()
-        payment_counts.columns = ['method', 'count']
-        payment_counts['percentage'] = (payment_counts['count'] / payment_counts['count'].sum() * 100).round(1)
+        payment_counts = view['payment_counts']
         
         fig3 = px.pie(
             payment_counts,
@@ -299,7 +343,7 @@ def show_dashboard():
         
     with insight_col2:
         # Product categories and sales
-        category_sales = sales_df.groupby('category')['total_price'].sum().sort_values(ascending=False).reset_index()
+        category_sales = view['category_sales']
         
         fig4 = px.bar(
             category_sales,
@@ -347,20 +391,21 @@ def show_dashboard():
     
     with card_col1:
         # Top selling products
-        top_products = sales_df.groupby('product_name')['quantity'].sum().sort_values(ascending=False).head(5)
+        top_products = view['top_products']
         
         top_products_html = ""
-        for product, quantity in top_products.items():
+        for product, quantity in zip(top_products['product_name'], top_products['quantity']):
             top_products_html += stat_row(product, f"{quantity} units")
         
         st.markdown(card("Top Selling Products", top_products_html), unsafe_allow_html=True)
         
     with card_col2:
         # Inventory status
-        low_stock_count = len(inventory_df[inventory_df['current_stock'] <= inventory_df['reorder_level']])
-        out_of_stock = len(inventory_df[inventory_df['current_stock'] == 0])
-        total_inventory_value = inventory_df['total_value'].sum()
-        avg_inventory_level = inventory_df['current_stock'].mean()
+        inventory = view['inventory']
+        low_stock_count = inventory['low_stock_count']
+        out_of_stock = inventory['out_of_stock']
+        total_inventory_value = inventory['total_value']
+        avg_inventory_level = inventory['avg_level']
         
         inventory_stats_html = ""
         inventory_stats_html += stat_row("Low Stock Items", f"{low_stock_count} products", icon="⚠️", value_color="#f39c12")
@@ -372,7 +417,7 @@ def show_dashboard():
         
     with card_col3:
         # Recent activity
-        latest_sales = sales_df.sort_values('date', ascending=False).head(4)
+        latest_sales = view['latest_sales']
         
         activity_html = ""
         for _, sale in latest_sales.iterrows():
@@ -4,19 +4,21 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.styling import kpi_metric
+from utils.data_loader import load_tables, attach_dimensions
+from utils.scopes import row_scope, scope_data_dir
 
 def show_inventory():
     """Display the inventory dashboard with KPIs and charts"""
     
     st.header("Inventory Management")
     
-    # Load inventory data
-    inventory_df = pd.read_csv('data/inventory.csv')
-    sales_df = pd.read_csv('data/sales.csv')
-    purchases_df = pd.read_csv('data/purchases.csv')
-    
-    # Convert dates
-    sales_df['date'] = pd.to_datetime(sales_df['date'])
+    # Load inventory data (dates are parsed by the loader), only the rows
+    # within the user's scope
+    scope = st.session_state.get("scope", {})
+    data_dir = scope_data_dir(scope)
+    inventory_df, sales_df, purchases_df = load_tables(
+        'inventory', 'sales', 'purchases', data_dir=data_dir, scope=row_scope(scope)
+    )
     
     # Calculate KPIs
     total_items = inventory_df['current_stock'].sum()
@@ -33,16 +35,15 @@ def show_inventory():
     
     # Calculate stock turnover ratio (using last 30 days of sales)
     last_30_days_sales = sales_df[sales_df['date'] >= (pd.Timestamp.now() - pd.Timedelta(days=30))]
-    sales_by_product = last_30_days_sales.groupby('product_id')['quantity'].sum().reset_index()
+    sales_by_product = last_30_days_sales.groupby('product_id')['quantity'].sum()
     
-    # Merge with inventory to calculate turnover
-    inventory_with_sales = inventory_df.merge(sales_by_product, left_on='product_id', right_on='product_id', how='left')
-    inventory_with_sales['quantity'] = inventory_with_sales['quantity'].fillna(0)
-    inventory_with_sales['turnover_ratio'] = inventory_with_sales['quantity'] / inventory_with_sales['current_stock']
+    # Map the sold quantities onto inventory to calculate turnover
+    sold = inventory_df['product_id'].map(sales_by_product).fillna(0)
+    inventory_with_sales = inventory_df.assign(quantity=sold, turnover_ratio=sold / inventory_df['current_stock'])
     avg_turnover = inventory_with_sales['turnover_ratio'].mean()
     
     # KPI Row
-    st.markdown("<h3 style='text-align: center;'>Inventory Metrics</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Inventory Metrics</h3>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -63,7 +64,7 @@ def show_inventory():
     st.markdown("<hr/>", unsafe_allow_html=True)
     
     # Charts
-    st.markdown("<h3 style='text-align: center;'>Inventory Analysis</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Inventory Analysis</h3>", unsafe_allow_html=True)
     
     # Chart 1: Inventory Levels by Category
     inventory_by_category = inventory_df.groupby('category')[['current_stock', 'total_value']].sum().reset_index()
@@ -164,7 +165,7 @@ def show_inventory():
         st.plotly_chart(fig4, use_container_width=True)
     
     # Additional section: Low stock items table
-    st.markdown("<h3 style='text-align: center;'>Inventory Management</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Inventory Management</h3>", unsafe_allow_html=True)
     
     tab1, tab2, tab3 = st.tabs(["Low Stock Items", "All Inventory", "Stock Movement"])
     
@@ -189,7 +190,7 @@ def show_inventory():
     
     with tab3:
         st.markdown("#### Recent Stock Movements")
-        recent_purchases = purchases_df.sort_values('date', ascending=False).head(10)
+        recent_purchases = attach_dimensions(purchases_df.sort_values('date', ascending=False).head(10), ['product_name'], data_dir=data_dir)
         st.dataframe(
             recent_purchases[['date', 'product_name', 'quantity', 'unit_cost', 'total_cost', 'status']],
             use_container_width=True,
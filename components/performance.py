@@ -1,79 +1,67 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from utils.styling import kpi_metric
+from datetime import datetime
+from utils.styling import kpi_metric, job_result
+from utils.data_loader import data_version
+from utils.offload import page_jobs
+from utils.report_engine import VIEW_TABLES, PERFORMANCE_PERIODS, build_performance_view
+from utils.scopes import row_scope, scope_data_dir
 
 def show_performance():
     """Display the performance dashboard with KPIs and charts"""
     
     st.header("Performance Management")
     
-    # Load data
-    performance_df = pd.read_csv('data/performance.csv')
-    sales_df = pd.read_csv('data/sales.csv')
-    expenses_df = pd.read_csv('data/expenses.csv')
-    
-    # Convert date columns to datetime
-    performance_df['date'] = pd.to_datetime(performance_df['date'])
-    sales_df['date'] = pd.to_datetime(sales_df['date'])
-    expenses_df['date'] = pd.to_datetime(expenses_df['date'])
-    
-    # Filter data for different time periods
-    current_date = datetime.now()
-    last_month_date = current_date - timedelta(days=30)
-    last_2month_date = current_date - timedelta(days=60)
-    
-    # Get last 30 days performance
-    last_30_days_perf = performance_df[performance_df['date'] >= last_month_date]
-    prev_30_days_perf = performance_df[(performance_df['date'] >= last_2month_date) & (performance_df['date'] < last_month_date)]
-    
-    # Sales and expenses for financial KPIs
-    last_30_days_sales = sales_df[sales_df['date'] >= last_month_date]
-    prev_30_days_sales = sales_df[(sales_df['date'] >= last_2month_date) & (sales_df['date'] < last_month_date)]
-    
-    last_30_days_expenses = expenses_df[expenses_df['date'] >= last_month_date]
-    prev_30_days_expenses = expenses_df[(expenses_df['date'] >= last_2month_date) & (expenses_df['date'] < last_month_date)]
+    # Aggregations run in the background, shared by every session on the same
+    # data and scope; only rows within the user's scope are loaded
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    scope = st.session_state.get("scope", {})
+    data_dir, rows = scope_data_dir(scope), row_scope(scope)
+    view = job_result(page_jobs.submit(("performance", today, data_version(*VIEW_TABLES['performance'], data_dir=data_dir), data_dir, rows),
+                                       build_performance_view, today, data_dir=data_dir, scope=rows))
+    if view is None:
+        return  # the progress block reruns the page once the job is done
+    last_30_days, prev_30_days = view['last_30_days'], view['previous_30_days']
     
     # Calculate KPIs
     # 1. Sales Performance
-    total_sales = last_30_days_sales['total_price'].sum()
-    prev_sales = prev_30_days_sales['total_price'].sum()
+    total_sales = last_30_days['sales']
+    prev_sales = prev_30_days['sales']
     sales_change_percent = ((total_sales - prev_sales) / prev_sales * 100) if prev_sales > 0 else 0
     
     # 2. Average Customer Satisfaction
-    avg_satisfaction = last_30_days_perf['customer_satisfaction'].mean()
-    prev_satisfaction = prev_30_days_perf['customer_satisfaction'].mean()
+    avg_satisfaction = last_30_days['satisfaction']
+    prev_satisfaction = prev_30_days['satisfaction']
     satisfaction_change = avg_satisfaction - prev_satisfaction
     
     # 3. Profit Margin
-    total_profit = last_30_days_sales['profit'].sum()
+    total_profit = last_30_days['profit']
     profit_margin = (total_profit / total_sales * 100) if total_sales > 0 else 0
-    prev_profit = prev_30_days_sales['profit'].sum()
+    prev_profit = prev_30_days['profit']
     prev_margin = (prev_profit / prev_sales * 100) if prev_sales > 0 else 0
     margin_change = profit_margin - prev_margin
     
     # 4. Average Productivity
-    avg_productivity = last_30_days_perf['productivity_score'].mean()
-    prev_productivity = prev_30_days_perf['productivity_score'].mean()
+    avg_productivity = last_30_days['productivity']
+    prev_productivity = prev_30_days['productivity']
     productivity_change = avg_productivity - prev_productivity
     
     # 5. Attendance Rate
-    attendance_rate = last_30_days_perf['attendance'].mean() * 100
-    prev_attendance = prev_30_days_perf['attendance'].mean() * 100
+    attendance_rate = last_30_days['attendance'] * 100
+    prev_attendance = prev_30_days['attendance'] * 100
     attendance_change = attendance_rate - prev_attendance
     
     # 6. Expense to Revenue Ratio
-    total_expenses = last_30_days_expenses['amount'].sum()
+    total_expenses = last_30_days['expenses']
     expense_ratio = (total_expenses / total_sales * 100) if total_sales > 0 else 0
-    prev_expenses = prev_30_days_expenses['amount'].sum()
+    prev_expenses = prev_30_days['expenses']
     prev_expense_ratio = (prev_expenses / prev_sales * 100) if prev_sales > 0 else 0
     ratio_change = expense_ratio - prev_expense_ratio
     
     # KPI Row
-    st.markdown("<h3 style='text-align: center;'>Performance Metrics (Last 30 Days)</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Performance Metrics (Last 30 Days)</h3>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -94,26 +82,18 @@ def show_performance():
     st.markdown("<hr/>", unsafe_allow_html=True)
     
     # Charts
-    st.markdown("<h3 style='text-align: center;'>Performance Analysis</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Performance Analysis</h3>", unsafe_allow_html=True)
     
     # Filter for performance data
     time_period = st.selectbox(
         "Select Time Period", 
-        ["Last 7 Days", "Last 30 Days", "Last 90 Days"],
+        list(PERFORMANCE_PERIODS),
         index=1
     )
-    
-    if time_period == "Last 7 Days":
-        filter_date = current_date - timedelta(days=7)
-    elif time_period == "Last 30 Days":
-        filter_date = current_date - timedelta(days=30)
-    else:
-        filter_date = current_date - timedelta(days=90)
-    
-    filtered_perf = performance_df[performance_df['date'] >= filter_date]
+    period_view = view['periods'][time_period]
     
     # Chart 1: Employee Performance Comparison
-    employee_perf = filtered_perf.groupby(['employee_name', 'role'])[['sales_value', 'customer_satisfaction', 'productivity_score']].mean().reset_index()
+    employee_perf = period_view['employee_perf']
     
     fig1 = px.bar(
         employee_perf,
@@ -135,7 +115,7 @@ def show_performance():
     )
     
     # Chart 2: Customer Satisfaction Trend
-    satisfaction_trend = filtered_perf.groupby(filtered_perf['date'].dt.date)['customer_satisfaction'].mean().reset_index()
+    satisfaction_trend = period_view['satisfaction_trend']
     
     fig2 = px.line(
         satisfaction_trend,
@@ -155,8 +135,7 @@ def show_performance():
     )
     
     # Chart 3: Sales Performance by Employee
-    sales_by_employee = filtered_perf.groupby('employee_name')['sales_value'].sum().reset_index()
-    sales_by_employee = sales_by_employee.sort_values('sales_value', ascending=False)
+    sales_by_employee = period_view['sales_by_employee']
     
     fig3 = px.bar(
         sales_by_employee,
@@ -177,9 +156,7 @@ def show_performance():
     )
     
     # Chart 4: Attendance Rate by Employee
-    attendance_by_employee = filtered_perf.groupby('employee_name')['attendance'].mean().reset_index()
-    attendance_by_employee['attendance_rate'] = attendance_by_employee['attendance'] * 100
-    attendance_by_employee = attendance_by_employee.sort_values('attendance_rate')
+    attendance_by_employee = period_view['attendance_by_employee']
     
     fig4 = px.bar(
         attendance_by_employee,
@@ -217,26 +194,15 @@ def show_performance():
         st.plotly_chart(fig4, use_container_width=True)
     
     # Employee Performance Details
-    st.markdown("<h3 style='text-align: center;'>Employee Performance Details</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Employee Performance Details</h3>", unsafe_allow_html=True)
     
-    # Allow filtering by role
-    role_filter = st.selectbox("Filter by Role", ["All"] + list(filtered_perf['role'].unique()))
+    # Allow filtering by role; metrics are per employee, so filtering the
+    # aggregated rows matches filtering the records first
+    employee_metrics = period_view['employee_metrics']
+    role_filter = st.selectbox("Filter by Role", ["All"] + list(employee_metrics['role'].unique()))
     
     if role_filter != "All":
-        filtered_perf = filtered_perf[filtered_perf['role'] == role_filter]
-    
-    # Get employee average metrics
-    employee_metrics = filtered_perf.groupby('employee_name').agg({
-        'sales_count': 'sum',
-        'sales_value': 'sum',
-        'customer_satisfaction': 'mean',
-        'attendance': 'mean',
-        'productivity_score': 'mean'
-    }).reset_index()
-    
-    employee_metrics['attendance_rate'] = (employee_metrics['attendance'] * 100).round(1)
-    employee_metrics['customer_satisfaction'] = employee_metrics['customer_satisfaction'].round(1)
-    employee_metrics['productivity_score'] = employee_metrics['productivity_score'].round(1)
+        employee_metrics = employee_metrics[employee_metrics['role'] == role_filter]
     
     # Show the dataframe
     st.dataframe(
@@ -5,18 +5,22 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from utils.styling import kpi_metric
+from utils.data_loader import load_tables, attach_dimensions, aggregate_by, calendar_totals, label_counts
+from utils.purchase_log import create_purchase_order
+from utils.scopes import row_scope, scope_data_dir
 
 def show_purchase():
     """Display the purchase dashboard with KPIs and charts"""
     
     st.header("Purchase Management")
     
-    # Load data
-    purchases_df = pd.read_csv('data/purchases.csv')
-    inventory_df = pd.read_csv('data/inventory.csv')
-    
-    # Convert date column to datetime
-    purchases_df['date'] = pd.to_datetime(purchases_df['date'])
+    # Load data (date column is parsed by the loader), only the rows within
+    # the user's scope
+    scope = st.session_state.get("scope", {})
+    data_dir = scope_data_dir(scope)
+    purchases_df, inventory_df = load_tables(
+        'purchases', 'inventory', data_dir=data_dir, scope=row_scope(scope)
+    )
     
     # Filter data
     current_month = datetime.now().replace(day=1)
@@ -48,7 +52,7 @@ def show_purchase():
     avg_purchase_value = current_month_purchases['total_cost'].mean() if len(current_month_purchases) > 0 else 0
     
     # KPI Row
-    st.markdown("<h3 style='text-align: center;'>Purchase Metrics</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Purchase Metrics</h3>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -69,12 +73,11 @@ def show_purchase():
     st.markdown("<hr/>", unsafe_allow_html=True)
     
     # Charts
-    st.markdown("<h3 style='text-align: center;'>Purchase Analysis</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Purchase Analysis</h3>", unsafe_allow_html=True)
     
     # Chart 1: Monthly Purchase Trend
     # Group by month and calculate total purchase value
-    purchases_df['month'] = purchases_df['date'].dt.to_period('M')
-    monthly_purchases = purchases_df.groupby(purchases_df['month'].astype(str))['total_cost'].sum().reset_index()
+    monthly_purchases = calendar_totals(purchases_df, 'month', ['total_cost'])
     
     # Get the last 6 months for better visualization
     monthly_purchases = monthly_purchases.tail(6)
@@ -97,7 +100,7 @@ def show_purchase():
     )
     
     # Chart 2: Purchase by Category
-    purchase_by_category = purchases_df.groupby('category')[['quantity', 'total_cost']].sum().reset_index()
+    purchase_by_category = aggregate_by(purchases_df, 'category', ['quantity', 'total_cost'], data_dir=data_dir)
     
     fig2 = px.bar(
         purchase_by_category,
@@ -118,7 +121,7 @@ def show_purchase():
     )
     
     # Chart 3: Purchase Status Distribution
-    status_counts = purchases_df['status'].value_counts().reset_index()
+    status_counts = label_counts(purchases_df['status']).reset_index()
     status_counts.columns = ['status', 'count']
     
     fig3 = px.pie(
@@ -175,12 +178,12 @@ def show_purchase():
         st.plotly_chart(fig4, use_container_width=True)
     
     # Recent Purchase Orders
-    st.markdown("<h3 style='text-align: center;'>Recent Purchase Orders</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Recent Purchase Orders</h3>", unsafe_allow_html=True)
     
     tab1, tab2, tab3 = st.tabs(["Recent Orders", "Pending Orders", "Create New Order"])
     
     with tab1:
-        recent_orders = purchases_df.sort_values('date', ascending=False).head(10)
+        recent_orders = attach_dimensions(purchases_df.sort_values('date', ascending=False).head(10), ['product_name', 'category'], data_dir=data_dir)
         st.dataframe(
             recent_orders[['date', 'product_name', 'category', 'quantity', 'unit_cost', 'total_cost', 'status']],
             use_container_width=True,
@@ -190,6 +193,7 @@ def show_purchase():
     with tab2:
         pending_orders = purchases_df[purchases_df['status'] == 'Pending'].sort_values('date', ascending=False)
         if not pending_orders.empty:
+            pending_orders = attach_dimensions(pending_orders, ['product_name', 'category'], data_dir=data_dir)
             st.dataframe(
                 pending_orders[['date', 'product_name', 'category', 'quantity', 'unit_cost', 'total_cost']],
                 use_container_width=True,
@@ -220,5 +224,12 @@ def show_purchase():
             submitted = st.form_submit_button("Create Purchase Order")
             
             if submitted:
-                st.success(f"Purchase order created for {quantity} units of {product} from {supplier}.")
+                order = create_purchase_order(
+                    product_id=product_details['product_id'],
+                    quantity=quantity,
+                    unit_cost=unit_cost,
+                    supplier_id=int(supplier.split()[-1]),
+                    data_dir=data_dir
+                )
+                st.success(f"Purchase order {order['order_id']} created for {quantity} units of {product} from {supplier}.")
                 st.balloons() 
\ No newline at end of file
@@ -1,137 +1,84 @@
+import os
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar
-from utils.styling import kpi_metric
+from utils.styling import kpi_metric, job_result
+from utils.data_loader import DATA_DIR, data_version
+from utils.offload import page_jobs
+from utils.report_engine import REPORT_PERIODS, VIEW_TABLES, build_report
+from utils.report_export import EXCEL_MAX_ROWS, EXPORT_FORMATS, submit_export, discard_export
+from utils.report_snapshots import snapshot_report
+from utils.scopes import row_scope, scope_data_dir
+
+# Streamlit versions whose download_button takes a callable read the export
+# file only when it is clicked; older ones get its bytes on every rerun
+try:
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, "add_deferred")
+except ImportError:
+    DEFERRED_DOWNLOADS = False
 
 def show_report():
     """Display the reporting dashboard with KPIs and charts"""
     
     st.header("Business Reports")
     
-    # Load data
-    sales_df = pd.read_csv('data/sales.csv')
-    inventory_df = pd.read_csv('data/inventory.csv')
-    purchases_df = pd.read_csv('data/purchases.csv')
-    expenses_df = pd.read_csv('data/expenses.csv')
-    performance_df = pd.read_csv('data/performance.csv')
-    
-    # Convert date columns to datetime
-    sales_df['date'] = pd.to_datetime(sales_df['date'])
-    purchases_df['date'] = pd.to_datetime(purchases_df['date'])
-    expenses_df['date'] = pd.to_datetime(expenses_df['date'])
-    performance_df['date'] = pd.to_datetime(performance_df['date'])
-    
     # Time period filter
     report_period = st.selectbox(
         "Report Period",
-        ["Current Month", "Previous Month", "Last 3 Months", "Last 6 Months", "Year to Date", "Last Year", "All Time"],
+        REPORT_PERIODS,
         index=0
     )
     
-    # Set date filters based on selection
-    current_date = datetime.now()
-    current_month_start = current_date.replace(day=1)
-    
-    if report_period == "Current Month":
-        start_date = current_month_start
-        title_period = f"{current_date.strftime('%B %Y')}"
-    elif report_period == "Previous Month":
-        start_date = (current_month_start - timedelta(days=1)).replace(day=1)
-        end_date = current_month_start - timedelta(days=1)
-        title_period = f"{start_date.strftime('%B %Y')}"
-    elif report_period == "Last 3 Months":
-        start_date = (current_month_start - timedelta(days=90)).replace(day=1)
-        title_period = f"{start_date.strftime('%B %Y')} - {current_date.strftime('%B %Y')}"
-    elif report_period == "Last 6 Months":
-        start_date = (current_month_start - timedelta(days=180)).replace(day=1)
-        title_period = f"{start_date.strftime('%B %Y')} - {current_date.strftime('%B %Y')}"
-    elif report_period == "Year to Date":
-        start_date = current_date.replace(month=1, day=1)
-        title_period = f"{current_date.year} YTD"
-    elif report_period == "Last Year":
-        start_date = current_date.replace(year=current_date.year-1, month=1, day=1)
-        end_date = current_date.replace(year=current_date.year-1, month=12, day=31)
-        title_period = f"FY {current_date.year-1}"
-    else:  # All Time
-        start_date = sales_df['date'].min()
-        title_period = f"All Time ({start_date.strftime('%b %Y')} - {current_date.strftime('%b %Y')})"
-    
-    # Apply date filters
-    if report_period in ["Previous Month", "Last Year"]:
-        filtered_sales = sales_df[(sales_df['date'] >= start_date) & (sales_df['date'] <= end_date)]
-        filtered_purchases = purchases_df[(purchases_df['date'] >= start_date) & (purchases_df['date'] <= end_date)]
-        filtered_expenses = expenses_df[(expenses_df['date'] >= start_date) & (expenses_df['date'] <= end_date)]
-        filtered_performance = performance_df[(performance_df['date'] >= start_date) & (performance_df['date'] <= end_date)]
-    else:
-        filtered_sales = sales_df[sales_df['date'] >= start_date]
-        filtered_purchases = purchases_df[purchases_df['date'] >= start_date]
-        filtered_expenses = expenses_df[expenses_df['date'] >= start_date]
-        filtered_performance = performance_df[performance_df['date'] >= start_date]
-    
-    # Calculate KPIs
-    total_revenue = filtered_sales['total_price'].sum()
-    total_cost = filtered_purchases['total_cost'].sum()
-    total_profit = filtered_sales['profit'].sum()
-    total_expenses = filtered_expenses['amount'].sum()
-    
-    profit_margin = (total_profit / total_revenue * 100) if total_revenue > 0 else 0
-    expense_ratio = (total_expenses / total_revenue * 100) if total_revenue > 0 else 0
-    
-    # Calculate net profit
-    net_profit = total_profit - total_expenses
-    net_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
-    
-    # Get total units sold
-    total_units = filtered_sales['quantity'].sum()
+    # Served from the nightly snapshot when it is still valid; otherwise the
+    # aggregations run as a background job shared by every session asking
+    # for the same period on the same data and scope. The snapshot holds the
+    # unscoped reports of the first store only.
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    scope = st.session_state.get("scope", {})
+    data_dir, rows = scope_data_dir(scope), row_scope(scope)
+    version = data_version(*VIEW_TABLES['report'], data_dir=data_dir)
+    report = snapshot_report(report_period, today, version) if data_dir == DATA_DIR and not rows else None
+    if report is None:
+        report = job_result(page_jobs.submit(("report", report_period, today, version, data_dir, rows),
+                                             build_report, report_period, today, data_dir=data_dir, scope=rows))
+        if report is None:
+            return  # the progress block reruns the page once the job is done
+    title_period = report['title_period']
+    kpis = report['kpis']
     
     # Page title
-    st.markdown(f"<h3 style='text-align: center;'>Business Report - {title_period}</h3>", unsafe_allow_html=True)
+    st.markdown(f"<h3 class='section-heading'>Business Report - {title_period}</h3>", unsafe_allow_html=True)
     
     # Summary KPIs
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.markdown(kpi_metric("Total Revenue", f"${total_revenue:,.2f}"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Total Revenue", f"${kpis['total_revenue']:,.2f}"), unsafe_allow_html=True)
     with col2:
-        st.markdown(kpi_metric("Gross Profit", f"${total_profit:,.2f}"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Gross Profit", f"${kpis['total_profit']:,.2f}"), unsafe_allow_html=True)
     with col3:
-        st.markdown(kpi_metric("Net Profit", f"${net_profit:,.2f}"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Net Profit", f"${kpis['net_profit']:,.2f}"), unsafe_allow_html=True)
     
     col4, col5, col6 = st.columns(3)
     with col4:
-        st.markdown(kpi_metric("Profit Margin", f"{profit_margin:.1f}%"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Profit Margin", f"{kpis['profit_margin']:.1f}%"), unsafe_allow_html=True)
     with col5:
-        st.markdown(kpi_metric("Total Expenses", f"${total_expenses:,.2f}"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Total Expenses", f"${kpis['total_expenses']:,.2f}"), unsafe_allow_html=True)
     with col6:
-        st.markdown(kpi_metric("Units Sold", f"{int(total_units):,}"), unsafe_allow_html=True)
+        st.markdown(kpi_metric("Units Sold", f"{int(kpis['total_units']):,}"), unsafe_allow_html=True)
     
     st.markdown("<hr/>", unsafe_allow_html=True)
     
     # Chart Section
-    st.markdown("<h3 style='text-align: center;'>Financial Analysis</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Financial Analysis</h3>", unsafe_allow_html=True)
     
     # Chart 1: Revenue vs Profit Over Time
-    # Group by month if the period is longer than 60 days
-    if (current_date - start_date).days > 60:
-        filtered_sales['month'] = filtered_sales['date'].dt.to_period('M')
-        revenue_over_time = filtered_sales.groupby(filtered_sales['month'].astype(str)).agg({
-            'total_price': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        
-        x_column = 'month'
-        title = 'Monthly Revenue & Profit'
-    else:
-        revenue_over_time = filtered_sales.groupby(filtered_sales['date'].dt.date).agg({
-            'total_price': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        
-        x_column = 'date'
-        title = 'Daily Revenue & Profit'
+    revenue_over_time = report['revenue_over_time']
+    x_column = report['revenue_x']
+    title = report['revenue_title']
     
     fig1 = go.Figure()
     fig1.add_trace(go.Bar(
@@ -160,8 +107,7 @@ def show_report():
     )
     
     # Chart 2: Expense Breakdown
-    expenses_by_category = filtered_expenses.groupby('category')['amount'].sum().reset_index()
-    expenses_by_category = expenses_by_category.sort_values('amount', ascending=False)
+    expenses_by_category = report['expenses_by_category']
     
     fig2 = px.pie(
         expenses_by_category,
@@ -179,14 +125,7 @@ def show_report():
     )
     
     # Chart 3: Category Performance
-    category_performance = filtered_sales.groupby('category').agg({
-        'total_price': 'sum',
-        'profit': 'sum',
-        'quantity': 'sum'
-    }).reset_index()
-    
-    category_performance['margin'] = (category_performance['profit'] / category_performance['total_price'] * 100)
-    category_performance = category_performance.sort_values('total_price', ascending=False)
+    category_performance = report['category_performance']
     
     fig3 = px.bar(
         category_performance,
@@ -220,19 +159,8 @@ def show_report():
     )
     
     # Chart 4: Monthly Revenue & Expense Comparison
-    if report_period in ["Last 6 Months", "Year to Date", "Last Year", "All Time"]:
-        # Group sales by month
-        filtered_sales['month'] = filtered_sales['date'].dt.to_period('M')
-        monthly_revenue = filtered_sales.groupby(filtered_sales['month'].astype(str))['total_price'].sum().reset_index()
-        
-        # Group expenses by month
-        filtered_expenses['month'] = filtered_expenses['date'].dt.to_period('M')
-        monthly_expenses = filtered_expenses.groupby(filtered_expenses['month'].astype(str))['amount'].sum().reset_index()
-        
-        # Merge the data
-        financial_data = pd.merge(monthly_revenue, monthly_expenses, on='month', how='outer').fillna(0)
-        financial_data.columns = ['month', 'revenue', 'expenses']
-        financial_data['profit'] = financial_data['revenue'] - financial_data['expenses']
+    if report['monthly_financials'] is not None:
+        financial_data = report['monthly_financials']
         
         fig4 = go.Figure()
         fig4.add_trace(go.Bar(
@@ -268,13 +196,7 @@ def show_report():
         )
     else:
         # For shorter periods, show profit margins by product
-        product_margins = filtered_sales.groupby(['product_id', 'product_name']).agg({
-            'total_price': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        
-        product_margins['margin'] = (product_margins['profit'] / product_margins['total_price'] * 100)
-        product_margins = product_margins.sort_values('margin', ascending=False).head(10)
+        product_margins = report['product_margins']
         
         fig4 = px.bar(
             product_margins,
@@ -313,34 +235,17 @@ def show_report():
         st.plotly_chart(fig4, use_container_width=True)
     
     # Financial Summary Tables
-    st.markdown("<h3 style='text-align: center;'>Financial Summary</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Financial Summary</h3>", unsafe_allow_html=True)
     
     tab1, tab2, tab3 = st.tabs(["Income Statement", "Product Performance", "Export Options"])
     
+    income_df = report['income_statement']
+    product_performance_df = report['product_performance']
+
     with tab1:
         # Simple income statement
         st.markdown("#### Income Statement")
-        
-        income_data = {
-            "Category": ["Revenue", "Cost of Goods Sold", "Gross Profit", "Operating Expenses", "Net Profit"],
-            "Amount": [
-                total_revenue, 
-                total_revenue - total_profit,  # COGS
-                total_profit,
-                total_expenses,
-                net_profit
-            ],
-            "Percentage": [
-                100.0,
-                ((total_revenue - total_profit) / total_revenue * 100) if total_revenue > 0 else 0,
-                profit_margin,
-                expense_ratio,
-                net_margin
-            ]
-        }
-        
-        income_df = pd.DataFrame(income_data)
-        
+
         # Format the dataframe
         st.dataframe(
             income_df,
@@ -362,17 +267,8 @@ def show_report():
         # Product performance table
         st.markdown("#### Product Performance")
         
-        product_performance = filtered_sales.groupby(['product_id', 'product_name', 'category']).agg({
-            'quantity': 'sum',
-            'total_price': 'sum',
-            'profit': 'sum'
-        }).reset_index()
-        
-        product_performance['margin'] = (product_performance['profit'] / product_performance['total_price'] * 100).round(1)
-        product_performance = product_performance.sort_values('total_price', ascending=False)
-        
         st.dataframe(
-            product_performance[['product_name', 'category', 'quantity', 'total_price', 'profit', 'margin']],
+            product_performance_df[['product_name', 'category', 'quantity', 'total_price', 'profit', 'margin']],
             hide_index=True,
             column_config={
                 "product_name": "Product",
@@ -397,8 +293,64 @@ def show_report():
         # Export options
         st.markdown("#### Export Report")
         
-        export_format = st.selectbox("Select Format", ["Excel (.xlsx)", "CSV", "PDF"])
-        
+        export_format = st.selectbox("Select Format", list(EXPORT_FORMATS))
+
         if st.button("Generate Report"):
-            st.success(f"Report for {title_period} has been generated! (Demo - no actual file is created)")
-            st.info("In a production environment, this would generate and download the report in the selected format.") 
\ No newline at end of file
+            previous = st.session_state.get('report_export')
+            if previous and previous['future'].done() and not previous['future'].exception():
+                discard_export(previous['future'].result()['path'])
+            st.session_state.report_export = {
+                'future': submit_export(export_format, report, data_dir, rows),
+                'format': export_format,
+                'period': title_period,
+            }
+
+        export = st.session_state.get('report_export')
+        if export and export['future'].done():
+            _show_export(export)
+        elif export:
+            show_export_progress()
+
+def _export_progress():
+    """Show that the session's export is running; rerun the page once it is done"""
+    export = st.session_state.report_export
+    if export['future'].done():
+        st.rerun()
+    st.info(f"Generating the {export['format']} report for {export['period']}...")
+
+# Re-run only the progress block every second while an export is running
+# (Streamlit versions without fragments show the result on the next rerun)
+show_export_progress = st.fragment(run_every=1)(_export_progress) if hasattr(st, "fragment") else _export_progress
+
+def _show_export(export):
+    """Offer a finished export for download"""
+    future = export['future']
+    if future.exception():
+        st.error(f"Export failed: {future.exception()}")
+        return
+
+    result = future.result()
+    for name in result['truncated']:
+        st.warning(f"'{name}' has more rows than {export['format']} can hold; "
+                   f"only the first {EXCEL_MAX_ROWS:,} are included.")
+    extension, mime = EXPORT_FORMATS[export['format']]
+    file_name = f"business_report_{export['period']}".replace(" ", "_").replace("/", "-") + extension
+    if not os.path.exists(result['path']):
+        st.info("This export has expired. Generate the report again to download it.")
+        return
+    if DEFERRED_DOWNLOADS:
+        # Read only when the user clicks, not on every rerun of the page
+        data = lambda: _read_export(result['path'])
+    else:
+        with open(result['path'], "rb") as export_file:
+            data = export_file.read()
+    st.download_button(
+        f"Download {export['format']}",
+        data=data,
+        file_name=file_name,
+        mime=mime,
+    )
+
+def _read_export(path):
+    with open(path, "rb") as export_file:
+        return export_file.read() 
\ No newline at end of file
@@ -3,47 +3,48 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from utils.styling import kpi_metric
+from datetime import datetime
+from utils.styling import kpi_metric, job_result
+from utils.data_loader import data_version
+from utils.offload import page_jobs
+from utils.report_engine import VIEW_TABLES, SALES_PERIODS, build_sales_view
+from utils.scopes import row_scope, scope_data_dir
 
 def show_sales():
     """Display the sales dashboard with KPIs and charts"""
     
     st.header("Sales Management")
     
-    # Load data
-    sales_df = pd.read_csv('data/sales.csv')
-    
-    # Convert date column to datetime
-    sales_df['date'] = pd.to_datetime(sales_df['date'])
-    
-    # Filter data for different time periods
-    current_date = datetime.now()
-    current_month_start = current_date.replace(day=1)
-    previous_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-    
-    current_month_sales = sales_df[sales_df['date'] >= current_month_start]
-    previous_month_sales = sales_df[(sales_df['date'] >= previous_month_start) & (sales_df['date'] < current_month_start)]
+    # Aggregations run in the background, shared by every session on the same
+    # data and scope; only rows within the user's scope are loaded
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    scope = st.session_state.get("scope", {})
+    data_dir, rows = scope_data_dir(scope), row_scope(scope)
+    view = job_result(page_jobs.submit(("sales", today, data_version(*VIEW_TABLES['sales'], data_dir=data_dir), data_dir, rows),
+                                       build_sales_view, today, data_dir=data_dir, scope=rows))
+    if view is None:
+        return  # the progress block reruns the page once the job is done
+    current_month, previous_month = view['current_month'], view['previous_month']
     
     # Calculate KPIs
-    total_revenue = current_month_sales['total_price'].sum()
-    prev_revenue = previous_month_sales['total_price'].sum()
+    total_revenue = current_month['revenue']
+    prev_revenue = previous_month['revenue']
     revenue_change_percent = ((total_revenue - prev_revenue) / prev_revenue * 100) if prev_revenue > 0 else 0
     
-    total_profit = current_month_sales['profit'].sum()
-    prev_profit = previous_month_sales['profit'].sum()
+    total_profit = current_month['profit']
+    prev_profit = previous_month['profit']
     profit_change_percent = ((total_profit - prev_profit) / prev_profit * 100) if prev_profit > 0 else 0
     
-    total_orders = len(current_month_sales.groupby(['date', 'customer_id']))
-    prev_orders = len(previous_month_sales.groupby(['date', 'customer_id']))
+    total_orders = current_month['orders']
+    prev_orders = previous_month['orders']
     orders_change_percent = ((total_orders - prev_orders) / prev_orders * 100) if prev_orders > 0 else 0
     
-    avg_order_value = current_month_sales['total_price'].mean()
-    prev_avg_order = previous_month_sales['total_price'].mean()
+    avg_order_value = current_month['avg_order_value']
+    prev_avg_order = previous_month['avg_order_value']
     aov_change_percent = ((avg_order_value - prev_avg_order) / prev_avg_order * 100) if prev_avg_order > 0 else 0
     
-    total_units_sold = current_month_sales['quantity'].sum()
-    prev_units_sold = previous_month_sales['quantity'].sum()
+    total_units_sold = current_month['units']
+    prev_units_sold = previous_month['units']
     units_change_percent = ((total_units_sold - prev_units_sold) / prev_units_sold * 100) if prev_units_sold > 0 else 0
     
     # Calculate profit margin
@@ -52,7 +53,7 @@ def show_sales():
     margin_change_percent = (profit_margin - prev_profit_margin)
     
     # KPI Row
-    st.markdown("<h3 style='text-align: center;'>Sales Metrics</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Sales Metrics</h3>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -73,32 +74,20 @@ def show_sales():
     st.markdown("<hr/>", unsafe_allow_html=True)
     
     # Charts
-    st.markdown("<h3 style='text-align: center;'>Sales Analysis</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Sales Analysis</h3>", unsafe_allow_html=True)
     
     # Time filter for charts
     time_period = st.selectbox(
         "Select Time Period",
-        ["Last 7 Days", "Last 30 Days", "Last 90 Days", "Last 12 Months", "All Time"],
+        list(SALES_PERIODS),
         index=1
     )
-    
-    if time_period == "Last 7 Days":
-        filter_date = current_date - timedelta(days=7)
-    elif time_period == "Last 30 Days":
-        filter_date = current_date - timedelta(days=30)
-    elif time_period == "Last 90 Days":
-        filter_date = current_date - timedelta(days=90)
-    elif time_period == "Last 12 Months":
-        filter_date = current_date - timedelta(days=365)
-    else:
-        filter_date = sales_df['date'].min()
-    
-    filtered_sales = sales_df[sales_df['date'] >= filter_date]
+    period_view = view['periods'][time_period]
     
     # Chart 1: Daily Sales Trend
     if time_period in ["Last 7 Days", "Last 30 Days"]:
         # For shorter periods, show daily trends
-        daily_sales = filtered_sales.groupby(filtered_sales['date'].dt.date)['total_price'].sum().reset_index()
+        daily_sales = period_view['trend']
         
         fig1 = px.line(
             daily_sales, 
@@ -111,8 +100,7 @@ def show_sales():
         fig1.update_traces(mode='lines+markers', line=dict(color='#1E3A8A', width=3))
     else:
         # For longer periods, show monthly trends
-        filtered_sales['month'] = filtered_sales['date'].dt.to_period('M')
-        monthly_sales = filtered_sales.groupby(filtered_sales['month'].astype(str))['total_price'].sum().reset_index()
+        monthly_sales = period_view['trend']
         
         fig1 = px.bar(
             monthly_sales, 
@@ -133,8 +121,7 @@ def show_sales():
     )
     
     # Chart 2: Sales by Category
-    category_sales = filtered_sales.groupby('category')[['total_price', 'profit']].sum().reset_index()
-    category_sales = category_sales.sort_values('total_price', ascending=False)
+    category_sales = period_view['category_sales']
     
     fig2 = px.bar(
         category_sales,
@@ -155,8 +142,7 @@ def show_sales():
     )
     
     # Chart 3: Payment Method Distribution
-    payment_counts = filtered_sales['payment_method'].value_counts().reset_index()
-    payment_counts.columns = ['payment_method', 'count']
+    payment_counts = period_view['payment_counts']
     
     fig3 = px.pie(
         payment_counts,
@@ -174,8 +160,7 @@ def show_sales():
     )
     
     # Chart 4: Top Products
-    product_sales = filtered_sales.groupby(['product_id', 'product_name'])['total_price'].sum().reset_index()
-    top_products = product_sales.sort_values('total_price', ascending=False).head(10)
+    top_products = period_view['top_products']
     
     fig4 = px.bar(
         top_products,
@@ -212,12 +197,12 @@ def show_sales():
         st.plotly_chart(fig4, use_container_width=True)
     
     # Sales records table
-    st.markdown("<h3 style='text-align: center;'>Sales Records</h3>", unsafe_allow_html=True)
+    st.markdown("<h3 class='section-heading'>Sales Records</h3>", unsafe_allow_html=True)
     
     tab1, tab2 = st.tabs(["Recent Sales", "Sales by Product"])
     
     with tab1:
-        recent_sales = sales_df.sort_values('date', ascending=False).head(20)
+        recent_sales = view['recent_sales']
         st.dataframe(
             recent_sales[['date', 'product_name', 'category', 'quantity', 'unit_price', 'total_price', 'profit', 'payment_method']],
             use_container_width=True,
@@ -225,9 +210,7 @@ def show_sales():
         )
     
     with tab2:
-        product_summary = sales_df.groupby(['product_id', 'product_name', 'category'])[['quantity', 'total_price', 'profit']].sum().reset_index()
-        product_summary['profit_margin'] = (product_summary['profit'] / product_summary['total_price'] * 100).round(1)
-        product_summary = product_summary.sort_values('total_price', ascending=False)
+        product_summary = view['product_summary']
         
         st.dataframe(
             product_summary[['product_name', 'category', 'quantity', 'total_price', 'profit', 'profit_margin']],
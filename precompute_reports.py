@@ -0,0 +1,19 @@
+import argparse
+import time
+from utils.report_engine import REPORT_PERIODS
+from utils.report_snapshots import SNAPSHOT_PATH, precompute_reports
+
+# Precompute every standard report period for the Report page.
+# Schedule it nightly, e.g. with cron:
+#   5 0 * * * cd /path/to/app && python precompute_reports.py
+parser = argparse.ArgumentParser(description="Precompute report snapshots for the standard periods")
+parser.add_argument("--workers", type=int, default=4, help="periods computed in parallel")
+parser.add_argument("--period", action="append", choices=REPORT_PERIODS,
+                    help="only this period (repeatable; default: all)")
+args = parser.parse_args()
+
+print("Precomputing report snapshots...")
+started = time.perf_counter()
+snapshot = precompute_reports(args.period or REPORT_PERIODS, workers=args.workers)
+elapsed = time.perf_counter() - started
+print(f"Done! {len(snapshot['reports'])} periods written to {SNAPSHOT_PATH} in {elapsed:.1f}s.")
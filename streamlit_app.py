@@ -10,6 +10,7 @@ from components.performance import show_performance
 from components.report import show_report
 from utils.styling import apply_custom_styling, display_header, create_sidebar, create_footer, warning_banner
 from utils.data_generator import generate_initial_data
+from utils.bootstrap import start_services, after_page
 
 # Set up page config with improved layout and title
 st.set_page_config(
@@ -36,6 +37,9 @@ except Exception as e:
     st.error(f"Error generating initial data: {str(e)}")
     st.info("Please try refreshing the page. If the error persists, contact support.")
 
+# Map the cached tables of the last run back in before serving the first page
+start_services()
+
 # Function to check if required data files exist
 def check_data_files():
     required_files = [
@@ -60,6 +64,7 @@ if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
     st.session_state.username = ""
     st.session_state.role = ""
+    st.session_state.scope = {}
 
 # Authentication system
 if not st.session_state.authenticated:
@@ -79,9 +84,10 @@ else:
     else:
         try:
             # Display header with user info
-            display_header(f"Welcome, {st.session_state.username} ({st.session_state.role})")
+            display_header(f"Welcome, {st.session_state.username} ({st.session_state.role})", st.session_state.username)
             
             # Create sidebar with navigation
+            previous_page = st.session_state.get("current_page")
             selected_page = create_sidebar()
             
             # Content based on selection with error handling
@@ -105,11 +111,15 @@ else:
             # Add a footer
             create_footer()
             
+            # While the user reads this page, warm the pages they usually open next
+            after_page(previous_page, selected_page)
+            
             # Logout button
             if st.sidebar.button("Logout", key="logout"):
                 st.session_state.authenticated = False
                 st.session_state.username = ""
                 st.session_state.role = ""
+                st.session_state.scope = {}
                 st.rerun()
         except Exception as e:
             st.error(f"An unexpected error occurred: {str(e)}")
@@ -0,0 +1,16 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A copy of the sample data, without caches, locks or a snapshot manifest"""
+    path = tmp_path / "data"
+    shutil.copytree(os.path.join(ROOT, "data"), path,
+                    ignore=shutil.ignore_patterns("*.lock", "*.tmp", "_snapshot.json", "*.pkl.gz", "_table_cache"))
+    return str(path)
@@ -0,0 +1,45 @@
+import os
+from collections import Counter
+
+import pandas as pd
+
+from utils import data_loader, table_cache
+from utils.storage import atomic_write, table_file
+
+def test_dimension_lookup_is_parsed_once_per_version(data_dir, monkeypatch):
+    parses = Counter()
+    read_csv = pd.read_csv
+
+    def counting_read_csv(path, *args, **kwargs):
+        parses[os.path.basename(path)] += 1
+        return read_csv(path, *args, **kwargs)
+    monkeypatch.setattr(pd, "read_csv", counting_read_csv)
+
+    first = data_loader.dimension_lookup("products", data_dir)
+    assert data_loader.dimension_lookup("products", data_dir) is first
+    assert parses["products.csv"] == 1
+
+    products = read_csv(table_file(data_dir, "products"))
+    products["name"] = products["name"].str.upper()
+    atomic_write(table_file(data_dir, "products"), lambda f: products.to_csv(f, index=False))
+    renamed = data_loader.dimension_lookup("products", data_dir)
+    assert parses["products.csv"] == 2
+    assert renamed["product_name"].tolist() == products["name"].tolist()
+
+def test_appended_rows_are_cached_as_deltas(data_dir, monkeypatch):
+    monkeypatch.setattr(table_cache, "MAX_DELTAS", 2)
+    path = table_file(data_dir, "sales")
+    data_loader.load_tables("sales", data_dir=data_dir)
+    sizes = []
+    for method in ["Voucher", "Account", "Cheque"]:
+        pd.read_csv(path).tail(3).assign(payment_method=method).to_csv(path, mode="a", header=False, index=False)
+        loaded, = data_loader.load_tables("sales", data_dir=data_dir)
+        cached = table_cache.cached_path("sales", data_loader.data_version("sales", data_dir=data_dir), data_dir)
+        sizes.append(os.path.getsize(cached))
+        pd.testing.assert_frame_equal(table_cache.read_cached_table(cached), loaded)
+    # Two deltas of three rows each, then the whole table again
+    assert sizes[0] < sizes[2] / 4 and sizes[1] < sizes[2] / 4
+    assert len(table_cache.cache_chain(cached)) == 1
+    assert len(os.listdir(os.path.dirname(cached))) == 1
+    data_loader._tails.clear()
+    pd.testing.assert_frame_equal(table_cache.read_cached_table(cached), data_loader.load_table("sales", data_dir))
@@ -0,0 +1,19 @@
+import pytest
+
+def _sidebar_with_diagnostics():
+    from utils.bootstrap import show_diagnostics
+    from utils.metrics import increment
+    increment("diagnostics_test", outcome="shown")
+    show_diagnostics()
+
+@pytest.mark.parametrize("role, shown", [("Admin", True), ("Store Manager", False)])
+def test_diagnostics_are_shown_to_admins_only(role, shown):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_function(_sidebar_with_diagnostics)
+    at.session_state["role"] = role
+    at.run()
+    assert not at.exception
+    assert len(at.sidebar.expander) == int(shown)
+    if shown:
+        metrics = at.sidebar.dataframe[0].value
+        assert "diagnostics_test" in set(metrics["metric"])
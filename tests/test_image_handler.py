@@ -0,0 +1,20 @@
+from utils import image_handler, metrics
+
+def _payload_rows():
+    return {row["path"]: row for row in image_handler.asset_payload_report()["assets"]}
+
+def test_avatars_are_encoded_once_per_user_and_counted_once_per_page():
+    alice = image_handler.get_avatar_data_uri("alice")
+    bob = image_handler.get_avatar_data_uri("bob")
+    assert alice != bob
+    # Sessions of different users keep their own entries
+    assert image_handler.get_avatar_data_uri("alice") is alice
+    assert image_handler.get_avatar_data_uri("bob") is bob
+    # A page inlines one avatar: the largest of the size is counted
+    assert _payload_rows()["avatar:64px"]["inline_bytes"] == max(len(alice), len(bob))
+
+def test_a_payload_over_budget_is_counted_in_the_metrics(monkeypatch):
+    monkeypatch.setattr(image_handler, "INLINE_ASSET_BUDGET", 1)
+    image_handler.get_avatar_asset("carol", 48)
+    counted = [row for row in metrics.summary() if row["metric"] == "inline_assets_over_budget"]
+    assert counted and counted[0]["asset"] == "avatar:48px"
@@ -0,0 +1,17 @@
+import threading
+from utils.jobs import JobRunner
+
+def test_cancel_skips_jobs_another_caller_submitted():
+    runner = JobRunner(max_workers=1, name="test-jobs")
+    release = threading.Event()
+    busy = runner.submit(("busy",), lambda progress: release.wait())
+    alone = runner.submit(("alone",), lambda progress: "alone")
+    shared = runner.submit(("shared",), lambda progress: "shared")
+    assert runner.submit(("shared",), lambda progress: "other") is shared
+
+    assert runner.cancel(alone)
+    assert not runner.cancel(shared)
+    release.set()
+    assert busy.result(timeout=5) and shared.result(timeout=5) == "shared"
+    # A cancelled job is dropped, so the next request starts it again
+    assert runner.submit(("alone",), lambda progress: "again").result(timeout=5) == "again"
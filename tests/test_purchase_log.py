@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+from utils import purchase_log
+
+def _order(order_id):
+    return {"order_id": order_id, "date": "2025-01-01", "product_id": 1, "quantity": 1,
+            "unit_cost": 1.0, "total_cost": 1.0, "supplier_id": 1, "status": "Pending"}
+
+def test_fsync_keeps_its_file_open_when_compaction_swaps_the_log(data_dir, monkeypatch):
+    log = purchase_log.PurchaseOrderLog(data_dir)
+    in_fsync, resume = threading.Event(), threading.Event()
+    synced_inodes = []
+    fsync = os.fsync
+
+    def slow_first_fsync(fd):
+        if not in_fsync.is_set():
+            inode = os.fstat(fd).st_ino
+            in_fsync.set()
+            assert resume.wait(5)
+            # Still the file this fsync started on, not a closed or reused descriptor
+            synced_inodes.append((inode, os.fstat(fd).st_ino))
+        fsync(fd)
+    monkeypatch.setattr(os, "fsync", slow_first_fsync)
+
+    first = threading.Thread(target=log.append, args=(_order("PO-first"),), daemon=True)
+    first.start()
+    assert in_fsync.wait(5)
+    old_file = log._file
+    assert log.compact() == 1
+    second = threading.Thread(target=log.append, args=(_order("PO-second"),), daemon=True)
+    second.start()
+    deadline = time.monotonic() + 5
+    while log._file is old_file and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log._file is not old_file and not old_file.closed
+
+    resume.set()
+    first.join(5)
+    second.join(5)
+    assert synced_inodes and synced_inodes[0][0] == synced_inodes[0][1]
+    assert old_file.closed
+    assert [r["order_id"] for r in purchase_log.read_log_records(log.log_path)] == ["PO-second"]
+
+def test_appends_and_reads_go_on_while_compaction_rewrites_the_table(data_dir, monkeypatch):
+    log = purchase_log.PurchaseOrderLog(data_dir)
+    log.append(_order("PO-compacted"))
+    merging, resume = threading.Event(), threading.Event()
+    commit_tables = purchase_log.commit_tables
+
+    def slow_commit(*args, **kwargs):
+        merging.set()
+        assert resume.wait(5)
+        return commit_tables(*args, **kwargs)
+    monkeypatch.setattr(purchase_log, "commit_tables", slow_commit)
+
+    compaction = threading.Thread(target=log.compact, daemon=True)
+    compaction.start()
+    assert merging.wait(5)
+    appended = threading.Thread(target=log.append, args=(_order("PO-appended"),), daemon=True)
+    appended.start()
+    appended.join(5)
+    assert not appended.is_alive()  # not held up by the table rewrite
+    order_ids = set(purchase_log.read_purchases_with_log(data_dir)["order_id"])
+    assert {"PO-compacted", "PO-appended"} <= order_ids
+
+    resume.set()
+    compaction.join(5)
+    assert not os.path.exists(log.compacting_path)
+    assert [r["order_id"] for r in purchase_log.read_log_records(log.log_path)] == ["PO-appended"]
+    assert "PO-compacted" in set(purchase_log.read_purchases_with_log(data_dir)["order_id"])
+
+def test_an_interrupted_compaction_is_folded_in_by_the_next(data_dir):
+    log = purchase_log.PurchaseOrderLog(data_dir)
+    log.append(_order("PO-interrupted"))
+    os.replace(log.log_path, log.compacting_path)  # rotated, never merged
+    log.append(_order("PO-live"))
+
+    assert log.compact() == 1
+    order_ids = list(purchase_log.read_purchases_with_log(data_dir)["order_id"])
+    assert order_ids.count("PO-interrupted") == 1 and order_ids.count("PO-live") == 1
+    assert log.compact() == 1  # then the live log
+    assert [r["order_id"] for r in purchase_log.read_log_records(log.log_path)] == []
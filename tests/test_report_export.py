@@ -0,0 +1,43 @@
+import io
+import os
+import time
+import zipfile
+
+import pandas as pd
+
+from utils import report_export
+from utils.report_engine import build_report
+from utils.report_export import discard_export, export_report
+from utils.storage import table_file
+
+def test_export_labels_rows_from_its_store(data_dir):
+    products_path = table_file(data_dir, "products")
+    products = pd.read_csv(products_path)
+    products["name"] = "Store 2 " + products["name"]
+    products.to_csv(products_path, index=False)
+
+    report = build_report("All Time", data_dir=data_dir)
+    path = export_report("CSV (.zip)", report, data_dir)["path"]
+    try:
+        with zipfile.ZipFile(path) as archive:
+            sales = pd.read_csv(io.BytesIO(archive.read("sales.csv")))
+    finally:
+        discard_export(path)
+    assert len(sales) and sales["product_name"].str.startswith("Store 2 ").all()
+
+def test_sweep_removes_only_old_exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_export, "EXPORT_DIR", str(tmp_path))
+    old, new = tmp_path / "old.zip", tmp_path / "new.zip"
+    old.write_bytes(b"old")
+    new.write_bytes(b"new")
+    hours_ago = time.time() - 7 * 3600
+    os.utime(old, (hours_ago, hours_ago))
+    report_export.sweep_exports(max_age=6 * 3600)
+    assert not old.exists() and new.exists()
+
+def test_excel_export_reports_truncated_sheets(data_dir, monkeypatch):
+    monkeypatch.setattr(report_export, "EXCEL_MAX_ROWS", 10)
+    report = build_report("All Time", data_dir=data_dir)
+    export = export_report("Excel (.xlsx)", report, data_dir)
+    discard_export(export["path"])
+    assert "Sales" in export["truncated"] and "Income Statement" not in export["truncated"]
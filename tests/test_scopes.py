@@ -0,0 +1,75 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from utils.data_loader import load_tables
+from utils.storage import table_file
+from utils.table_cache import cache_dir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCOPED_TABLES = {
+    ("category", "Electronics"): ("products", "inventory", "sales", "purchases", "expenses"),
+    ("department", "Sales"): ("employees", "performance", "sales"),
+}
+
+def _expected(data_dir, name, attribute, value):
+    """The full table filtered by hand: the rows the scope should leave"""
+    full, = load_tables(name, data_dir=data_dir)
+    if attribute == "category":
+        products = pd.read_csv(table_file(data_dir, "products"))
+        keys, column = set(products.loc[products["category"] == value, "id"]), {
+            "products": "id", "inventory": "product_id", "sales": "product_id", "purchases": "product_id"}.get(name)
+    else:
+        employees = pd.read_csv(table_file(data_dir, "employees"))
+        keys, column = set(employees.loc[employees["department"] == value, "employee_id"]), {
+            "employees": "employee_id", "performance": "employee_id"}.get(name)
+    if column is None:
+        return full
+    expected = full[full[column].isin(keys)].reset_index(drop=True)
+    if "new_order" in expected.columns:
+        expected = expected.assign(new_order=~expected["order_key"].duplicated().to_numpy())
+    return expected
+
+@pytest.mark.parametrize("scope", list(SCOPED_TABLES))
+def test_scoped_loads_match_a_filtered_full_load(data_dir, scope):
+    names = SCOPED_TABLES[scope]
+    expected = [_expected(data_dir, name, *scope) for name in names]
+    shutil.rmtree(cache_dir(data_dir))
+
+    missed = load_tables(*names, data_dir=data_dir, scope=(scope,))  # parsed, then filtered
+    assert os.path.isdir(cache_dir(data_dir))
+    hit = load_tables(*names, data_dir=data_dir, scope=(scope,))  # filtered in the Arrow cache
+    for name, want, miss, cached in zip(names, expected, missed, hit):
+        assert 0 < len(want), name
+        pd.testing.assert_frame_equal(miss, want, obj=f"{name} (cache miss)")
+        pd.testing.assert_frame_equal(cached, want, obj=f"{name} (cache hit)")
+
+def test_category_manager_login_is_scoped(tmp_path, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+    app_dir = tmp_path / "app"
+    shutil.copytree(ROOT, app_dir, ignore=shutil.ignore_patterns(
+        ".git", "__pycache__", "tests", "_table_cache", "*.lock", "_snapshot.json", "*.pkl.gz"))
+    monkeypatch.chdir(app_dir)
+
+    at = AppTest.from_file(str(app_dir / "streamlit_app.py"), default_timeout=120).run()
+    at.text_input[0].input("category")
+    at.text_input[1].input("category123")
+    at.selectbox[0].select("Category Manager")
+    at.button[0].click().run()
+    assert at.session_state.scope == {"store": "Main Store", "category": "Electronics"}
+    banners = " ".join(markdown.value for markdown in at.markdown)
+    assert "limited to Store: Main Store, Category: Electronics" in banners and "full access" not in banners
+
+    at.button(key="nav_Sales").click().run()
+    for _ in range(120):  # the page renders once its background job is done
+        if not at.get("progress"):
+            break
+        time.sleep(0.5)
+        at.run()
+    assert not at.exception
+    recent = at.dataframe[0].value
+    assert len(recent) and (recent["category"] == "Electronics").all()
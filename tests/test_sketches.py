@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from utils import sketches
+
+def _sales(rows, customers, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 10, size=rows), unit="D")
+    return pd.Series(dates), pd.Series(rng.integers(0, customers, size=rows))
+
+def test_small_windows_count_exactly_and_large_ones_switch_to_sketches(monkeypatch):
+    monkeypatch.setattr(sketches, "EXACT_DISTINCT_PAIRS", 500)
+    dates, customers = _sales(200, 1000, seed=0)
+    small = sketches.distinct_by_day(dates, customers, mode="auto")
+    assert small.exact
+    assert small.count() == customers.nunique()
+
+    more_dates, more_customers = _sales(2000, 1000, seed=1)
+    merged = small.merge(sketches.distinct_by_day(more_dates, more_customers, mode="auto"))
+    assert not merged.exact
+    truth = pd.concat([customers, more_customers]).nunique()
+    assert abs(merged.count() - truth) <= 0.05 * truth
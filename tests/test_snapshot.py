@@ -0,0 +1,59 @@
+import os
+from collections import Counter
+
+import pandas as pd
+
+from utils import data_loader, metrics, storage
+from utils.storage import commit_tables, read_snapshot, table_file
+
+def _publish(data_dir, *names):
+    """Commit the tables unchanged, so the manifest knows them"""
+    writers = {}
+    for name in names:
+        with open(table_file(data_dir, name), "r", encoding="utf-8", newline="") as table:
+            content = table.read()
+        writers[name] = lambda f, content=content: f.write(content)
+    commit_tables(data_dir, writers)
+
+def _append_row(data_dir, name):
+    path = table_file(data_dir, name)
+    pd.read_csv(path).tail(1).to_csv(path, mode="a", header=False, index=False)
+
+def _counting_read(data_dir, reads):
+    def read(name):
+        reads[name] += 1
+        return pd.read_csv(table_file(data_dir, name))
+    return read
+
+def test_appended_table_is_read_once(data_dir):
+    _publish(data_dir, "sales", "purchases", "inventory")
+    _append_row(data_dir, "sales")
+    reads = Counter()
+    frames, _ = read_snapshot(data_dir, ["sales", "purchases", "inventory"], _counting_read(data_dir, reads))
+    assert reads == {"sales": 1, "purchases": 1, "inventory": 1}
+    assert len(frames["sales"]) == len(pd.read_csv(table_file(data_dir, "sales")))
+
+def test_appended_table_loads_once_per_table(data_dir, monkeypatch):
+    _publish(data_dir, "sales", "purchases", "inventory")
+    _append_row(data_dir, "sales")
+    loads = Counter()
+    load_table = data_loader.load_table
+
+    def counting_load(name, data_dir=data_loader.DATA_DIR):
+        loads[name] += 1
+        return load_table(name, data_dir)
+    monkeypatch.setattr(data_loader, "load_table", counting_load)
+    data_loader.load_tables("inventory", "sales", "purchases", data_dir=data_dir)
+    assert loads == {"inventory": 1, "sales": 1, "purchases": 1}
+
+def test_rewritten_table_is_read_again(data_dir, monkeypatch):
+    monkeypatch.setattr(storage, "RETRY_DELAY", 0)
+    metrics.reset()
+    _publish(data_dir, "sales", "purchases")
+    path = table_file(data_dir, "purchases")
+    pd.read_csv(path).head(5).to_csv(path + ".new", index=False)
+    os.replace(path + ".new", path)
+    reads = Counter()
+    read_snapshot(data_dir, ["sales", "purchases"], _counting_read(data_dir, reads))
+    assert reads == {"sales": 1, "purchases": storage.SNAPSHOT_RETRIES}
+    assert {"metric": "snapshot_mismatch", "tables": "purchases", "value": 1} in metrics.summary()
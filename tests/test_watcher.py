@@ -0,0 +1,27 @@
+import os
+import shutil
+
+from utils import watcher
+from utils.jobs import JobRunner
+from utils.storage import table_file
+
+def test_a_change_in_one_store_leaves_the_other_stores_alone(data_dir, tmp_path, monkeypatch):
+    other_dir = str(tmp_path / "other")
+    shutil.copytree(data_dir, other_dir)
+    jobs = JobRunner(max_workers=1, name="test-watcher")
+    monkeypatch.setattr(watcher, "page_jobs", jobs)
+    for directory in (data_dir, other_dir):
+        watcher.check_tables(data_dir=directory)
+        jobs.submit(("sales", "today", "version", directory, ()), lambda progress: "view").result(timeout=5)
+    seen = {directory: watcher.generation(["sales"], [directory]) for directory in (data_dir, other_dir)}
+
+    with open(table_file(data_dir, "sales")) as sales:
+        last_row = sales.read().splitlines()[-1]
+    with open(table_file(data_dir, "sales"), "a") as sales:
+        sales.write(last_row + "\n")
+    assert watcher.check_tables(data_dir=data_dir) == {"sales"}
+
+    assert watcher.generation(["sales"], [data_dir]) != seen[data_dir]
+    assert watcher.generation(["sales"], [other_dir]) == seen[other_dir]
+    assert jobs.cached(("sales", "today", "version", data_dir, ())) is None
+    assert jobs.cached(("sales", "today", "version", other_dir, ())) is not None
@@ -0,0 +1,66 @@
+import multiprocessing
+import pandas as pd
+import streamlit as st
+from utils.image_handler import asset_payload_report
+from utils.metrics import summary
+from utils.prefetch import record_navigation, likely_next_pages, prefetch_pages
+from utils.scopes import row_scope, scope_data_dir, scope_dirs
+from utils.styling import refresh_on_change
+from utils.warmup import start_warm_up, is_ready, wait_until_ready
+from utils.watcher import start_watcher
+
+# Tables each page shows; the page reruns when one of them changes on disk
+PAGE_TABLES = {
+    "Dashboard": ("sales", "inventory", "purchases", "expenses"),
+    "Inventory": ("inventory", "sales", "purchases"),
+    "Purchase": ("purchases", "inventory"),
+    "Sales": ("sales",),
+    "Performance": ("performance", "sales", "expenses"),
+    "Report": ("sales", "purchases", "expenses"),
+}
+
+# The process-wide services both entry points (app.py, streamlit_app.py) run
+
+def start_services():
+    """Start the warm-up and the data watcher (once per process) and hold
+    the first page until the cached tables of the last run are mapped in"""
+    # Streamlit runs the app script as __main__, so page job worker processes
+    # import it when they spawn; they must not warm up or start workers themselves
+    if multiprocessing.current_process().name != "MainProcess":
+        return
+    start_warm_up()
+    start_watcher()
+    if not is_ready():
+        with st.spinner("Warming up..."):
+            wait_until_ready()
+
+def show_diagnostics():
+    """Show admins this process's timings and counters (utils/metrics.py) and
+    the inline asset payload in a sidebar expander"""
+    if st.session_state.get("role") != "Admin":
+        return
+    with st.sidebar.expander("Diagnostics"):
+        metrics = pd.DataFrame(summary())
+        if metrics.empty:
+            st.caption("No metrics recorded yet")
+        else:
+            st.dataframe(metrics, hide_index=True)
+        assets = asset_payload_report()
+        st.caption(f"Inline assets: {assets['total_bytes']:,} of {assets['budget_bytes']:,} bytes"
+                   + (" (over budget)" if assets['over_budget'] else ""))
+        if assets['assets']:
+            st.dataframe(pd.DataFrame(assets['assets']), hide_index=True)
+
+def after_page(previous_page, selected_page):
+    """Record the navigation, warm the pages the user usually opens next,
+    rerun the page when one of its tables changes on disk and show admins
+    the diagnostics"""
+    record_navigation(previous_page, selected_page)
+    scope = st.session_state.get("scope", {})
+    prefetch_pages(likely_next_pages(selected_page), data_dir=scope_data_dir(scope), rows=row_scope(scope))
+    # A live Dashboard follows new sales on its own timer, without full reruns
+    live_tables = ("sales",) if selected_page == "Dashboard" and st.session_state.get("dashboard_live") else ()
+    # The Dashboard may show every store of the scope; the other pages one
+    data_dirs = scope_dirs(scope) if selected_page == "Dashboard" else [scope_data_dir(scope)]
+    refresh_on_change([table for table in PAGE_TABLES[selected_page] if table not in live_tables], data_dirs)
+    show_diagnostics()
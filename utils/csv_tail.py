@@ -0,0 +1,77 @@
+import csv
+import os
+import zlib
+
+# Bytes at each end of the consumed prefix that are checksummed to confirm
+# the file was only appended to (the first window also covers the header)
+CHECK_BYTES = 64 * 1024
+
+def prefix_checksum(csv_file, offset):
+    """Checksum the first and last CHECK_BYTES of the first `offset` bytes"""
+    csv_file.seek(0)
+    checksum = zlib.crc32(csv_file.read(min(offset, CHECK_BYTES)))
+    csv_file.seek(max(offset - CHECK_BYTES, 0))
+    return zlib.crc32(csv_file.read(offset - csv_file.tell()), checksum)
+
+def _complete_lines(data):
+    """Cut off a last line that is still being written"""
+    return data[:data.rfind(b"\n") + 1]
+
+def header_columns(data):
+    """Return the column names in the header line of CSV data"""
+    return next(csv.reader([data[:data.find(b"\n")].decode("utf-8").rstrip("\r")]))
+
+class CsvTail:
+    """Follow a CSV file that grows by appended rows.
+
+    Remembers the file, byte offset and row count consumed so far. read()
+    returns either the complete rows appended since then, or the whole file
+    when it was replaced, shrank, or its header or already-read bytes no
+    longer match. The position only moves on with advance(), once the
+    caller has used the data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._position = None  # (inode, offset, checksum)
+        self._pending = None
+
+    @property
+    def offset(self):
+        return self._position[1] if self._position else 0
+
+    def read(self):
+        """Return (kind, data): kind is "full", "tail" or "unchanged".
+
+        "full" data is the file up to its last complete line, header
+        included; "tail" data is the complete lines after the offset.
+        """
+        with open(self.path, "rb") as csv_file:
+            stat = os.fstat(csv_file.fileno())
+            inode, size = stat.st_ino, stat.st_size
+            if self._position is not None:
+                known_inode, offset, checksum = self._position
+                if inode == known_inode and size >= offset and prefix_checksum(csv_file, offset) == checksum:
+                    csv_file.seek(offset)
+                    data = _complete_lines(csv_file.read())
+                    if not data:
+                        return "unchanged", b""
+                    end = offset + len(data)
+                    self._pending = (inode, end, prefix_checksum(csv_file, end))
+                    return "tail", data
+
+            csv_file.seek(0)
+            data = _complete_lines(csv_file.read())
+            self._pending = (inode, len(data), prefix_checksum(csv_file, len(data)))
+            return "full", data
+
+    def advance(self, kind, rows):
+        """Record that the data of the last read() was used; `rows` are the data rows it held"""
+        self.rows = rows if kind == "full" else self.rows + rows
+        self._position, self._pending = self._pending, None
+
+    def reset(self):
+        """Forget the position; the next read() returns the whole file"""
+        self.rows = 0
+        self._position = self._pending = None
@@ -4,6 +4,7 @@ import random
 import os
 from datetime import datetime, timedelta
 import json
+from utils.storage import save_table, table_transaction
 
 def generate_initial_data():
     """Generate initial data for the dashboard if it doesn't exist"""
@@ -22,23 +23,25 @@ def generate_initial_data():
     if not os.path.exists('data'):
         os.makedirs('data')
     
-    # Generate product data
-    products = generate_product_data()
-    
-    # Generate inventory data
-    generate_inventory_data(products)
-    
-    # Generate sales data
-    generate_sales_data(products)
-    
-    # Generate purchase orders data
-    generate_purchase_data(products)
-    
-    # Generate expense data
-    generate_expense_data()
-    
-    # Generate employee performance data
-    generate_employee_data()
+    # All tables are published together as one snapshot
+    with table_transaction():
+        # Generate product data
+        products = generate_product_data()
+        
+        # Generate inventory data
+        generate_inventory_data(products)
+        
+        # Generate sales data
+        generate_sales_data(products)
+        
+        # Generate purchase orders data
+        generate_purchase_data(products)
+        
+        # Generate expense data
+        generate_expense_data()
+        
+        # Generate employee performance data
+        generate_employee_data()
     
     print("Initial data generated successfully!")
 
@@ -58,7 +61,7 @@ def generate_product_data():
     ]
     
     # Save products data
-    pd.DataFrame(products).to_csv('data/products.csv', index=False)
+    save_table('products', pd.DataFrame(products))
     
     return products
 
@@ -85,7 +88,7 @@ def generate_inventory_data(products):
         })
     
     # Save inventory data
-    pd.DataFrame(inventory).to_csv('data/inventory.csv', index=False)
+    save_table('inventory', pd.DataFrame(inventory))
 
 def generate_sales_data(products):
     """Generate and save sales data"""
@@ -105,8 +108,6 @@ def generate_sales_data(products):
             sales.append({
                 "date": date.strftime('%Y-%m-%d'),
                 "product_id": product["id"],
-                "product_name": product["name"],
-                "category": product["category"],
                 "quantity": quantity,
                 "unit_price": product["price"],
                 "total_price": product["price"] * quantity,
@@ -116,7 +117,7 @@ def generate_sales_data(products):
             })
     
     # Save sales data
-    pd.DataFrame(sales).to_csv('data/sales.csv', index=False)
+    save_table('sales', pd.DataFrame(sales))
 
 def generate_purchase_data(products):
     """Generate and save purchase (procurement) data"""
@@ -135,8 +136,6 @@ def generate_purchase_data(products):
         purchases.append({
             "date": date.strftime('%Y-%m-%d'),
             "product_id": product["id"],
-            "product_name": product["name"],
-            "category": product["category"],
             "quantity": quantity,
             "unit_cost": product["cost"],
             "total_cost": product["cost"] * quantity,
@@ -145,7 +144,7 @@ def generate_purchase_data(products):
         })
     
     # Save purchase data
-    pd.DataFrame(purchases).to_csv('data/purchases.csv', index=False)
+    save_table('purchases', pd.DataFrame(purchases))
 
 def generate_expense_data():
     """Generate and save expenses data"""
@@ -180,7 +179,7 @@ def generate_expense_data():
             })
     
     # Save expenses data
-    pd.DataFrame(expenses).to_csv('data/expenses.csv', index=False)
+    save_table('expenses', pd.DataFrame(expenses))
 
 def generate_employee_data():
     """Generate employee performance data"""
@@ -219,7 +218,7 @@ def generate_employee_data():
         })
     
     employees_df = pd.DataFrame(employees)
-    employees_df.to_csv('data/employees.csv', index=False)
+    save_table('employees', employees_df)
     
     # Generate daily performance data
     end_date = datetime.now()
@@ -244,9 +243,6 @@ def generate_employee_data():
             performance_data.append({
                 'date': date.strftime('%Y-%m-%d'),
                 'employee_id': employee['employee_id'],
-                'employee_name': employee['name'],
-                'role': employee['position'],
-                'department': employee['department'],
                 'sales_count': sales_count,
                 'sales_value': sales_value,
                 'customer_satisfaction': customer_satisfaction,
@@ -268,9 +264,6 @@ def generate_employee_data():
             performance_data.append({
                 'date': random_date.strftime('%Y-%m-%d'),
                 'employee_id': random_employee['employee_id'],
-                'employee_name': random_employee['name'],
-                'role': random_employee['position'],
-                'department': random_employee['department'],
                 'sales_count': 0,
                 'sales_value': 0,
                 'customer_satisfaction': 0,
@@ -280,7 +273,7 @@ def generate_employee_data():
     
     # Save performance data
     performance_df = pd.DataFrame(performance_data)
-    performance_df.to_csv('data/performance.csv', index=False) 
+    save_table('performance', performance_df) 
 
 # New function to regenerate performance data only
 def regenerate_performance_data():
@@ -290,115 +283,106 @@ def regenerate_performance_data():
     if not os.path.exists('data'):
         os.makedirs('data')
     
-    # Load existing employees or generate if not exists
-    if os.path.exists('data/employees.csv'):
-        employees_df = pd.read_csv('data/employees.csv')
-        employees = employees_df.to_dict('records')
-    else:
-        # Generate and save employee data if not exists
-        employees = []
-        for i in range(1, 21):
-            first_name = random.choice([
-                'John', 'Emma', 'Michael', 'Sophia', 'William', 'Olivia', 
-                'James', 'Ava', 'Benjamin', 'Isabella'
-            ])
-            last_name = random.choice([
-                'Smith', 'Johnson', 'Williams', 'Jones', 'Brown', 
-                'Davis', 'Miller', 'Wilson', 'Moore', 'Taylor'
-            ])
-            name = f"{first_name} {last_name}"
+    # Employees and performance are published together as one snapshot
+    with table_transaction():
+        # Load existing employees or generate if not exists
+        if os.path.exists('data/employees.csv'):
+            employees_df = pd.read_csv('data/employees.csv')
+            employees = employees_df.to_dict('records')
+        else:
+            # Generate and save employee data if not exists
+            employees = []
+            for i in range(1, 21):
+                first_name = random.choice([
+                    'John', 'Emma', 'Michael', 'Sophia', 'William', 'Olivia', 
+                    'James', 'Ava', 'Benjamin', 'Isabella'
+                ])
+                last_name = random.choice([
+                    'Smith', 'Johnson', 'Williams', 'Jones', 'Brown', 
+                    'Davis', 'Miller', 'Wilson', 'Moore', 'Taylor'
+                ])
+                name = f"{first_name} {last_name}"
             
-            department = random.choice([
-                'Sales', 'Marketing', 'Customer Service', 'Warehouse', 'Administration'
-            ])
-            role = random.choice([
-                'Sales Associate', 'Sales Manager', 'Marketing Specialist', 
-                'Customer Support', 'Inventory Specialist', 'Office Manager'
-            ])
+                department = random.choice([
+                    'Sales', 'Marketing', 'Customer Service', 'Warehouse', 'Administration'
+                ])
+                role = random.choice([
+                    'Sales Associate', 'Sales Manager', 'Marketing Specialist', 
+                    'Customer Support', 'Inventory Specialist', 'Office Manager'
+                ])
             
-            join_date = (datetime.now() - timedelta(days=random.randint(30, 1000))).strftime('%Y-%m-%d')
+                join_date = (datetime.now() - timedelta(days=random.randint(30, 1000))).strftime('%Y-%m-%d')
             
-            employees.append({
-                'employee_id': i,
-                'name': name,
-                'department': department,
-                'position': role,
-                'join_date': join_date
-            })
+                employees.append({
+                    'employee_id': i,
+                    'name': name,
+                    'department': department,
+                    'position': role,
+                    'join_date': join_date
+                })
         
-        # Save employees data
-        pd.DataFrame(employees).to_csv('data/employees.csv', index=False)
+            # Save employees data
+            save_table('employees', pd.DataFrame(employees))
     
-    # Generate daily performance data
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)  # Last 6 months
-    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        # Generate daily performance data
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=180)  # Last 6 months
+        dates = pd.date_range(start=start_date, end=end_date, freq='D')
     
-    # Create daily performance records
-    performance_data = []
+        # Create daily performance records
+        performance_data = []
     
-    for date in dates:
-        # Not every employee has a record every day (weekends, days off, etc.)
-        active_employees = random.sample(employees, min(len(employees), random.randint(10, 20)))
+        for date in dates:
+            # Not every employee has a record every day (weekends, days off, etc.)
+            active_employees = random.sample(employees, min(len(employees), random.randint(10, 20)))
         
-        for employee in active_employees:
-            # Handle different column names between potential DataFrames and dictionaries
-            employee_id = employee.get('employee_id', employee.get('id', 0))
-            employee_name = employee.get('name', '')
-            role = employee.get('position', employee.get('role', ''))
-            department = employee.get('department', '')
+            for employee in active_employees:
+                # Handle different column names between potential DataFrames and dictionaries
+                employee_id = employee.get('employee_id', employee.get('id', 0))
+                department = employee.get('department', '')
             
-            # Generate performance metrics
-            sales_count = random.randint(0, 20) if 'Sales' in department else random.randint(0, 5)
-            sales_value = sales_count * random.randint(100, 1000)
-            customer_satisfaction = round(random.uniform(3.0, 5.0), 1)  # Scale of 1-5
-            attendance = 1.0  # Present
-            productivity_score = round(random.uniform(60, 100), 1)  # Scale of 0-100
+                # Generate performance metrics
+                sales_count = random.randint(0, 20) if 'Sales' in department else random.randint(0, 5)
+                sales_value = sales_count * random.randint(100, 1000)
+                customer_satisfaction = round(random.uniform(3.0, 5.0), 1)  # Scale of 1-5
+                attendance = 1.0  # Present
+                productivity_score = round(random.uniform(60, 100), 1)  # Scale of 0-100
             
-            performance_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'employee_id': employee_id,
-                'employee_name': employee_name,
-                'role': role,
-                'department': department,
-                'sales_count': sales_count,
-                'sales_value': sales_value,
-                'customer_satisfaction': customer_satisfaction,
-                'attendance': attendance,
-                'productivity_score': productivity_score
-            })
-    
-    # Add some absent days (attendance = 0)
-    for _ in range(len(employees) * 5):  # About 5 absences per employee on average
-        random_date = random.choice(dates)
-        random_employee = random.choice(employees)
+                performance_data.append({
+                    'date': date.strftime('%Y-%m-%d'),
+                    'employee_id': employee_id,
+                    'sales_count': sales_count,
+                    'sales_value': sales_value,
+                    'customer_satisfaction': customer_satisfaction,
+                    'attendance': attendance,
+                    'productivity_score': productivity_score
+                })
+    
+        # Add some absent days (attendance = 0)
+        for _ in range(len(employees) * 5):  # About 5 absences per employee on average
+            random_date = random.choice(dates)
+            random_employee = random.choice(employees)
         
-        # Handle different column names
-        employee_id = random_employee.get('employee_id', random_employee.get('id', 0))
-        employee_name = random_employee.get('name', '')
-        role = random_employee.get('position', random_employee.get('role', ''))
-        department = random_employee.get('department', '')
+            # Handle different column names
+            employee_id = random_employee.get('employee_id', random_employee.get('id', 0))
         
-        # Check if this employee already has a record for this date
-        existing_records = [item for item in performance_data 
-                           if item['date'] == random_date.strftime('%Y-%m-%d') 
-                           and item['employee_id'] == employee_id]
+            # Check if this employee already has a record for this date
+            existing_records = [item for item in performance_data 
+                               if item['date'] == random_date.strftime('%Y-%m-%d') 
+                               and item['employee_id'] == employee_id]
         
-        if not existing_records:
-            performance_data.append({
-                'date': random_date.strftime('%Y-%m-%d'),
-                'employee_id': employee_id,
-                'employee_name': employee_name,
-                'role': role,
-                'department': department,
-                'sales_count': 0,
-                'sales_value': 0,
-                'customer_satisfaction': 0,
-                'attendance': 0.0,  # Absent
-                'productivity_score': 0
-            })
-    
-    # Save performance data
-    performance_df = pd.DataFrame(performance_data)
-    performance_df.to_csv('data/performance.csv', index=False)
+            if not existing_records:
+                performance_data.append({
+                    'date': random_date.strftime('%Y-%m-%d'),
+                    'employee_id': employee_id,
+                    'sales_count': 0,
+                    'sales_value': 0,
+                    'customer_satisfaction': 0,
+                    'attendance': 0.0,  # Absent
+                    'productivity_score': 0
+                })
+    
+        # Save performance data
+        performance_df = pd.DataFrame(performance_data)
+        save_table('performance', performance_df)
     print(f"Generated {len(performance_data)} performance records for {len(employees)} employees") 
\ No newline at end of file
@@ -0,0 +1,424 @@
+import io
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from utils.csv_tail import CsvTail, header_columns
+from utils.metrics import increment, timed
+from utils.purchase_log import COMPACTING_NAME as PURCHASE_COMPACTING_NAME, LOG_NAME as PURCHASE_LOG_NAME, read_purchases_with_log
+from utils.storage import file_signature, read_snapshot, table_file
+from utils.table_cache import read_cached_tables, read_retained_table, write_cached_tables
+
+DATA_DIR = "data"
+
+# Copy-on-write (always on from pandas 3): frames the loader shares across
+# reruns and sessions are copied only when a caller writes to them, so
+# nothing is copied defensively and a page cannot change another's data
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+    # Text columns as Arrow-backed strings, as in pandas 3, instead of
+    # Python string objects (needs pandas 2.1 and pyarrow)
+    try:
+        import pyarrow  # noqa: F401
+        pd.set_option("future.infer_string", True)
+    except (ImportError, KeyError):
+        pass
+
+# Tables of a page are parsed concurrently (the CSV parser releases the GIL)
+LOAD_WORKERS = 4
+_load_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="table-load")
+
+# Date columns parsed when a table is loaded
+DATE_COLUMNS = {
+    "sales": ["date"],
+    "purchases": ["date"],
+    "expenses": ["date"],
+    "performance": ["date"],
+}
+
+# Label columns of fact tables with few distinct values, kept dictionary
+# encoded (pandas categoricals, Arrow dictionaries in the table cache): one
+# small integer code per row instead of a string. Count them with
+# label_counts().
+DICTIONARY_COLUMNS = {
+    "sales": ["payment_method"],
+    "purchases": ["status"],
+}
+
+# Dimension tables: the key they are joined on, the foreign key fact tables
+# carry, and the attributes they provide (source column -> joined name)
+DIMENSIONS = {
+    "products": {
+        "key": "id",
+        "foreign_key": "product_id",
+        "attributes": {"name": "product_name", "category": "category"},
+    },
+    "employees": {
+        "key": "employee_id",
+        "foreign_key": "employee_id",
+        "attributes": {"name": "employee_name", "position": "role", "department": "department"},
+    },
+}
+
+# Fact tables store only the foreign key of each dimension they reference
+FACT_DIMENSIONS = {
+    "sales": ["products"],
+    "purchases": ["products"],
+    "performance": ["employees"],
+}
+
+TABLE_NAMES = (*DIMENSIONS, "inventory", "expenses", *FACT_DIMENSIONS)
+
+# Row scopes: a user limited to a dimension attribute value (a product
+# category, an employee department) only gets the rows of each table listed
+# here whose key column holds a key of that dimension with the value.
+# Tables not listed for an attribute are not restricted by it. Expenses
+# (rent, salaries, utilities) are costs of the whole store with no product
+# or employee key, so they cannot be split by category or department: a
+# scoped user sees the store's expenses in full.
+SCOPE_COLUMNS = {
+    "category": {"products": "id", "sales": "product_id", "purchases": "product_id", "inventory": "product_id"},
+    "department": {"employees": "employee_id", "performance": "employee_id"},
+}
+
+# Columns the loader derives from newly parsed rows, kept with the table
+# (and in its Arrow cache) so pages never recompute them. Dated tables get
+# integer calendar keys: day_key counts days and month_key months since
+# 1970-01 (month_key is also the ordinal of a monthly pandas Period), so
+# daily and monthly groupings hash small integers, and only the grouped
+# rows are turned into labels (see calendar_totals()). In sales, an order
+# is every row of one customer on one day: order_key identifies it and
+# new_order marks its first row, so order counts are sums.
+DERIVED_COLUMNS = {
+    "sales": ["day_key", "month_key", "order_key", "new_order"],
+    "purchases": ["day_key", "month_key"],
+    "expenses": ["day_key", "month_key"],
+    "performance": ["day_key", "month_key"],
+}
+ORDER_COLUMNS = ["date", "customer_id"]
+
+# Tables that grow by appended rows: each process keeps the last frame it
+# parsed and, while the file was only appended to, parses just the new rows.
+# Their cache files then only hold the new rows too (see write_cached_tables())
+TAIL_TABLES = ("sales", "expenses", "performance")
+_tails = {}
+_tails_lock = threading.Lock()
+
+# Parsed dimension lookups by (dimension, data_dir): (data version, lookup)
+_lookups = {}
+_lookups_lock = threading.Lock()
+
+def table_path(name, data_dir=DATA_DIR):
+    """Return the CSV path of a table"""
+    return table_file(data_dir, name)
+
+def denormalized_columns(name):
+    """Return the dimension attributes a fact table must not store itself"""
+    columns = set()
+    for dimension in FACT_DIMENSIONS.get(name, []):
+        columns.update(DIMENSIONS[dimension]["attributes"].values())
+    return columns
+
+def _convert_dates(name, df):
+    for column in DATE_COLUMNS.get(name, []):
+        df[column] = pd.to_datetime(df[column])
+    return df
+
+def _encode_labels(name, df):
+    for column in DICTIONARY_COLUMNS.get(name, []):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+def _append_rows(name, frame, appended):
+    """Concatenate parsed rows to a frame, uniting the categories of their label columns"""
+    for column in DICTIONARY_COLUMNS.get(name, []):
+        if column in appended.columns:
+            categories = frame[column].cat.categories.union(appended[column].dropna().unique())
+            frame = frame.assign(**{column: frame[column].cat.set_categories(categories)})
+            appended[column] = pd.Categorical(appended[column], categories=categories)
+    return pd.concat([frame, appended], ignore_index=True)
+
+def _prepare(name, df, previous=None):
+    """Parse the dates, encode the labels and add the DERIVED_COLUMNS of newly read rows"""
+    return _derive_columns(name, _encode_labels(name, _convert_dates(name, df)), previous)
+
+def _derive_columns(name, df, previous=None):
+    """Add the DERIVED_COLUMNS of a table to newly parsed rows.
+
+    `previous` holds the rows loaded before `df` was appended to them.
+    """
+    if "day_key" in DERIVED_COLUMNS.get(name, ()):
+        dates = df['date'].to_numpy()
+        df['day_key'] = dates.astype("datetime64[D]").astype(np.int32)
+        df['month_key'] = dates.astype("datetime64[M]").astype(np.int16)
+    if name == "sales":
+        keys = pd.util.hash_pandas_object(df[ORDER_COLUMNS], index=False).to_numpy()
+        new_order = ~pd.Series(keys).duplicated().to_numpy()
+        if previous is not None and len(previous):
+            # An appended row may belong to an order whose first row was loaded before
+            loaded = previous.loc[previous['date'] >= df['date'].min(), 'order_key']
+            new_order &= ~np.isin(keys, loaded.to_numpy())
+        df['order_key'] = keys
+        df['new_order'] = new_order
+    return df
+
+def rescope_derived(df):
+    """Recompute the derived columns that depend on other rows, after rows were filtered out"""
+    if 'new_order' not in df.columns:
+        return df
+    return df.assign(new_order=~df['order_key'].duplicated().to_numpy())
+
+def _load_appended(name, usecols, data_dir=DATA_DIR):
+    """Load a TAIL_TABLES table, parsing only the rows appended since the last load.
+
+    Falls back to parsing the whole file when it was rewritten, or when the
+    new rows do not fit the column types of the rows before them.
+    """
+    with _tails_lock:
+        if (data_dir, name) not in _tails:
+            # generation counts the full parses: frames of one generation only
+            # grow, and cached holds the (version, rows) last cached from one
+            _tails[data_dir, name] = {"tail": CsvTail(table_path(name, data_dir)), "frame": None, "header": None,
+                                      "generation": 0, "cached": None, "lock": threading.Lock()}
+        state = _tails[data_dir, name]
+
+    with state["lock"]:
+        tail = state["tail"]
+        if state["frame"] is None or len(state["frame"]) != tail.rows:
+            tail.reset()
+        kind, data = tail.read()
+        if kind == "tail":
+            frame = state["frame"]
+            try:
+                appended = pd.read_csv(io.BytesIO(data), header=None, names=state["header"], usecols=usecols)
+                labels = DICTIONARY_COLUMNS.get(name, [])
+                appended = _convert_dates(name, appended).astype(
+                    {column: frame.dtypes[column] for column in appended.columns if column not in labels})
+            except (ValueError, TypeError):
+                tail.reset()
+                kind, data = tail.read()
+            else:
+                state["frame"] = _append_rows(name, frame, _prepare(name, appended, frame))
+                tail.advance(kind, len(appended))
+                increment("table_tail_rows", amount=len(appended), table=name)
+        if kind == "full":
+            state["header"] = header_columns(data)
+            state["frame"] = _prepare(name, pd.read_csv(io.BytesIO(data), usecols=usecols))
+            state["generation"] += 1
+            state["cached"] = None
+            tail.advance(kind, len(state["frame"]))
+        increment("table_load_kind", table=name, kind=kind)
+        # A new frame object over the same data: callers may add columns, and
+        # copy-on-write copies any column they modify
+        return state["frame"].copy(deep=False)
+
+def _cache_base(name, data_dir=DATA_DIR):
+    """Return the (generation, cached) state of a TAIL_TABLES table, or None before its first load"""
+    state = _tails.get((data_dir, name))
+    return None if state is None else (state["generation"], state["cached"])
+
+def _remember_cached(name, version, df, generation, data_dir=DATA_DIR):
+    """Record that the frame cached at `version` was loaded in `generation`"""
+    state = _tails[data_dir, name]
+    with state["lock"]:
+        if state["generation"] == generation:
+            state["cached"] = (version, len(df))
+
+def load_table(name, data_dir=DATA_DIR):
+    """Load a table, parsing its date columns, encoding its DICTIONARY_COLUMNS
+    and adding its DERIVED_COLUMNS.
+
+    Fact tables are returned with foreign keys only; dimension attributes
+    left in older files are skipped at parse time.
+    """
+    skipped = denormalized_columns(name)
+    usecols = lambda column: column not in skipped
+    with timed("table_load", table=name):
+        if name == "purchases":
+            # Include orders still waiting in the append-only log
+            return _prepare(name, read_purchases_with_log(data_dir, usecols=usecols))
+        if name in TAIL_TABLES:
+            return _load_appended(name, usecols, data_dir)
+        return _prepare(name, pd.read_csv(table_path(name, data_dir), usecols=usecols))
+
+def scope_filters(name, scope, data_dir=DATA_DIR):
+    """Return the (column, allowed keys) filters that limit a table to a row scope.
+
+    `scope` is a tuple of (attribute, value) pairs, e.g. (("category", "Electronics"),).
+    """
+    filters = []
+    for attribute, value in scope:
+        column = SCOPE_COLUMNS[attribute].get(name)
+        if column is not None:
+            lookup = dimension_lookup(_dimension_for(attribute), data_dir)
+            filters.append((column, tuple(lookup.index[lookup[attribute] == value].tolist())))
+    return tuple(filters)
+
+def apply_filters(df, filters):
+    """Keep the rows of df that pass every (column, allowed values) filter"""
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, values in filters:
+        mask &= df[column].isin(values)
+    return rescope_derived(df[mask].reset_index(drop=True))
+
+def _read_retained(path, filters=()):
+    # The converted frame stays in memory for every later caller; a new frame
+    # object over its data lets a caller add columns (see _load_appended)
+    return read_retained_table(path, filters).copy(deep=False)
+
+def load_tables(*names, data_dir=DATA_DIR, scope=()):
+    """Load several tables from the same snapshot, in the order given.
+
+    Use it when a page combines tables, so a regeneration running at the
+    same time can never mix old and new files. When every table is cached
+    at its current version they are mapped from their Arrow files, once per
+    process and version (see read_retained_table()); otherwise
+    they are parsed concurrently (the wait is close to that of the largest
+    one) and cached for the next caller, in this process or after a restart.
+    `data_dir` selects the store (see utils/stores.py).
+
+    `scope` limits the rows to a row scope (see SCOPE_COLUMNS). From the
+    cache the filter is applied to the mapped Arrow data, so rows outside
+    the scope are never converted into the returned frames.
+    """
+    with timed("tables_load", tables="+".join(names)):
+        versions = {name: data_version(name, data_dir=data_dir) for name in names}
+        filters = {name: scope_filters(name, scope, data_dir) for name in names}
+        frames = read_cached_tables(versions, data_dir, read=_read_retained, filters=filters)
+        if frames is not None:
+            increment("table_cache", outcome="hit")
+            return tuple(rescope_derived(df) if filters[name] else df for name, df in zip(names, frames))
+
+        increment("table_cache", outcome="miss")
+        bases = {name: _cache_base(name, data_dir) for name in names if name in TAIL_TABLES}
+        snapshot, _ = read_snapshot(data_dir, names, lambda name: load_table(name, data_dir), executor=_load_pool)
+        frames = tuple(snapshot[name] for name in names)
+        # Only cache what is known to belong to the versions read
+        if all(data_version(name, data_dir=data_dir) == version for name, version in versions.items()):
+            # A frame that grew from the last one cached, with no full parse in
+            # between, starts with its rows: cache only the rows after them
+            loaded = {name: _cache_base(name, data_dir) for name in bases}
+            appended = {name: base[1] for name, base in bases.items()
+                        if base is not None and base[1] is not None and loaded[name] == base
+                        and len(snapshot[name]) >= base[1][1]}
+            write_cached_tables(versions, frames, data_dir, appended)
+            for name, (generation, _) in loaded.items():
+                # Unless it was the first, a full parse during the load may
+                # have been another caller's, after this frame was loaded
+                if generation == (bases[name][0] if bases[name] else 1):
+                    _remember_cached(name, versions[name], snapshot[name], generation, data_dir)
+    return tuple(apply_filters(df, filters[name]) for name, df in zip(names, frames))
+
+def table_signature(name, data_dir=DATA_DIR):
+    """Identify the current version of one table's files"""
+    signature = [file_signature(table_path(name, data_dir))]
+    if name == "purchases":
+        # Orders still waiting in the append-only log, or in a log being compacted
+        signature.append(file_signature(os.path.join(data_dir, PURCHASE_LOG_NAME)))
+        signature.append(file_signature(os.path.join(data_dir, PURCHASE_COMPACTING_NAME)))
+    return signature
+
+def data_version(*names, data_dir=DATA_DIR):
+    """Return a token that changes whenever any of the tables may have changed.
+
+    Without names every table is covered. Key cached results by the tables
+    they are computed from, so a change to another table keeps them valid.
+    Every write replaces a file atomically, so a new file identity is a new
+    version.
+    """
+    signature = [(name, table_signature(name, data_dir)) for name in (names or TABLE_NAMES)]
+    return hashlib.md5(repr(signature).encode()).hexdigest()[:12]
+
+def dimension_lookup(dimension, data_dir=DATA_DIR):
+    """Return a dimension's attributes indexed by its key, under their joined names.
+
+    The lookup is parsed once per data version of the dimension table and
+    shared by every caller in the process.
+    """
+    version = data_version(dimension, data_dir=data_dir)
+    with _lookups_lock:
+        cached = _lookups.get((dimension, data_dir))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    spec = DIMENSIONS[dimension]
+    df = pd.read_csv(table_path(dimension, data_dir), usecols=[spec["key"], *spec["attributes"]])
+    lookup = df.set_index(spec["key"]).rename(columns=spec["attributes"])
+    with _lookups_lock:
+        _lookups[dimension, data_dir] = (version, lookup)
+    return lookup
+
+def _dimension_for(attribute):
+    """Find the dimension that provides a joined attribute"""
+    for dimension, spec in DIMENSIONS.items():
+        if attribute in spec["attributes"].values():
+            return dimension
+    raise KeyError(f"No dimension provides '{attribute}'")
+
+def _key_values(df, foreign_key):
+    """Return the foreign key values of a frame, from a column or the index"""
+    if foreign_key in df.columns:
+        return df[foreign_key]
+    if foreign_key in (df.index.names or []):
+        return pd.Series(df.index.get_level_values(foreign_key), index=df.index)
+    return None
+
+def attach_dimensions(df, columns, data_dir=DATA_DIR):
+    """Return a copy of df with the requested dimension attributes joined on.
+
+    Use it on the rows or per-key aggregates that are actually displayed,
+    not on whole fact tables; the join is a map over the foreign key.
+    """
+    joined = {}
+    lookups = {}
+    for column in columns:
+        dimension = _dimension_for(column)
+        keys = _key_values(df, DIMENSIONS[dimension]["foreign_key"])
+        if keys is None:
+            raise KeyError(f"'{column}' needs a {DIMENSIONS[dimension]['foreign_key']} column")
+        if dimension not in lookups:
+            lookups[dimension] = dimension_lookup(dimension, data_dir)
+        joined[column] = keys.map(lookups[dimension][column])
+    return df.assign(**joined)
+
+def aggregate_by(df, attribute, columns, func="sum", data_dir=DATA_DIR):
+    """Aggregate fact rows by a dimension attribute such as category.
+
+    Rows are first reduced per foreign key, then the few per-key results are
+    labelled and combined. Only decomposable aggregations (sum, count, min,
+    max) give the same result as grouping the joined rows directly.
+    """
+    dimension = _dimension_for(attribute)
+    foreign_key = DIMENSIONS[dimension]["foreign_key"]
+    per_key = df.groupby(foreign_key)[columns].agg(func)
+    labels = per_key.index.map(dimension_lookup(dimension, data_dir)[attribute])
+    combine = "sum" if func == "count" else func
+    return per_key.groupby(labels.rename(attribute)).agg(combine).reset_index()
+
+def label_counts(values):
+    """Count the rows of each label, leaving out categories no row has"""
+    counts = values.value_counts()
+    return counts[counts > 0]
+
+def month_label(keys):
+    """Format month keys as 'YYYY-MM' labels"""
+    return np.asarray(keys).astype("datetime64[M]").astype(str)
+
+def day_label(keys):
+    """Return the dates of day keys"""
+    return pd.to_datetime(np.asarray(keys).astype("datetime64[D]")).date
+
+def calendar_totals(df, period, columns, func="sum"):
+    """Aggregate dated rows per "month" or per day ("date") on their integer keys.
+
+    Returns a frame of the period labels ('YYYY-MM' months or dates) and the
+    aggregated columns, in calendar order.
+    """
+    key, label = ("month_key", month_label) if period == "month" else ("day_key", day_label)
+    totals = df.groupby(key)[columns].agg(func)
+    totals.index = pd.Index(label(totals.index), name=period)
+    return totals.reset_index()
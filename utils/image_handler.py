@@ -1,84 +1,87 @@
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageColor, ImageDraw, ImageFont, features
 import os
 import base64
+import hashlib
 from io import BytesIO
+from functools import lru_cache
+from urllib.parse import quote
 import random
+import threading
+from utils.metrics import increment
 
-def generate_avatar_placeholder(size=(200, 200), bg_color=None, text="User", text_color="#FFFFFF"):
-    """Generate a more appealing placeholder avatar image"""
-    # Choose a color from our theme colors if none specified
-    if bg_color is None:
-        theme_colors = ["#3498db", "#2980b9", "#9b59b6", "#16a085", "#f39c12", "#e74c3c", "#2c3e50"]
-        bg_color = random.choice(theme_colors)
+# Avatar palette; each username maps onto one of these deterministically
+AVATAR_COLORS = ["#3498db", "#2980b9", "#9b59b6", "#16a085", "#f39c12", "#e74c3c", "#2c3e50"]
+AVATAR_FONT_NAMES = ["Arial", "Helvetica", "Verdana", "Tahoma", "Trebuchet MS", "DejaVuSans.ttf"]
+AVATAR_CACHE_SIZE = 512
+
+@lru_cache(maxsize=1)
+def _resolve_font_name():
+    """Find the first available TrueType font once per process (None if there is none)"""
+    for font_name in AVATAR_FONT_NAMES:
+        try:
+            ImageFont.truetype(font_name, 12)
+            return font_name
+        except OSError:
+            continue
+    return None
+
+@lru_cache(maxsize=None)
+def _get_font(font_size):
+    """Return the resolved font at the requested size"""
+    font_name = _resolve_font_name()
+    if font_name is not None:
+        return ImageFont.truetype(font_name, font_size)
+    try:
+        return ImageFont.load_default(size=font_size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed size bitmap font
+        return ImageFont.load_default()
+
+def avatar_style(text):
+    """Derive a stable (background colour, initial) pair from a username"""
+    digest = hashlib.md5(text.encode("utf-8")).digest()
+    bg_color = AVATAR_COLORS[digest[0] % len(AVATAR_COLORS)]
+    initial = text[:1].upper() or "?"
+    return bg_color, initial
+
+def render_avatar(size=(200, 200), bg_color=None, text="User", text_color="#FFFFFF"):
+    """Draw an avatar for the given text in memory and return it as a PIL image"""
+    default_color, initial = avatar_style(text)
+    bg_color = bg_color or default_color
     
-    # Create a new image with a solid color
     avatar = Image.new('RGB', size, color=bg_color)
     draw = ImageDraw.Draw(avatar)
     
-    # Try to use a font or default to a simple centered initial
-    try:
-        font_size = size[0] // 3
-        try:
-            # Try to use a common font
-            common_fonts = ["Arial", "Helvetica", "Verdana", "Tahoma", "Trebuchet MS"]
-            font = None
-            for font_name in common_fonts:
-                try:
-                    font = ImageFont.truetype(font_name, font_size)
-                    break
-                except:
-                    continue
-            
-            if font is None:
-                font = ImageFont.load_default()
-                font_size = 40  # Adjust size for default font
-        except:
-            font = ImageFont.load_default()
-            font_size = 40  # Adjust size for default font
-        
-        # Get the first initial
-        initial = text[0].upper()
-        
-        # Calculate text position for center alignment
-        # For PIL versions that might not have textbbox
-        try:
-            left, top, right, bottom = draw.textbbox((0, 0), initial, font=font)
-            text_width = right - left
-            text_height = bottom - top
-        except:
-            text_width, text_height = draw.textsize(initial, font=font)
-        
-        position = ((size[0] - text_width) // 2, (size[1] - text_height) // 2 - 10)
-        
-        # Draw a circle background for the initial
-        circle_radius = min(size) // 2 - 20
-        circle_center = (size[0] // 2, size[1] // 2)
-        circle_color = "rgba(255, 255, 255, 0.3)"
-        
-        # Draw semi-transparent white circle
-        for r in range(circle_radius, circle_radius - 5, -1):
-            alpha = int(100 + (circle_radius - r) * 30)  # Increasing opacity for inner circles
-            draw.ellipse((circle_center[0] - r, circle_center[1] - r, 
-                         circle_center[0] + r, circle_center[1] + r), 
-                         fill=(255, 255, 255, alpha))
-        
-        # Draw the initial
-        draw.text(position, initial, fill=text_color, font=font)
-        
-        # Add a decorative element - small circle in corner
-        small_circle_radius = min(size) // 10
-        draw.ellipse((size[0] - small_circle_radius * 2, size[1] - small_circle_radius * 2,
-                      size[0], size[1]), fill="#ffffff")
-        
-    except Exception as e:
-        # Fallback to a simple circle if text drawing fails
-        print(f"Error creating text avatar, using fallback: {str(e)}")
-        circle_center = (size[0] // 2, size[1] // 2)
-        circle_radius = min(size) // 2 - 20
-        draw.ellipse((circle_center[0] - circle_radius, circle_center[1] - circle_radius,
-                      circle_center[0] + circle_radius, circle_center[1] + circle_radius),
-                     fill="#ffffff")
+    # Lighter disc behind the initial: the background blended 30% towards white
+    bg_rgb = ImageColor.getrgb(bg_color)
+    circle_color = tuple(int(c + (255 - c) * 0.3) for c in bg_rgb[:3])
+    circle_radius = min(size) * 0.4
+    center = (size[0] / 2, size[1] / 2)
+    draw.ellipse((center[0] - circle_radius, center[1] - circle_radius,
+                  center[0] + circle_radius, center[1] + circle_radius),
+                 fill=circle_color)
+    
+    # Draw the initial centred on the disc
+    font = _get_font(max(8, size[0] // 3))
+    draw.text(center, initial, fill=text_color, font=font, anchor="mm")
+    
+    return avatar
+
+@lru_cache(maxsize=AVATAR_CACHE_SIZE)
+def get_avatar_bytes(username, size=64):
+    """Return a PNG avatar for a username, cached in a bounded LRU"""
+    buffer = BytesIO()
+    render_avatar((size, size), text=username).save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def get_avatar_data_uri(username, size=64):
+    """Return a username's avatar as a data URI ready to embed in HTML"""
+    return get_avatar_asset(username, size)["data_uri"]
+
+def generate_avatar_placeholder(size=(200, 200), bg_color=None, text="User", text_color="#FFFFFF"):
+    """Generate the default avatar image and save it to the assets directory"""
+    avatar = render_avatar(size, bg_color, text, text_color)
     
     # Save the image if assets directory exists
     assets_dir = "assets"
@@ -90,13 +93,19 @@ def generate_avatar_placeholder(size=(200, 200), bg_color=None, text="User", tex
     
     return avatar_path
 
-def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
-    """Generate a more appealing placeholder login image"""
-    # Create a new image with a gradient background
-    login_img = Image.new('RGB', size, color=bg_color)
-    draw = ImageDraw.Draw(login_img)
-    
-    # Create a business dashboard illustration
+# Login artwork variants, all rendered from one high resolution master
+LOGIN_IMAGE_BASE_SIZE = (500, 400)
+LOGIN_IMAGE_SIZES = {
+    "small": (320, 256),
+    "medium": (500, 400),
+    "large": (1000, 800),
+}
+
+def render_login_image(size=(500, 400), bg_color="#f0f2f6", seed=7):
+    """Draw the login illustration in memory and return it as a PIL image"""
+    # Fixed pixel measurements are expressed for the 500px base size
+    scale = size[0] / LOGIN_IMAGE_BASE_SIZE[0]
+    rng = random.Random(seed)
     
     # Draw main container / monitor
     monitor_width = size[0] * 0.7
@@ -104,21 +113,27 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
     monitor_left = (size[0] - monitor_width) / 2
     monitor_top = (size[1] - monitor_height) / 3
     
-    # Draw monitor body (with gradient)
-    for i in range(int(monitor_width)):
-        # Create a blue gradient from left to right
-        blue_val = 180 - int(120 * (i / monitor_width))
-        draw.line(
-            [(monitor_left + i, monitor_top), 
-             (monitor_left + i, monitor_top + monitor_height)],
-            fill=(52, blue_val, 219)
-        )
+    # Build the background and the monitor's blue gradient as one array
+    # instead of drawing a line per pixel column
+    canvas = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    canvas[:] = ImageColor.getrgb(bg_color)
+    
+    gradient_width = int(monitor_width)
+    left, top = int(monitor_left), int(monitor_top)
+    bottom = int(monitor_top + monitor_height)
+    blue_vals = 180 - (120 * np.arange(gradient_width) / monitor_width).astype(np.int32)
+    canvas[top:bottom + 1, left:left + gradient_width, 0] = 52
+    canvas[top:bottom + 1, left:left + gradient_width, 1] = blue_vals
+    canvas[top:bottom + 1, left:left + gradient_width, 2] = 219
+    
+    login_img = Image.fromarray(canvas, "RGB")
+    draw = ImageDraw.Draw(login_img)
     
     # Draw monitor frame
     draw.rectangle(
         [monitor_left, monitor_top, 
          monitor_left + monitor_width, monitor_top + monitor_height],
-        outline="#2c3e50", width=3
+        outline="#2c3e50", width=max(1, round(3 * scale))
     )
     
     # Draw monitor stand
@@ -130,7 +145,7 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
     draw.rectangle(
         [stand_left, stand_top,
          stand_left + stand_width, stand_top + stand_height],
-        fill="#2c3e50", outline="#2c3e50", width=2
+        fill="#2c3e50", outline="#2c3e50", width=max(1, round(2 * scale))
     )
     
     # Draw stand base
@@ -142,11 +157,11 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
     draw.rectangle(
         [base_left, base_top,
          base_left + base_width, base_top + base_height],
-        fill="#2c3e50", outline="#2c3e50", width=2
+        fill="#2c3e50", outline="#2c3e50", width=max(1, round(2 * scale))
     )
     
     # Draw dashboard elements inside monitor
-    padding = 15
+    padding = 15 * scale
     content_left = monitor_left + padding
     content_top = monitor_top + padding
     content_width = monitor_width - padding * 2
@@ -170,14 +185,14 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
     
     # Draw sidebar menu items
     menu_items = 6
-    menu_height = 20
-    menu_padding = 10
-    menu_start = content_top + 70
+    menu_height = 20 * scale
+    menu_padding = 10 * scale
+    menu_start = content_top + 70 * scale
     
     # Draw sidebar avatar circle
-    avatar_size = 50
+    avatar_size = 50 * scale
     avatar_left = content_left + (sidebar_width - avatar_size) / 2
-    avatar_top = content_top + 10
+    avatar_top = content_top + 10 * scale
     
     draw.ellipse(
         [avatar_left, avatar_top,
@@ -191,30 +206,31 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
         
         # Menu item background
         item_color = "#3498db" if i == 0 else "#f5f5f5"
-        draw.rectangle(
-            [content_left + 10, item_top,
-             content_left + sidebar_width - 10, item_top + menu_height],
-            fill=item_color, radius=5
+        draw.rounded_rectangle(
+            [content_left + 10 * scale, item_top,
+             content_left + sidebar_width - 10 * scale, item_top + menu_height],
+            radius=5 * scale, fill=item_color
         )
     
     # Draw KPI cards in main area
     card_width = (content_width - sidebar_width - padding * 3) / 2
     card_height = (content_height - padding * 3) / 2
+    chart_span = 50 * scale
     
     # Top row cards
     for i in range(2):
         card_left = main_left + padding + i * (card_width + padding)
-        draw.rectangle(
+        draw.rounded_rectangle(
             [card_left, content_top + padding,
              card_left + card_width, content_top + padding + card_height],
-            fill="#ffffff", radius=8
+            radius=8 * scale, fill="#ffffff"
         )
         
         # Add a color bar to the card
         bar_colors = ["#3498db", "#e74c3c"]
         draw.rectangle(
             [card_left, content_top + padding,
-             card_left + 5, content_top + padding + card_height],
+             card_left + 5 * scale, content_top + padding + card_height],
             fill=bar_colors[i % len(bar_colors)]
         )
         
@@ -227,45 +243,43 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
             chart_top = content_top + padding + card_height * 0.5
             
             for j in range(bar_count):
-                bar_height = random.randint(20, 50)
-                bar_left = card_left + 20 + j * (bar_width + bar_spacing)
+                bar_height = rng.randint(20, 50) * scale
+                bar_left = card_left + 20 * scale + j * (bar_width + bar_spacing)
                 
                 draw.rectangle(
-                    [bar_left, chart_top + 50 - bar_height,
-                     bar_left + bar_width, chart_top + 50],
+                    [bar_left, chart_top + chart_span - bar_height,
+                     bar_left + bar_width, chart_top + chart_span],
                     fill="#3498db"
                 )
         else:
             # Line chart
             points = []
             point_count = 10
-            chart_width = card_width - 40
-            chart_height = 50
+            chart_width = card_width - 40 * scale
             chart_top = content_top + padding + card_height * 0.5
             
             for j in range(point_count):
-                x = card_left + 20 + j * (chart_width / (point_count - 1))
-                y = chart_top + 50 - random.randint(10, chart_height)
+                x = card_left + 20 * scale + j * (chart_width / (point_count - 1))
+                y = chart_top + chart_span - rng.randint(10, 50) * scale
                 points.append((x, y))
             
-            for j in range(len(points) - 1):
-                draw.line([points[j], points[j+1]], fill="#e74c3c", width=2)
+            draw.line(points, fill="#e74c3c", width=max(1, round(2 * scale)))
     
     # Bottom row cards
     for i in range(2):
         card_left = main_left + padding + i * (card_width + padding)
         card_top = content_top + padding * 2 + card_height
-        draw.rectangle(
+        draw.rounded_rectangle(
             [card_left, card_top,
              card_left + card_width, card_top + card_height],
-            fill="#ffffff", radius=8
+            radius=8 * scale, fill="#ffffff"
         )
         
         # Add a color bar to the card
         bar_colors = ["#9b59b6", "#f39c12"]
         draw.rectangle(
             [card_left, card_top,
-             card_left + 5, card_top + card_height],
+             card_left + 5 * scale, card_top + card_height],
             fill=bar_colors[i % len(bar_colors)]
         )
         
@@ -304,23 +318,168 @@ def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
                         outline="#e0e0e0"
                     )
     
+    return login_img
+
+@lru_cache(maxsize=1)
+def _login_image_master():
+    """Render the largest login illustration once; smaller variants are downscaled from it"""
+    return render_login_image(max(LOGIN_IMAGE_SIZES.values()))
+
+def _encode_image(image, image_format):
+    """Encode a PIL image to bytes in the given format"""
+    buffer = BytesIO()
+    if image_format == "WEBP":
+        image.save(buffer, format="WEBP", quality=85, method=6)
+    elif image_format == "WEBP_LOSSLESS":
+        image.save(buffer, format="WEBP", lossless=True, method=6)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+@lru_cache(maxsize=None)
+def get_login_image_bytes(variant="medium", image_format="auto"):
+    """Return the encoded login illustration as bytes.
+
+    Each (variant, format) pair is rendered and encoded once per process and
+    shared by every session, so the login page needs no disk I/O or decoding.
+    With "auto" the smallest of PNG, lossy and lossless WebP is kept; WebP is
+    skipped when Pillow was built without it.
+    """
+    image = _login_image_master()
+    size = LOGIN_IMAGE_SIZES[variant]
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    
+    if image_format == "auto":
+        candidates = ["PNG"]
+        if features.check("webp"):
+            candidates += ["WEBP", "WEBP_LOSSLESS"]
+    elif image_format.startswith("WEBP") and not features.check("webp"):
+        candidates = ["PNG"]
+    else:
+        candidates = [image_format]
+    
+    return min((_encode_image(image, fmt) for fmt in candidates), key=len)
+
+def generate_login_image_placeholder(size=(500, 400), bg_color="#f0f2f6"):
+    """Generate a more appealing placeholder login image"""
+    login_img = render_login_image(size, bg_color)
+    
     # Save the image
     assets_dir = "assets"
     if not os.path.exists(assets_dir):
         os.makedirs(assets_dir)
     
     login_path = os.path.join(assets_dir, "login_image.png")
-    login_img.save(login_path)
+    login_img.save(login_path, optimize=True)
     
     return login_path
 
+# Inline asset registry: each file is read and encoded once per (path, mtime).
+# Avatars are encoded once per (username, size), in a bounded LRU; a page
+# inlines one user's avatar, once (see display_header()), so the registry
+# counts the largest avatar of each size toward the page payload
+INLINE_ASSET_BUDGET = 32 * 1024  # bytes of data URIs a page should carry at most
+ASSET_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".svg": "image/svg+xml",
+}
+_asset_registry = {}
+_asset_lock = threading.Lock()
+
+def _encode_asset(raw, mime):
+    """Build the base64 payload and data URI for raw asset bytes"""
+    encoded = base64.b64encode(raw).decode()
+    if mime == "image/svg+xml":
+        # SVG is text, so a percent-encoded URI is smaller than base64
+        svg = " ".join(raw.decode("utf-8").split())
+        data_uri = "data:image/svg+xml," + quote(svg, safe=" =:/-.,#()'")
+    else:
+        data_uri = f"data:{mime};base64,{encoded}"
+    return encoded, data_uri
+
+def get_asset(image_path):
+    """Return the registry entry for an asset file, encoding it only when it is new or changed.
+
+    The entry holds the base64 payload, a ready-to-embed data URI and the
+    number of bytes it adds to a page when inlined.
+    """
+    mtime = os.stat(image_path).st_mtime_ns
+    entry = _asset_registry.get(image_path)
+    if entry is not None and entry["version"] == mtime:
+        return entry
+    
+    with _asset_lock:
+        entry = _asset_registry.get(image_path)
+        if entry is None or entry["version"] != mtime:
+            with open(image_path, "rb") as img_file:
+                raw = img_file.read()
+            mime = ASSET_MIME_TYPES.get(os.path.splitext(image_path)[1].lower(), "application/octet-stream")
+            entry = _asset_entry(image_path, mtime, raw, mime)
+            _register_asset(entry)
+    return entry
+
+@lru_cache(maxsize=AVATAR_CACHE_SIZE)
+def get_avatar_asset(username, size=64):
+    """Return the inline asset entry of a user's avatar, encoded once per (username, size)"""
+    entry = _asset_entry(f"avatar:{size}px", username, get_avatar_bytes(username, size), "image/png")
+    with _asset_lock:
+        counted = _asset_registry.get(entry["path"])
+        if counted is None or counted["inline_bytes"] < entry["inline_bytes"]:
+            _register_asset(entry)
+    return entry
+
+def _asset_entry(key, version, raw, mime):
+    """Encode raw asset bytes into a registry entry"""
+    encoded, data_uri = _encode_asset(raw, mime)
+    return {
+        "path": key,
+        "version": version,
+        "mime": mime,
+        "base64": encoded,
+        "data_uri": data_uri,
+        "file_bytes": len(raw),
+        "inline_bytes": len(data_uri),
+    }
+
+def _register_asset(entry):
+    """Add an entry to the registry (under _asset_lock), counting it when the
+    page payload goes over budget (see the admins' Diagnostics expander)"""
+    _asset_registry[entry["path"]] = entry
+    if asset_payload_report()["over_budget"]:
+        increment("inline_assets_over_budget", asset=entry["path"])
+
+def get_asset_data_uri(image_path):
+    """Return a cached data URI for an asset file, ready for an <img src> or CSS url()"""
+    return get_asset(image_path)["data_uri"]
+
 def get_base64_encoded_image(image_path):
     """Convert an image to base64 encoding for embedding in HTML/CSS"""
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+    return get_asset(image_path)["base64"]
+
+def asset_payload_report():
+    """Report the page payload each registered inline asset adds, largest first"""
+    rows = sorted(
+        ({key: entry[key] for key in ("path", "mime", "file_bytes", "inline_bytes")}
+         for entry in list(_asset_registry.values())),
+        key=lambda row: row["inline_bytes"],
+        reverse=True,
+    )
+    total = sum(row["inline_bytes"] for row in rows)
+    return {
+        "assets": rows,
+        "total_bytes": total,
+        "budget_bytes": INLINE_ASSET_BUDGET,
+        "over_budget": total > INLINE_ASSET_BUDGET,
+    }
 
+@lru_cache(maxsize=1)
 def ensure_images_exist():
-    """Make sure all necessary images exist"""
+    """Make sure all necessary images exist (checked once per process)"""
     if not os.path.exists("assets/avatar.png"):
         generate_avatar_placeholder()
     
@@ -0,0 +1,167 @@
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from utils.metrics import increment
+
+class Job:
+    """A unit of background work with progress that any session can watch"""
+
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.progress = 0.0
+        self.message = "Queued"
+        # How many submit() calls returned this job
+        self.submissions = 1
+
+    def report(self, progress, message):
+        """Record progress (0..1) from inside the job"""
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        self.message = message
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+class JobRunner:
+    """Run jobs on a thread pool, sharing and caching them by key.
+
+    Submitting a key that is already running returns the running job, so
+    identical requests from several sessions compute once; a finished job
+    stays cached (up to `cache_size` keys, least recently used evicted).
+    Failed jobs are dropped so the next request retries.
+
+    With processes=True jobs run in worker processes instead, out of reach
+    of this process's GIL; job functions and arguments must then be
+    picklable, and only the start and end of a job are reported.
+    """
+
+    def __init__(self, max_workers=2, cache_size=32, name="jobs", processes=False):
+        if processes:
+            # spawn: workers must not inherit locks held by threads of this process
+            self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.processes = processes
+        self.max_workers = max_workers
+        self.name = name
+        self._jobs = OrderedDict()
+        # Reentrant: cancelling under the lock runs _finished() in this thread
+        self._lock = threading.RLock()
+        self.cache_size = cache_size
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Return the job for `key`, starting fn(*args, progress=..., **kwargs) if needed"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+                job.submissions += 1
+                increment("job_submit", runner=self.name, outcome="cached" if job.done() else "coalesced")
+                return job
+
+            job = Job(key)
+            if self.processes:
+                job.report(0.1, "Running in a worker process")
+                job.future = self._executor.submit(fn, *args, **kwargs)
+            else:
+                job.future = self._executor.submit(fn, *args, progress=job.report, **kwargs)
+            self._jobs[key] = job
+            self._evict()
+        increment("job_submit", runner=self.name, outcome="started")
+        job.future.add_done_callback(lambda future: self._finished(job))
+        return job
+
+    def prestart(self, fn, *args):
+        """Start the workers now rather than on the first jobs and run fn(*args)
+        on them, once per worker process (once in all with threads); wait
+        for the calls to finish.
+
+        Workers are spawned as calls find none idle, so every worker starts;
+        which worker runs which call is up to the pool.
+        """
+        calls = self.max_workers if self.processes else 1
+        for future in [self._executor.submit(fn, *args) for _ in range(calls)]:
+            future.result()
+
+    def _finished(self, job):
+        if job.future.cancelled() or job.future.exception() is not None:
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
+
+    def _evict(self):
+        """Drop the least recently used finished jobs beyond cache_size"""
+        excess = len(self._jobs) - self.cache_size
+        for key in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[key].done():
+                del self._jobs[key]
+                excess -= 1
+
+    def cancel(self, job):
+        """Cancel `job` if it has not started yet and no other caller submitted
+        it since; return True if cancelled"""
+        with self._lock:
+            if self._jobs.get(job.key) is not job or job.submissions > 1:
+                return False
+            return job.future.cancel()
+
+    def invalidate(self, match):
+        """Drop the finished jobs whose key satisfies match(key); return how many"""
+        with self._lock:
+            stale = [key for key, job in self._jobs.items() if job.done() and match(key)]
+            for key in stale:
+                del self._jobs[key]
+        return len(stale)
+
+    def cached(self, key):
+        """Return the finished job for `key`, or None"""
+        with self._lock:
+            job = self._jobs.get(key)
+        return job if job is not None and job.done() else None
+
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers of a key.
+
+    The first caller of a key computes in its own thread; callers arriving
+    while it runs wait for it and get the same result (or exception).
+    Nothing is kept once it finishes; the next caller computes afresh.
+    Results are shared between the callers: do not modify them in place.
+    """
+
+    def __init__(self, name="single-flight"):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), computed once for concurrent callers of `key`"""
+        # The first element of a key names the computation in the metrics
+        label = key[0] if isinstance(key, tuple) else key
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            increment("single_flight", flight=self.name, key=label, outcome="coalesced")
+            return call.result()
+
+        increment("single_flight", flight=self.name, key=label, outcome="computed")
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as error:
+            call.set_exception(error)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,131 @@
+import io
+import threading
+import time
+from functools import reduce
+import pandas as pd
+from utils.csv_tail import CsvTail, header_columns
+from utils.metrics import increment, timed
+from utils.sketches import distinct_by_day
+from utils.storage import table_file
+
+# Seconds between live refreshes of the Dashboard, and the minimum between
+# two reads of the sales file however many sessions are watching
+LIVE_INTERVAL = 5
+MIN_REFRESH_INTERVAL = 1.0
+LIVE_COLUMNS = ['date', 'total_price', 'customer_id']
+
+class _DailyTotals:
+    """Month and trend figures over daily() revenue and order counts and
+    customers() distinct customers per day"""
+
+    def month_totals(self):
+        """Return the revenue, orders, distinct customers (and whether that count
+        is exact) and average order value of the latest month with sales and of
+        the month before, as the Dashboard view's month figures"""
+        daily = self.daily()
+        customers = self.customers()
+        months = daily.index.to_period('M')
+        current_month = months.max()
+
+        def totals(month):
+            days = daily[months == month]
+            sales, orders = days['sum'].sum(), int(days['count'].sum())
+            return {
+                'sales': sales,
+                'orders': orders,
+                'customers': customers.count(month.start_time, (month + 1).start_time),
+                'customers_exact': customers.exact,
+                'avg_order_value': sales / orders if orders else float('nan'),
+            }
+        return totals(current_month), totals(current_month - 1)
+
+    def daily_trend(self, today, days=30, last=15):
+        """Return the daily revenue of the last `days` days (the `last` most recent rows)"""
+        daily = self.daily()
+        recent = daily.loc[daily.index >= today - pd.Timedelta(days=days), 'sum']
+        trend = recent.resample('D').sum().rename('total_price').rename_axis('date').reset_index()
+        return trend.tail(last)
+
+class LiveSales(_DailyTotals):
+    """Running daily sales totals, kept current by tailing sales.csv.
+
+    Rows appended to the file since the last refresh are parsed on their
+    own and folded into the daily rollup, so a refresh costs as much as the
+    new rows. A file that was rewritten (every save_table() writes a new
+    one) is read again in full. Distinct customers are kept per day in
+    mergeable form (see utils/sketches.py), so any window of days is
+    counted without rescanning the rows.
+    """
+
+    def __init__(self, data_dir="data"):
+        self._tail = CsvTail(table_file(data_dir, "sales"))
+        self._lock = threading.Lock()
+        self._header = None
+        self._daily = None
+        self._customers = None
+        self._checked = 0.0
+
+    def _read_rows(self, data, names=None):
+        """Parse complete CSV lines into per-day revenue and order counts and distinct customers"""
+        options = {"names": names, "header": None} if names else {}
+        rows = pd.read_csv(io.BytesIO(data), usecols=LIVE_COLUMNS, **options)
+        return (rows.groupby('date')['total_price'].agg(['sum', 'count']),
+                distinct_by_day(pd.to_datetime(rows['date']), rows['customer_id']))
+
+    def refresh(self):
+        """Fold rows appended since the last refresh into the rollup"""
+        with self._lock:
+            if self._daily is not None and time.monotonic() - self._checked < MIN_REFRESH_INTERVAL:
+                return self
+            kind, data = self._tail.read()
+            if kind == "full":
+                with timed("live_sales_rebuild"):
+                    self._header = header_columns(data)
+                    self._daily, self._customers = self._read_rows(data)
+            elif kind == "tail":
+                with timed("live_sales_tail"):
+                    new_days, new_customers = self._read_rows(data, names=self._header)
+                    self._daily = self._daily.add(new_days, fill_value=0)
+                    self._customers = self._customers.merge(new_customers)
+                increment("live_sales_rows", amount=int(new_days['count'].sum()))
+            if kind != "unchanged":
+                self._tail.advance(kind, int(self._daily['count'].sum()))
+            self._checked = time.monotonic()
+        return self
+
+    def daily(self):
+        """Return revenue ('sum') and orders ('count') per day, indexed by date"""
+        with self._lock:
+            daily = self._daily
+        return daily.set_axis(pd.to_datetime(daily.index)).sort_index()
+
+    def customers(self):
+        """Return the distinct customers per day (DailySketches or DailyDistinct)"""
+        with self._lock:
+            return self._customers
+
+class CombinedLiveSales(_DailyTotals):
+    """The live rollups of several stores, added up day by day"""
+
+    def __init__(self, rollups):
+        self.rollups = rollups
+
+    def daily(self):
+        return reduce(lambda left, right: left.add(right, fill_value=0), (rollup.daily() for rollup in self.rollups))
+
+    def customers(self):
+        return reduce(lambda left, right: left.merge(right), (rollup.customers() for rollup in self.rollups))
+
+_live = {}
+_live_lock = threading.Lock()
+
+def get_live_sales(*data_dirs):
+    """Return the process-wide live sales rollup of one or more data directories
+    (default "data"), refreshed"""
+    data_dirs = data_dirs or ("data",)
+    with _live_lock:
+        for data_dir in data_dirs:
+            if data_dir not in _live:
+                _live[data_dir] = LiveSales(data_dir)
+    rollups = [_live[data_dir].refresh() for data_dir in data_dirs]
+    return rollups[0] if len(rollups) == 1 else CombinedLiveSales(rollups)
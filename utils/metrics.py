@@ -0,0 +1,71 @@
+import os
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# In-process instrumentation: recent timings and counters per metric and
+# label set, shared by every session. Admins see summary() in the sidebar's
+# Diagnostics expander; set DASHBOARD_METRICS_LOG=1 to also print each
+# timing as it is recorded.
+SAMPLES_PER_SERIES = 500
+LOG_TIMINGS = os.environ.get("DASHBOARD_METRICS_LOG") == "1"
+
+_lock = threading.Lock()
+_timings = defaultdict(lambda: deque(maxlen=SAMPLES_PER_SERIES))
+_counters = defaultdict(int)
+
+def _series(metric, labels):
+    return (metric, tuple(sorted(labels.items())))
+
+def record(metric, seconds, **labels):
+    """Record one timing, e.g. record("table_load", 0.12, table="sales")"""
+    with _lock:
+        _timings[_series(metric, labels)].append(seconds)
+    if LOG_TIMINGS:
+        label_text = ",".join(f"{key}={value}" for key, value in sorted(labels.items()))
+        print(f"[metrics] {metric}{{{label_text}}} {seconds * 1000:.1f}ms")
+
+def increment(metric, amount=1, **labels):
+    """Add to a counter"""
+    with _lock:
+        _counters[_series(metric, labels)] += amount
+
+@contextmanager
+def timed(metric, **labels):
+    """Record how long the block takes"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(metric, time.perf_counter() - started, **labels)
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summary():
+    """Return every series as a list of dicts (count, mean/p50/p95/max in ms, or value)"""
+    with _lock:
+        timings = {series: sorted(samples) for series, samples in _timings.items()}
+        counters = dict(_counters)
+
+    rows = []
+    for (metric, labels), samples in sorted(timings.items()):
+        rows.append({
+            "metric": metric,
+            **dict(labels),
+            "count": len(samples),
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": _percentile(samples, 0.5) * 1000,
+            "p95_ms": _percentile(samples, 0.95) * 1000,
+            "max_ms": samples[-1] * 1000,
+        })
+    for (metric, labels), value in sorted(counters.items()):
+        rows.append({"metric": metric, **dict(labels), "value": value})
+    return rows
+
+def reset():
+    """Forget every recorded timing and counter"""
+    with _lock:
+        _timings.clear()
+        _counters.clear()
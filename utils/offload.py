@@ -0,0 +1,36 @@
+import os
+from utils.data_loader import DATA_DIR, load_tables, data_version, rescope_derived, scope_filters
+from utils.jobs import JobRunner
+from utils.table_cache import read_cached_tables, read_retained_table
+
+# "process" runs heavy page aggregations in worker processes so they never
+# hold the GIL of the Streamlit process; "thread" keeps them in-process
+OFFLOAD_MODE = os.environ.get("DASHBOARD_OFFLOAD", "process")
+OFFLOAD_WORKERS = int(os.environ.get("DASHBOARD_OFFLOAD_WORKERS", "2"))
+
+def load_shared_tables(*names, data_dir=DATA_DIR, scope=()):
+    """Load tables for a heavy aggregation, parsing the CSV files at most once.
+
+    The first caller for a data version parses the tables and caches them
+    as Arrow IPC files (see utils/table_cache.py); every worker process,
+    and the same one on later jobs, maps those instead. Frames may be
+    shared: do not modify them in place. `scope` restricts the rows as in
+    load_tables().
+    """
+    versions = {name: data_version(name, data_dir=data_dir) for name in names}
+    filters = {name: scope_filters(name, scope, data_dir) for name in names}
+    frames = read_cached_tables(versions, data_dir, read=read_retained_table, filters=filters)
+    if frames is None:
+        return load_tables(*names, data_dir=data_dir, scope=scope)
+    return tuple(rescope_derived(df) if filters[name] else df for name, df in zip(names, frames))
+
+def map_tables(names, data_dirs):
+    """Map tables of every store into this process's retained cache, parsing
+    any not cached yet; warm_up() runs it in each job worker"""
+    for data_dir in data_dirs:
+        load_shared_tables(*names, data_dir=data_dir)
+
+# Process-wide runner for the heavy aggregations of the Report, Sales and
+# Performance pages; identical requests from several sessions share a job
+page_jobs = JobRunner(max_workers=OFFLOAD_WORKERS, cache_size=64, name="page-jobs",
+                      processes=OFFLOAD_MODE == "process")
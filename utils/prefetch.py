@@ -0,0 +1,140 @@
+import os
+import multiprocessing
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from utils.data_loader import DATA_DIR, data_version
+from utils.metrics import increment
+from utils.offload import page_jobs
+from utils.report_engine import REPORT_PERIODS, VIEW_TABLES, build_report, build_sales_view, build_performance_view
+from utils.report_snapshots import snapshot_report
+
+# Where users usually go next from each page, used until this process has
+# seen enough navigation of its own
+DEFAULT_NEXT_PAGES = {
+    "Dashboard": ["Sales", "Report"],
+    "Inventory": ["Purchase", "Dashboard"],
+    "Purchase": ["Inventory", "Dashboard"],
+    "Sales": ["Report", "Performance"],
+    "Performance": ["Sales", "Report"],
+    "Report": ["Sales", "Performance"],
+}
+PREFETCH_PAGES = 2
+MIN_TRANSITIONS = 20
+
+# Prefetching stops while the Streamlit process and its job worker
+# processes together are above this resident size
+PREFETCH_MEMORY_MB = int(os.environ.get("DASHBOARD_PREFETCH_MEMORY_MB", "1024"))
+
+def _report_job(today, data_dir, rows):
+    # The Report page opens on the first period; skip it when the snapshot serves it
+    period = REPORT_PERIODS[0]
+    version = data_version(*VIEW_TABLES['report'], data_dir=data_dir)
+    if data_dir == DATA_DIR and not rows and snapshot_report(period, today, version) is not None:
+        return None
+    return page_jobs.submit(("report", period, today, version, data_dir, rows),
+                            build_report, period, today, data_dir=data_dir, scope=rows)
+
+def _sales_job(today, data_dir, rows):
+    return page_jobs.submit(("sales", today, data_version(*VIEW_TABLES['sales'], data_dir=data_dir), data_dir, rows),
+                            build_sales_view, today, data_dir=data_dir, scope=rows)
+
+def _performance_job(today, data_dir, rows):
+    return page_jobs.submit(("performance", today, data_version(*VIEW_TABLES['performance'], data_dir=data_dir), data_dir, rows),
+                            build_performance_view, today, data_dir=data_dir, scope=rows)
+
+# The background job each page renders from, under the same key the page
+# submits it with for a user's store and row scope, so the page picks up
+# the prefetched (or running) job
+PAGE_JOBS = {
+    "Report": _report_job,
+    "Sales": _sales_job,
+    "Performance": _performance_job,
+}
+
+_lock = threading.Lock()
+_transitions = defaultdict(Counter)
+_plan = {"version": None, "today": None, "data_dir": DATA_DIR, "rows": (), "pages": [], "job": None}
+_worker = None
+
+def record_navigation(previous_page, page):
+    """Count a move between pages; the counts drive likely_next_pages"""
+    if previous_page and previous_page != page:
+        with _lock:
+            _transitions[previous_page][page] += 1
+
+def likely_next_pages(page, count=PREFETCH_PAGES):
+    """Return the pages most often opened after `page`"""
+    with _lock:
+        observed = _transitions[page].copy()
+    if sum(observed.values()) < MIN_TRANSITIONS:
+        return DEFAULT_NEXT_PAGES.get(page, [])[:count]
+    return [next_page for next_page, _ in observed.most_common(count)]
+
+def _resident_mb():
+    """Return the resident memory in MB of this process and its worker
+    processes (where page jobs run), or None where unknown"""
+    pages = 0
+    for pid in ["self"] + [child.pid for child in multiprocessing.active_children()]:
+        try:
+            with open(f"/proc/{pid}/statm") as statm:
+                pages += int(statm.read().split()[1])
+        except FileNotFoundError:
+            continue  # a worker that exited meanwhile
+        except (OSError, ValueError, IndexError):
+            return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def prefetch_pages(pages, today=None, data_dir=DATA_DIR, rows=()):
+    """Warm the aggregates of `pages` in the background, one job at a time.
+
+    Call it once the current page has rendered, with the user's store and
+    row scope. A newer call replaces the pages still waiting; when the data
+    version changed meanwhile, the waiting prefetch job is cancelled too,
+    unless a page has asked for the same job since (one already running
+    finishes).
+    """
+    global _worker
+    today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    version = data_version(data_dir=data_dir)
+    with _lock:
+        if version != _plan["version"] and _plan["job"] is not None:
+            if page_jobs.cancel(_plan["job"]):
+                increment("prefetch", outcome="cancelled")
+        _plan.update(version=version, today=today, data_dir=data_dir, rows=rows,
+                     pages=[page for page in pages if page in PAGE_JOBS])
+        if _worker is None and _plan["pages"]:
+            _worker = threading.Thread(target=_run, name="page-prefetch", daemon=True)
+            _worker.start()
+
+def _run():
+    """Submit the planned prefetch jobs, waiting for each before the next"""
+    global _worker
+    while True:
+        with _lock:
+            if not _plan["pages"]:
+                _plan["job"] = None
+                _worker = None
+                return
+            page = _plan["pages"].pop(0)
+            today, version, data_dir, rows = _plan["today"], _plan["version"], _plan["data_dir"], _plan["rows"]
+
+        if data_version(data_dir=data_dir) != version:
+            increment("prefetch", outcome="stale")
+            continue
+        resident = _resident_mb()
+        if resident is not None and resident > PREFETCH_MEMORY_MB:
+            increment("prefetch", outcome="over_budget")
+            continue
+
+        try:
+            job = PAGE_JOBS[page](today, data_dir, rows)
+            if job is None:
+                continue
+            increment("prefetch", page=page, outcome="cached" if job.done() else "submitted")
+            with _lock:
+                _plan["job"] = job
+            job.result()
+        except Exception:
+            # Cancelled or failed; the page reports errors when it runs the job itself
+            increment("prefetch", page=page, outcome="failed")
@@ -0,0 +1,225 @@
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+import pandas as pd
+from utils.storage import atomic_write, commit_tables, file_lock
+
+# Purchase orders created in the app are appended to this log and folded into
+# purchases.csv by compaction, so a new order never rewrites the whole table
+LOG_NAME = "purchases.log"
+# The log a compaction has rotated out and is folding into the table;
+# readers include it until the table holds its orders
+COMPACTING_NAME = LOG_NAME + ".compacting"
+TABLE_NAME = "purchases.csv"
+COMPACT_EVERY = 200  # pending orders that trigger a background compaction
+READ_RETRIES = 3
+
+def _paths(data_dir):
+    """Return the (log, lock, table) paths for a data directory"""
+    log_path = os.path.join(data_dir, LOG_NAME)
+    return log_path, log_path + ".lock", os.path.join(data_dir, TABLE_NAME)
+
+def _compacting_path(data_dir):
+    return os.path.join(data_dir, COMPACTING_NAME)
+
+class PurchaseOrderLog:
+    """Append-only purchase order log with group-committed fsync.
+
+    Appends from concurrent sessions are written under a process-wide file
+    lock; whichever caller reaches the fsync first makes every line written
+    so far durable, and the others only wait for it.
+    """
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.log_path, self.lock_path, self.table_path = _paths(data_dir)
+        self.compacting_path = _compacting_path(data_dir)
+        self._cond = threading.Condition()
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._syncing = None  # the file being fsynced, kept open until then
+        self._pending = None
+        self._compacting = False
+
+    def _open(self):
+        """(Re)open the log if it is not open or compaction replaced it"""
+        if self._file is not None:
+            try:
+                if os.fstat(self._file.fileno()).st_ino == os.stat(self.log_path).st_ino:
+                    return
+            except FileNotFoundError:
+                pass
+            # A file still being fsynced is closed by the syncer when it is done
+            if self._file is not self._syncing:
+                self._file.close()
+        self._file = open(self.log_path, "a", encoding="utf-8")
+
+    def append(self, record):
+        """Durably append one order record and return it"""
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._cond:
+            with file_lock(self.lock_path):
+                self._open()
+                self._file.write(line)
+                self._file.flush()
+            self._written += 1
+            seq = self._written
+            if self._pending is not None:
+                self._pending += 1
+        self._wait_synced(seq)
+        self._maybe_compact()
+        return record
+
+    def _wait_synced(self, seq):
+        """Block until line `seq` is on disk, running the fsync if nobody else is"""
+        with self._cond:
+            while self._synced < seq:
+                if self._syncing is not None:
+                    self._cond.wait()
+                    continue
+                # Hold the file object, not its descriptor: compaction may swap
+                # the log and _open() replace self._file while this fsync runs
+                log_file = self._syncing = self._file
+                target = self._written
+                self._cond.release()
+                try:
+                    os.fsync(log_file.fileno())
+                finally:
+                    self._cond.acquire()
+                    self._syncing = None
+                    if log_file is not self._file:
+                        log_file.close()
+                self._synced = max(self._synced, target)
+                self._cond.notify_all()
+
+    def _maybe_compact(self):
+        """Start a background compaction once enough orders are pending"""
+        with self._cond:
+            if self._pending is None:
+                self._pending = len(read_log_records(self.log_path))
+            if self._pending < COMPACT_EVERY or self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact_in_background, daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        finally:
+            with self._cond:
+                self._compacting = False
+
+    def compact(self):
+        """Fold logged orders into purchases.csv and start a fresh log.
+
+        Only the rotation holds the writer lock: the log is renamed to
+        COMPACTING_NAME and a fresh one swapped in, so appends go on while
+        the rotated orders are merged into the table and published as a new
+        snapshot. Readers include the rotated log until then. Orders already
+        present in the table (matched on order_id) are skipped, and a rotated
+        log left by an interrupted compaction is folded in first, so a
+        compaction can simply be run again.
+        """
+        with file_lock(self.log_path + ".compact.lock"):
+            with self._cond, file_lock(self.lock_path):
+                if os.path.exists(self.compacting_path):
+                    self._pending = None  # the live log is left for the next compaction
+                else:
+                    if os.path.exists(self.log_path):
+                        os.replace(self.log_path, self.compacting_path)
+                    atomic_write(self.log_path, lambda f: None)
+                    self._pending = 0
+
+            records = read_log_records(self.compacting_path)
+            if records:
+                table = pd.read_csv(self.table_path, dtype=str, keep_default_na=False)
+                if "order_id" not in table.columns:
+                    table["order_id"] = ""
+                known = set(table["order_id"])
+                new_rows = pd.DataFrame([r for r in records if r["order_id"] not in known])
+                if not new_rows.empty:
+                    merged = pd.concat([table, new_rows.astype(str)], ignore_index=True)
+                    commit_tables(self.data_dir, {"purchases": lambda f: merged.to_csv(f, index=False)})
+            try:
+                os.remove(self.compacting_path)
+            except FileNotFoundError:
+                pass
+        return len(records)
+
+def read_log_records(log_path):
+    """Read every complete record from a log; a half-written last line is ignored"""
+    try:
+        with open(log_path, "r", encoding="utf-8") as log_file:
+            data = log_file.read()
+    except FileNotFoundError:
+        return []
+    lines = data.split("\n")
+    # Anything after the last newline is an append still in progress
+    return [json.loads(line) for line in lines[:-1] if line]
+
+def _file_id(path, with_mtime=True):
+    """Identify a file version by inode (and mtime); None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns) if with_mtime else stat.st_ino
+
+def read_purchases_with_log(data_dir="data", **read_csv_kwargs):
+    """Read purchases.csv together with orders still waiting in the log, or
+    in a rotated log that a compaction is folding in.
+
+    Lock-free: if a compaction swaps any of the files mid-read, the read is
+    retried. Appends only grow the log, so the logs are identified by inode alone.
+    """
+    log_path, _, table_path = _paths(data_dir)
+    compacting_path = _compacting_path(data_dir)
+
+    def file_ids():
+        return (_file_id(table_path), _file_id(compacting_path, with_mtime=False),
+                _file_id(log_path, with_mtime=False))
+
+    for _ in range(READ_RETRIES):
+        before = file_ids()
+        table = pd.read_csv(table_path, **read_csv_kwargs)
+        records = read_log_records(compacting_path) + read_log_records(log_path)
+        if file_ids() == before:
+            break
+
+    if records and "order_id" in table.columns:
+        known = set(table["order_id"].dropna())
+        records = [r for r in records if r["order_id"] not in known]
+    if not records:
+        return table
+    pending = pd.DataFrame(records)
+    usecols = read_csv_kwargs.get("usecols")
+    if callable(usecols):
+        pending = pending[[c for c in pending.columns if usecols(c)]]
+    return pd.concat([table, pending], ignore_index=True)
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+def get_purchase_log(data_dir="data"):
+    """Return the process-wide log writer for a data directory"""
+    with _logs_lock:
+        if data_dir not in _logs:
+            _logs[data_dir] = PurchaseOrderLog(data_dir)
+        return _logs[data_dir]
+
+def create_purchase_order(product_id, quantity, unit_cost, supplier_id, status="Pending", data_dir="data"):
+    """Record a new purchase order and return it"""
+    record = {
+        "order_id": f"PO-{uuid.uuid4().hex[:12]}",
+        "date": datetime.now().strftime('%Y-%m-%d'),
+        "product_id": int(product_id),
+        "quantity": int(quantity),
+        "unit_cost": float(unit_cost),
+        "total_cost": float(unit_cost) * int(quantity),
+        "supplier_id": int(supplier_id),
+        "status": status,
+    }
+    return get_purchase_log(data_dir).append(record)
@@ -0,0 +1,408 @@
+from datetime import datetime, timedelta
+import pandas as pd
+from utils.data_loader import DATA_DIR, DERIVED_COLUMNS, load_tables, attach_dimensions, aggregate_by, calendar_totals, label_counts, month_label
+from utils.offload import load_shared_tables
+from utils.shards import TopRows, merge_shards, submit_shards
+from utils.sketches import distinct_by_day
+
+REPORT_PERIODS = ["Current Month", "Previous Month", "Last 3 Months", "Last 6 Months", "Year to Date", "Last Year", "All Time"]
+# Periods long enough for the monthly revenue / expense comparison chart
+MONTHLY_COMPARISON_PERIODS = ["Last 6 Months", "Year to Date", "Last Year", "All Time"]
+
+# Tables each view is computed from; key cached results by their
+# data_version(*VIEW_TABLES[view]) so other tables' changes keep them valid
+VIEW_TABLES = {
+    "report": ('sales', 'purchases', 'expenses'),
+    "dashboard": ('sales', 'inventory'),
+    "sales": ('sales',),
+    "performance": ('performance', 'sales', 'expenses'),
+}
+
+def period_window(report_period, today, first_date):
+    """Return (start_date, end_date, title) of a report period; end_date None means open"""
+    current_month_start = today.replace(day=1)
+    end_date = None
+
+    if report_period == "Current Month":
+        start_date = current_month_start
+        title_period = f"{today.strftime('%B %Y')}"
+    elif report_period == "Previous Month":
+        start_date = (current_month_start - timedelta(days=1)).replace(day=1)
+        end_date = current_month_start - timedelta(days=1)
+        title_period = f"{start_date.strftime('%B %Y')}"
+    elif report_period == "Last 3 Months":
+        start_date = (current_month_start - timedelta(days=90)).replace(day=1)
+        title_period = f"{start_date.strftime('%B %Y')} - {today.strftime('%B %Y')}"
+    elif report_period == "Last 6 Months":
+        start_date = (current_month_start - timedelta(days=180)).replace(day=1)
+        title_period = f"{start_date.strftime('%B %Y')} - {today.strftime('%B %Y')}"
+    elif report_period == "Year to Date":
+        start_date = today.replace(month=1, day=1)
+        title_period = f"{today.year} YTD"
+    elif report_period == "Last Year":
+        start_date = today.replace(year=today.year-1, month=1, day=1)
+        end_date = today.replace(year=today.year-1, month=12, day=31)
+        title_period = f"FY {today.year-1}"
+    else:  # All Time
+        start_date = first_date
+        title_period = f"All Time ({start_date.strftime('%b %Y')} - {today.strftime('%b %Y')})"
+
+    return start_date, end_date, title_period
+
+def filter_period(df, start_date, end_date=None):
+    """Return the rows of df dated within a report window"""
+    mask = df['date'] >= start_date
+    if end_date is not None:
+        mask &= df['date'] <= end_date
+    return df[mask]
+
+def income_statement(sales, expenses):
+    """Return the income statement of a period as Category / Amount / Percentage"""
+    revenue = sales['total_price'].sum()
+    gross_profit = sales['profit'].sum()
+    total_expenses = expenses['amount'].sum()
+    amounts = [revenue, revenue - gross_profit, gross_profit, total_expenses, gross_profit - total_expenses]
+    return pd.DataFrame({
+        "Category": ["Revenue", "Cost of Goods Sold", "Gross Profit", "Operating Expenses", "Net Profit"],
+        "Amount": amounts,
+        "Percentage": [(amount / revenue * 100) if revenue > 0 else 0 for amount in amounts],
+    })
+
+def product_performance(sales, data_dir=DATA_DIR):
+    """Return units, revenue, profit and margin per product, best sellers first"""
+    performance = sales.groupby('product_id').agg({
+        'quantity': 'sum',
+        'total_price': 'sum',
+        'profit': 'sum'
+    }).reset_index()
+    performance = attach_dimensions(performance, ['product_name', 'category'], data_dir=data_dir)
+    performance['margin'] = (performance['profit'] / performance['total_price'] * 100).round(1)
+    return performance.sort_values('total_price', ascending=False)
+
+def _no_progress(fraction, message):
+    pass
+
+def _today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+def build_report(report_period, today=None, tables=None, progress=_no_progress, data_dir=DATA_DIR, scope=()):
+    """Compute everything the Report page shows for one period.
+
+    `tables` is an optional (sales, purchases, expenses) tuple; by default
+    they are loaded through load_shared_tables() from the store in
+    `data_dir`, limited to the row `scope`. `progress(fraction,
+    message)` is called between steps. The result holds only small
+    aggregates, so it can be cached, stored or sent between processes.
+    """
+    today = today or _today()
+
+    progress(0.05, "Loading tables")
+    sales_df, purchases_df, expenses_df = tables or load_shared_tables('sales', 'purchases', 'expenses', data_dir=data_dir, scope=scope)
+
+    progress(0.3, "Filtering the period")
+    start_date, end_date, title_period = period_window(report_period, today, sales_df['date'].min())
+    filtered_sales = filter_period(sales_df, start_date, end_date)
+    filtered_expenses = filter_period(expenses_df, start_date, end_date)
+
+    progress(0.4, "Calculating KPIs")
+    total_revenue = filtered_sales['total_price'].sum()
+    total_profit = filtered_sales['profit'].sum()
+    total_expenses = filtered_expenses['amount'].sum()
+    kpis = {
+        'total_revenue': total_revenue,
+        'total_profit': total_profit,
+        'net_profit': total_profit - total_expenses,
+        'profit_margin': (total_profit / total_revenue * 100) if total_revenue > 0 else 0,
+        'total_expenses': total_expenses,
+        'total_units': filtered_sales['quantity'].sum(),
+    }
+
+    progress(0.5, "Revenue over time")
+    # Group by month if the period is longer than 60 days
+    if (today - start_date).days > 60:
+        revenue_over_time = calendar_totals(filtered_sales, 'month', ['total_price', 'profit'])
+        revenue_x, revenue_title = 'month', 'Monthly Revenue & Profit'
+    else:
+        revenue_over_time = calendar_totals(filtered_sales, 'date', ['total_price', 'profit'])
+        revenue_x, revenue_title = 'date', 'Daily Revenue & Profit'
+
+    progress(0.6, "Expenses and categories")
+    expenses_by_category = filtered_expenses.groupby('category')['amount'].sum().reset_index()
+    expenses_by_category = expenses_by_category.sort_values('amount', ascending=False)
+
+    category_performance = aggregate_by(filtered_sales, 'category', ['total_price', 'profit', 'quantity'], data_dir=data_dir)
+    category_performance['margin'] = (category_performance['profit'] / category_performance['total_price'] * 100)
+    category_performance = category_performance.sort_values('total_price', ascending=False)
+
+    progress(0.75, "Monthly financials")
+    monthly_financials = None
+    product_margins = None
+    if report_period in MONTHLY_COMPARISON_PERIODS:
+        monthly_revenue = calendar_totals(filtered_sales, 'month', ['total_price'])
+        monthly_expenses = calendar_totals(filtered_expenses, 'month', ['amount'])
+
+        monthly_financials = pd.merge(monthly_revenue, monthly_expenses, on='month', how='outer').fillna(0)
+        monthly_financials.columns = ['month', 'revenue', 'expenses']
+        monthly_financials['profit'] = monthly_financials['revenue'] - monthly_financials['expenses']
+    else:
+        # For shorter periods, show profit margins by product
+        product_margins = filtered_sales.groupby('product_id').agg({
+            'total_price': 'sum',
+            'profit': 'sum'
+        }).reset_index()
+        product_margins['margin'] = (product_margins['profit'] / product_margins['total_price'] * 100)
+        product_margins = product_margins.sort_values('margin', ascending=False).head(10)
+        product_margins = attach_dimensions(product_margins, ['product_name'], data_dir=data_dir)
+
+    progress(0.9, "Income statement and products")
+    report = {
+        'period': report_period,
+        'title_period': title_period,
+        'start_date': start_date,
+        'end_date': end_date,
+        'kpis': kpis,
+        'revenue_over_time': revenue_over_time,
+        'revenue_x': revenue_x,
+        'revenue_title': revenue_title,
+        'expenses_by_category': expenses_by_category,
+        'category_performance': category_performance,
+        'monthly_financials': monthly_financials,
+        'product_margins': product_margins,
+        'income_statement': income_statement(filtered_sales, filtered_expenses),
+        'product_performance': product_performance(filtered_sales, data_dir),
+    }
+    progress(1.0, "Done")
+    return report
+
+def period_transactions(start_date, end_date=None, data_dir=DATA_DIR, scope=()):
+    """Return the sales, purchases and expenses of a report window, without derived columns"""
+    names = ('sales', 'purchases', 'expenses')
+    frames = load_tables(*names, data_dir=data_dir, scope=scope)
+    return {
+        name.title(): filter_period(df, start_date, end_date).drop(columns=DERIVED_COLUMNS.get(name, []))
+        for name, df in zip(names, frames)
+    }
+
+def dashboard_partial(data_dir, today, scope=(), progress=_no_progress):
+    """Compute one store's share of the Dashboard: sums, counts and sets that
+    merge_partials() combines across stores (see utils/shards.py)"""
+    progress(0.05, "Loading sales")
+    sales_df, inventory_df = load_shared_tables('sales', 'inventory', data_dir=data_dir, scope=scope)
+    progress(0.5, "Aggregating")
+
+    months = sales_df.groupby('month_key')['total_price'].agg(['sum', 'count'])
+    months.index = pd.PeriodIndex(month_label(months.index), freq='M')
+    # Distinct customers do not add up across stores: keep mergeable
+    # per-day distinct customers of the two months the KPIs may compare
+    last_months = sales_df[sales_df['month_key'] >= sales_df['month_key'].max() - 1]
+    recent = sales_df[sales_df['date'] >= today - timedelta(days=30)]
+
+    return {
+        'months': months,
+        'customers': distinct_by_day(last_months['date'], last_months['customer_id']),
+        'daily': recent.groupby('date')['total_price'].sum(),
+        'payments': label_counts(sales_df['payment_method']),
+        'products': sales_df.groupby('product_id')[['total_price', 'quantity']].sum(),
+        'latest': TopRows(sales_df[['date', 'product_id', 'total_price']], 'date', 4),
+        'inventory': {
+            'low_stock': int((inventory_df['current_stock'] <= inventory_df['reorder_level']).sum()),
+            'out_of_stock': int((inventory_df['current_stock'] == 0).sum()),
+            'value': inventory_df['total_value'].sum(),
+            'stock': inventory_df['current_stock'].sum(),
+            'items': len(inventory_df),
+        },
+    }
+
+def _month_stats(partial, month):
+    totals = partial['months']
+    sales, orders = (totals.loc[month, 'sum'], int(totals.loc[month, 'count'])) if month in totals.index else (0, 0)
+    return {
+        'sales': sales,
+        'orders': orders,
+        'customers': partial['customers'].count(month.start_time, (month + 1).start_time),
+        'customers_exact': partial['customers'].exact,
+        'avg_order_value': sales / orders if orders else float('nan'),
+    }
+
+def finish_dashboard_view(partial, data_dir=DATA_DIR):
+    """Compute the Dashboard's sales KPIs and charts from the merged partials of
+    its stores; product names and categories come from `data_dir`"""
+    totals = partial['months']
+    current_month = totals.index.max()
+
+    all_months = pd.period_range(totals.index.min(), current_month, freq='M')
+    monthly = totals['sum'].reindex(all_months, fill_value=0).tail(12)
+    monthly_sales = pd.DataFrame({'date': monthly.index.end_time.normalize(), 'total_price': monthly.to_numpy()})
+    monthly_sales['month'] = monthly_sales['date'].dt.strftime('%b')
+
+    daily_sales = partial['daily'].sort_index().resample('D').sum().reset_index()
+
+    payment_counts = partial['payments'].sort_values(ascending=False).astype(int).rename_axis('method').reset_index(name='count')
+    payment_counts['percentage'] = (payment_counts['count'] / payment_counts['count'].sum() * 100).round(1)
+
+    products = partial['products']
+    category_sales = aggregate_by(products['total_price'].reset_index(), 'category', ['total_price'], data_dir=data_dir)
+    top_products = products['quantity'].astype(int).nlargest(5).reset_index()
+
+    inventory = partial['inventory']
+    return {
+        'current_month': _month_stats(partial, current_month),
+        'previous_month': _month_stats(partial, current_month - 1),
+        'monthly_sales': monthly_sales,
+        'daily_sales': daily_sales.tail(15),  # Last 15 days for better visibility
+        'payment_counts': payment_counts,
+        'category_sales': category_sales.sort_values('total_price', ascending=False),
+        'top_products': attach_dimensions(top_products, ['product_name'], data_dir=data_dir),
+        'latest_sales': attach_dimensions(partial['latest'].frame, ['product_name'], data_dir=data_dir),
+        'inventory': {
+            'low_stock_count': inventory['low_stock'],
+            'out_of_stock': inventory['out_of_stock'],
+            'total_value': inventory['value'],
+            'avg_level': inventory['stock'] / inventory['items'] if inventory['items'] else float('nan'),
+        },
+    }
+
+def build_dashboard_view(data_dirs, today=None, scope=()):
+    """Compute the Dashboard over one or more stores: a partial per store on
+    the page job pool, merged, then finished here"""
+    today = today or _today()
+    jobs = submit_shards("dashboard", VIEW_TABLES['dashboard'], data_dirs, dashboard_partial, today, scope)
+    return finish_dashboard_view(merge_shards(jobs), data_dirs[0])
+
+# Chart periods of the Sales and Performance pages (days back, None = all)
+SALES_PERIODS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90, "Last 12 Months": 365, "All Time": None}
+PERFORMANCE_PERIODS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90}
+
+def _sales_stats(daily):
+    """Totals the Sales page compares month over month, summed from per-day totals"""
+    revenue, orders = daily['total_price'].sum(), int(daily['new_order'].sum())
+    return {
+        'revenue': revenue,
+        'profit': daily['profit'].sum(),
+        'orders': orders,
+        'avg_order_value': revenue / orders if orders else float('nan'),
+        'units': daily['quantity'].sum(),
+    }
+
+def build_sales_view(today=None, tables=None, progress=_no_progress, data_dir=DATA_DIR, scope=()):
+    """Compute the Sales page: month-over-month totals and every chart period"""
+    today = today or _today()
+    progress(0.05, "Loading sales")
+    sales_df, = tables or load_shared_tables('sales', data_dir=data_dir, scope=scope)
+
+    # Per-day totals; an order's rows share a day, so new_order sums to its orders
+    daily = sales_df.groupby('date')[['total_price', 'profit', 'quantity', 'new_order']].sum()
+    current_month_start = today.replace(day=1)
+    previous_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
+    current_month_days = daily[daily.index >= current_month_start]
+    previous_month_days = daily[(daily.index >= previous_month_start) & (daily.index < current_month_start)]
+
+    periods = {}
+    for step, (period, days) in enumerate(SALES_PERIODS.items()):
+        progress(0.2 + 0.6 * step / len(SALES_PERIODS), f"Aggregating {period.lower()}")
+        filter_date = today - timedelta(days=days) if days else sales_df['date'].min()
+        filtered_sales = sales_df[sales_df['date'] >= filter_date]
+
+        if days is not None and days <= 30:
+            # For shorter periods, show daily trends
+            trend = calendar_totals(filtered_sales, 'date', ['total_price'])
+        else:
+            # For longer periods, show monthly trends
+            trend = calendar_totals(filtered_sales, 'month', ['total_price'])
+
+        category_sales = aggregate_by(filtered_sales, 'category', ['total_price', 'profit'], data_dir=data_dir)
+        payment_counts = label_counts(filtered_sales['payment_method']).reset_index()
+        payment_counts.columns = ['payment_method', 'count']
+        product_sales = filtered_sales.groupby('product_id')['total_price'].sum().reset_index()
+
+        periods[period] = {
+            'trend': trend,
+            'category_sales': category_sales.sort_values('total_price', ascending=False),
+            'payment_counts': payment_counts,
+            'top_products': attach_dimensions(product_sales.sort_values('total_price', ascending=False).head(10), ['product_name'], data_dir=data_dir),
+        }
+
+    progress(0.85, "Sales records")
+    product_summary = sales_df.groupby('product_id')[['quantity', 'total_price', 'profit']].sum().reset_index()
+    product_summary = attach_dimensions(product_summary, ['product_name', 'category'], data_dir=data_dir)
+    product_summary['profit_margin'] = (product_summary['profit'] / product_summary['total_price'] * 100).round(1)
+
+    view = {
+        'current_month': _sales_stats(current_month_days),
+        'previous_month': _sales_stats(previous_month_days),
+        'periods': periods,
+        'recent_sales': attach_dimensions(sales_df.sort_values('date', ascending=False).head(20), ['product_name', 'category'], data_dir=data_dir),
+        'product_summary': product_summary.sort_values('total_price', ascending=False),
+    }
+    progress(1.0, "Done")
+    return view
+
+def _performance_stats(perf, sales, expenses):
+    """Totals the Performance page compares between 30-day windows"""
+    return {
+        'sales': sales['total_price'].sum(),
+        'profit': sales['profit'].sum(),
+        'satisfaction': perf['customer_satisfaction'].mean(),
+        'productivity': perf['productivity_score'].mean(),
+        'attendance': perf['attendance'].mean(),
+        'expenses': expenses['amount'].sum(),
+    }
+
+def build_performance_view(today=None, tables=None, progress=_no_progress, data_dir=DATA_DIR, scope=()):
+    """Compute the Performance page: 30-day KPIs and every chart period"""
+    today = today or _today()
+    progress(0.05, "Loading performance, sales and expenses")
+    performance_df, sales_df, expenses_df = tables or load_shared_tables('performance', 'sales', 'expenses',
+                                                                         data_dir=data_dir, scope=scope)
+
+    last_month_date = today - timedelta(days=30)
+    last_2month_date = today - timedelta(days=60)
+    last_30_days = _performance_stats(
+        performance_df[performance_df['date'] >= last_month_date],
+        sales_df[sales_df['date'] >= last_month_date],
+        expenses_df[expenses_df['date'] >= last_month_date],
+    )
+    previous_30_days = _performance_stats(
+        performance_df[(performance_df['date'] >= last_2month_date) & (performance_df['date'] < last_month_date)],
+        sales_df[(sales_df['date'] >= last_2month_date) & (sales_df['date'] < last_month_date)],
+        expenses_df[(expenses_df['date'] >= last_2month_date) & (expenses_df['date'] < last_month_date)],
+    )
+
+    periods = {}
+    for step, (period, days) in enumerate(PERFORMANCE_PERIODS.items()):
+        progress(0.3 + 0.6 * step / len(PERFORMANCE_PERIODS), f"Aggregating {period.lower()}")
+        filtered_perf = performance_df[performance_df['date'] >= today - timedelta(days=days)]
+
+        employee_perf = filtered_perf.groupby('employee_id')[['sales_value', 'customer_satisfaction', 'productivity_score']].mean().reset_index()
+
+        sales_by_employee = filtered_perf.groupby('employee_id')['sales_value'].sum().reset_index()
+        sales_by_employee = attach_dimensions(sales_by_employee, ['employee_name'], data_dir=data_dir)
+
+        attendance_by_employee = filtered_perf.groupby('employee_id')['attendance'].mean().reset_index()
+        attendance_by_employee = attach_dimensions(attendance_by_employee, ['employee_name'], data_dir=data_dir)
+        attendance_by_employee['attendance_rate'] = attendance_by_employee['attendance'] * 100
+
+        # Per-employee totals; the page filters them by role
+        employee_metrics = filtered_perf.groupby('employee_id').agg({
+            'sales_count': 'sum',
+            'sales_value': 'sum',
+            'customer_satisfaction': 'mean',
+            'attendance': 'mean',
+            'productivity_score': 'mean'
+        }).reset_index()
+        employee_metrics = attach_dimensions(employee_metrics, ['employee_name', 'role'], data_dir=data_dir)
+        employee_metrics['attendance_rate'] = (employee_metrics['attendance'] * 100).round(1)
+        employee_metrics['customer_satisfaction'] = employee_metrics['customer_satisfaction'].round(1)
+        employee_metrics['productivity_score'] = employee_metrics['productivity_score'].round(1)
+
+        periods[period] = {
+            'employee_perf': attach_dimensions(employee_perf, ['employee_name', 'role'], data_dir=data_dir),
+            'satisfaction_trend': calendar_totals(filtered_perf, 'date', ['customer_satisfaction'], 'mean'),
+            'sales_by_employee': sales_by_employee.sort_values('sales_value', ascending=False),
+            'attendance_by_employee': attendance_by_employee.sort_values('attendance_rate'),
+            'employee_metrics': employee_metrics,
+        }
+
+    view = {'last_30_days': last_30_days, 'previous_30_days': previous_30_days, 'periods': periods}
+    progress(1.0, "Done")
+    return view
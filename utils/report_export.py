@@ -0,0 +1,205 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+from utils.data_loader import DATA_DIR, attach_dimensions
+from utils.report_engine import period_transactions
+
+try:
+    import xlsxwriter
+except ImportError:  # Excel export is optional
+    xlsxwriter = None
+
+# label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Excel (.xlsx)": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (.zip)": (".zip", "application/zip"),
+    "PDF": (".pdf", "application/pdf"),
+}
+CHUNK_ROWS = 50_000  # rows converted and written at a time
+EXCEL_MAX_ROWS = 1_048_575  # one row of each sheet is the header
+PDF_ROWS_PER_PAGE = 30
+MONEY_COLUMNS = {"Amount", "total_price", "total_cost", "profit", "amount", "unit_price", "unit_cost"}
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "inventory-report-exports")
+# Export files older than this are deleted when the next export starts; a
+# session that regenerates its report deletes its previous file at once
+EXPORT_MAX_AGE = 6 * 3600
+
+# Exports run here so a large period never blocks the page
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-export")
+
+def _chunks(df, with_names=True, data_dir=DATA_DIR):
+    """Yield a table in row chunks, joining the store's product names onto each chunk only"""
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        if with_names and 'product_id' in chunk.columns:
+            chunk = attach_dimensions(chunk, ['product_name'], data_dir=data_dir)
+        yield chunk
+
+def _sheets(income_df, product_df, transactions):
+    """Return every table of the report as (name, frame, is_transactions)"""
+    sheets = [("Income Statement", income_df, False), ("Product Performance", product_df, False)]
+    sheets += [(name, df, True) for name, df in transactions.items()]
+    return sheets
+
+def write_csv_zip(path, title_period, income_df, product_df, transactions, data_dir=DATA_DIR):
+    """Write one CSV per report table into a zip, streaming rows in chunks"""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, df, is_transactions in _sheets(income_df, product_df, transactions):
+            file_name = name.lower().replace(" ", "_") + ".csv"
+            with archive.open(file_name, "w") as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as out:
+                    header = True
+                    for chunk in _chunks(df, with_names=is_transactions, data_dir=data_dir):
+                        chunk.to_csv(out, index=False, header=header)
+                        header = False
+                    if header:  # empty table: still write the column names
+                        df.head(0).to_csv(out, index=False)
+
+def write_excel(path, title_period, income_df, product_df, transactions, data_dir=DATA_DIR):
+    """Write the report workbook in constant-memory mode, one sheet per table;
+    return the names of the sheets cut off at EXCEL_MAX_ROWS"""
+    if xlsxwriter is None:
+        raise RuntimeError("Excel export needs the xlsxwriter package (pip install xlsxwriter)")
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    money = workbook.add_format({"num_format": "$#,##0.00"})
+    bold = workbook.add_format({"bold": True})
+    truncated = []
+    try:
+        for name, df, is_transactions in _sheets(income_df, product_df, transactions):
+            sheet = workbook.add_worksheet(name[:31])
+            row = 0
+            columns = None
+            for chunk in _chunks(df, with_names=is_transactions, data_dir=data_dir):
+                if columns is None:
+                    columns = list(chunk.columns)
+                    sheet.write_row(0, 0, columns, bold)
+                    row = 1
+                # constant_memory flushes each row once the next one starts,
+                # so rows must be written strictly in order
+                for values in chunk.itertuples(index=False):
+                    if row > EXCEL_MAX_ROWS:
+                        break
+                    for col, value in enumerate(values):
+                        if isinstance(value, pd.Timestamp):
+                            sheet.write(row, col, value.strftime('%Y-%m-%d'))
+                        elif pd.isna(value):
+                            sheet.write_blank(row, col, None)
+                        elif columns[col] in MONEY_COLUMNS:
+                            sheet.write_number(row, col, value, money)
+                        else:
+                            sheet.write(row, col, value)
+                    row += 1
+            if columns is None:
+                sheet.write_row(0, 0, list(df.columns), bold)
+            elif row > EXCEL_MAX_ROWS:
+                truncated.append(name)
+    finally:
+        workbook.close()
+    return truncated
+
+def _table_page(pdf, title, df, columns, formats):
+    """Add pages showing a table, PDF_ROWS_PER_PAGE rows per page"""
+    for start in range(0, max(len(df), 1), PDF_ROWS_PER_PAGE):
+        page = df.iloc[start:start + PDF_ROWS_PER_PAGE]
+        cells = [[formats.get(column, str)(value) for column, value in zip(columns, row)]
+                 for row in page[columns].itertuples(index=False)]
+        # Figure objects rather than pyplot: exports run on worker threads
+        fig = Figure(figsize=(11.69, 8.27))  # A4 landscape
+        ax = fig.subplots()
+        ax.axis("off")
+        ax.set_title(title if start == 0 else f"{title} (continued)", loc="left", fontsize=14)
+        if cells:
+            table = ax.table(cellText=cells, colLabels=columns, loc="upper center", cellLoc="left")
+            table.auto_set_font_size(False)
+            table.set_fontsize(8)
+        pdf.savefig(fig)
+
+def write_pdf(path, title_period, income_df, product_df, transactions, data_dir=DATA_DIR):
+    """Write the report as a PDF: summary, charts and the product table
+    (already labelled, so `data_dir` is not read)"""
+    money = lambda value: f"${value:,.2f}"
+    with PdfPages(path) as pdf:
+        # Summary page: income statement and transaction counts
+        fig = Figure(figsize=(11.69, 8.27))
+        ax_table, ax_chart = fig.subplots(1, 2)
+        fig.suptitle(f"Business Report - {title_period}", fontsize=16)
+        ax_table.axis("off")
+        ax_table.table(
+            cellText=[[row.Category, money(row.Amount), f"{row.Percentage:.1f}%"]
+                      for row in income_df.itertuples(index=False)],
+            colLabels=["Category", "Amount", "% of Revenue"],
+            loc="upper center",
+            cellLoc="left",
+        )
+        counts = ", ".join(f"{len(df):,} {name.lower()}" for name, df in transactions.items())
+        ax_table.text(0, 0.35, f"Transactions in period: {counts}", fontsize=9)
+
+        top = product_df.head(10).iloc[::-1]
+        ax_chart.barh(top['product_name'].astype(str), top['total_price'], color='#1E3A8A')
+        ax_chart.set_title("Top 10 Products by Revenue")
+        ax_chart.tick_params(axis='y', labelsize=7)
+        fig.tight_layout()
+        pdf.savefig(fig)
+
+        _table_page(
+            pdf, "Product Performance", product_df,
+            ['product_name', 'category', 'quantity', 'total_price', 'profit', 'margin'],
+            {'total_price': money, 'profit': money, 'margin': lambda value: f"{value:.1f}%"},
+        )
+
+WRITERS = {".xlsx": write_excel, ".zip": write_csv_zip, ".pdf": write_pdf}
+
+def sweep_exports(max_age=EXPORT_MAX_AGE):
+    """Delete the export files older than `max_age` seconds, left by ended sessions"""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(EXPORT_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+def export_report(export_format, report, data_dir=DATA_DIR, scope=()):
+    """Write a report export to a temp file.
+
+    Returns {'path': the file, 'truncated': names of the tables cut off to
+    fit the format (Excel sheets beyond EXCEL_MAX_ROWS)}. `report` is a
+    build_report() result; the period's transactions are loaded here, on
+    the worker, rather than by the page, from the same store and row scope
+    as the report.
+    """
+    extension, _ = EXPORT_FORMATS[export_format]
+    transactions = period_transactions(report['start_date'], report['end_date'], data_dir, scope)
+    sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    handle, path = tempfile.mkstemp(suffix=extension, dir=EXPORT_DIR)
+    os.close(handle)
+    try:
+        truncated = WRITERS[extension](path, report['title_period'], report['income_statement'],
+                                       report['product_performance'], transactions, data_dir)
+    except Exception:
+        os.remove(path)
+        raise
+    return {'path': path, 'truncated': truncated or []}
+
+def submit_export(*args):
+    """Run export_report in the background and return its Future"""
+    return _executor.submit(export_report, *args)
+
+def discard_export(path):
+    """Delete an export file that is no longer offered for download"""
+    try:
+        os.remove(path)
+    except (FileNotFoundError, TypeError):
+        pass
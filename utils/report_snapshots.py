@@ -0,0 +1,81 @@
+import os
+import gzip
+import pickle
+from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from utils.data_loader import DATA_DIR, load_tables, data_version
+from utils.report_engine import REPORT_PERIODS, VIEW_TABLES, build_report, period_window
+from utils.storage import atomic_write, file_signature
+
+# Every standard period precomputed by precompute_reports.py, in one file
+SNAPSHOT_PATH = os.path.join(DATA_DIR, "report_snapshots.pkl.gz")
+
+def _today():
+    return datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+def precompute_reports(periods=REPORT_PERIODS, workers=4, today=None):
+    """Compute the reports of several periods in parallel and store them.
+
+    All periods are computed from one snapshot of the tables, loaded once
+    and shared by the workers. Periods not recomputed keep their stored
+    entry. Returns the stored snapshot.
+    """
+    today = today or _today()
+    version = data_version(*VIEW_TABLES['report'])
+    tables = load_tables('sales', 'purchases', 'expenses')
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {period: executor.submit(build_report, period, today, tables) for period in periods}
+        computed = {period: future.result() for period, future in futures.items()}
+
+    previous = load_snapshot()
+    snapshot = {
+        'generated_at': datetime.now(),
+        'reports': dict(previous['reports']) if previous else {},
+    }
+    for period, report in computed.items():
+        snapshot['reports'][period] = {'today': today, 'data_version': version, 'report': report}
+
+    payload = gzip.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+    atomic_write(SNAPSHOT_PATH, lambda f: f.write(payload), binary=True)
+    return snapshot
+
+@lru_cache(maxsize=1)
+def _read_snapshot(signature):
+    """Load the snapshot file; cached until the file is replaced"""
+    with open(SNAPSHOT_PATH, "rb") as snapshot_file:
+        return pickle.loads(gzip.decompress(snapshot_file.read()))
+
+def load_snapshot():
+    """Return the stored snapshot, or None if precompute_reports has not run"""
+    signature = file_signature(SNAPSHOT_PATH)
+    if signature is None:
+        return None
+    try:
+        return _read_snapshot(tuple(signature))
+    except (OSError, EOFError, pickle.UnpicklingError) as e:
+        print(f"Ignoring unreadable report snapshot: {e}")
+        return None
+
+def snapshot_report(report_period, today, version):
+    """Return the precomputed report of a period if it is still valid, else None.
+
+    A period that ended before today only needs the same window as when it
+    was stored; a period still running is valid only while the data has not
+    changed since it was computed.
+    """
+    snapshot = load_snapshot()
+    if snapshot is None or report_period not in snapshot['reports']:
+        return None
+    entry = snapshot['reports'][report_period]
+    report = entry['report']
+
+    start_date, end_date, _ = period_window(report_period, today, report['start_date'])
+    if (report['start_date'], report['end_date']) != (start_date, end_date):
+        return None
+    if end_date is not None and end_date < today:
+        return report
+    if entry['today'] == today and entry['data_version'] == version:
+        return report
+    return None
@@ -0,0 +1,44 @@
+from utils.stores import ALL_STORES, STORES, store_dirs, store_names
+
+# The data each role may see, by default. "store" limits a user to one
+# store's data directory; any other key is a row scope on a dimension
+# attribute (see SCOPE_COLUMNS in utils/data_loader.py), e.g.
+# {"category": "Electronics"} or {"department": "Sales"}. An empty scope
+# sees every store and every row. A user's own "scope" entry (see
+# components/auth.py) is applied on top of their role's.
+ROLE_SCOPES = {
+    "Admin": {},
+    "Manager": {},
+    "Store Manager": {"store": store_names()[0]},
+    "Category Manager": {"store": store_names()[0], "category": "Electronics"},
+}
+
+def user_scope(role, overrides=None):
+    """Return the scope of a signed-in user"""
+    scope = {**ROLE_SCOPES[role], **(overrides or {})}
+    if scope.get("store", ALL_STORES) not in (ALL_STORES, *STORES):
+        raise ValueError(f"Unknown store '{scope['store']}'")
+    return scope
+
+def scope_stores(scope):
+    """Return the stores a scope may see"""
+    store = scope.get("store")
+    return [store] if store else store_names()
+
+def scope_dirs(scope):
+    """Return the data directories a scope may see"""
+    return store_dirs(scope.get("store", ALL_STORES))
+
+def scope_data_dir(scope):
+    """Return the data directory of the single-store pages: the scope's store, or the first"""
+    return scope_dirs(scope)[0]
+
+def row_scope(scope):
+    """Return the row scope the loader takes: sorted (attribute, value) pairs"""
+    return tuple(sorted((key, value) for key, value in scope.items() if key != "store"))
+
+def scope_label(scope):
+    """Describe a scope for the sidebar"""
+    if not scope:
+        return "Full"
+    return ", ".join(f"{key.title()}: {value}" for key, value in scope.items())
@@ -0,0 +1,57 @@
+from functools import reduce
+import pandas as pd
+from utils.data_loader import data_version
+from utils.metrics import timed
+from utils.offload import page_jobs
+
+class TopRows:
+    """The `n` rows of a frame with the largest `column`, mergeable across shards"""
+
+    def __init__(self, frame, column, n):
+        self.column = column
+        self.n = n
+        self.frame = frame.sort_values(column, ascending=False).head(n)
+
+    def merge(self, other):
+        return TopRows(pd.concat([self.frame, other.frame], ignore_index=True), self.column, self.n)
+
+def merge_partials(left, right):
+    """Combine the partial aggregates of two shards.
+
+    Partials are dicts of sums and counts (numbers, or Series / DataFrames
+    indexed by a key, added with missing keys as 0), sets (united), and
+    objects with a merge() method such as TopRows. The merge is associative
+    and commutative, so shards can be combined in any order or grouping.
+    """
+    if isinstance(left, dict):
+        merged = dict(left)
+        for key, value in right.items():
+            merged[key] = merge_partials(left[key], value) if key in left else value
+        return merged
+    if isinstance(left, (pd.Series, pd.DataFrame)):
+        return left.add(right, fill_value=0)
+    if isinstance(left, (set, frozenset)):
+        return left | right
+    if hasattr(left, "merge"):
+        return left.merge(right)
+    return left + right
+
+def shard_versions(tables, data_dirs):
+    """Return the data version of `tables` in each shard"""
+    return tuple(data_version(*tables, data_dir=data_dir) for data_dir in data_dirs)
+
+def submit_shards(view, tables, data_dirs, fn, *args):
+    """Start fn(data_dir, *args) for every shard on the page job pool; return the jobs.
+
+    Each shard's partial is cached under (view, data_dir, *args, version of
+    `tables` in that shard), so a view of one store only computes over that
+    store, and a view across stores reuses the partials of unchanged stores.
+    """
+    return [page_jobs.submit((view, data_dir, *args, version), fn, data_dir, *args)
+            for data_dir, version in zip(data_dirs, shard_versions(tables, data_dirs))]
+
+def merge_shards(jobs):
+    """Wait for the shard jobs of submit_shards() and merge their partials"""
+    partials = [job.result() for job in jobs]
+    with timed("shard_merge", shards=len(partials)):
+        return reduce(merge_partials, partials)
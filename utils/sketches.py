@@ -0,0 +1,133 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Distinct counts per day: "sketch" keeps a HyperLogLog sketch per day
+# (fixed size, about 1.6% standard error at the default precision);
+# "exact" keeps the distinct (day, value) pairs, exact but as large as
+# the data and slower to merge; "auto" keeps the pairs while there are at
+# most EXACT_DISTINCT_PAIRS of them and sketches above that
+DISTINCT_COUNT = os.environ.get("DASHBOARD_DISTINCT_COUNT", "auto")
+EXACT_DISTINCT_PAIRS = int(os.environ.get("DASHBOARD_EXACT_DISTINCT_PAIRS", "200000"))
+HLL_PRECISION = 12
+
+def _hashes(values):
+    """Hash values to uint64, identically in every process"""
+    return pd.util.hash_array(np.asarray(values), categorize=False)
+
+def _ranks(hashes, precision):
+    """Return the position of the first 1 bit after the register index bits (1-based)"""
+    # The remaining bits fit a float64 exactly for precision >= 11, and
+    # frexp's exponent is their bit length (0 when they are all zero)
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    return (64 - precision + 1 - np.frexp(rest.astype(np.float64))[1]).astype(np.uint8)
+
+def _estimate(registers):
+    """HyperLogLog cardinality estimate of one register row, with the small-range correction"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    empty = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and empty:
+        estimate = m * np.log(m / empty)
+    return int(round(estimate))
+
+def _to_days(dates):
+    return pd.DatetimeIndex(dates).values.astype("datetime64[D]")
+
+class DailySketches:
+    """A HyperLogLog sketch of distinct values for each day.
+
+    Sketches of the same precision merge by taking register maxima, so the
+    distinct count of any window of days, or of several stores' sketches
+    merged, comes from the registers alone without rescanning the values.
+    """
+
+    exact = False
+
+    def __init__(self, days, registers, precision=HLL_PRECISION):
+        if precision < 11:
+            raise ValueError("HyperLogLog precision must be at least 11")
+        self.days = days            # sorted unique datetime64[D]
+        self.registers = registers  # uint8, one row of 2**precision per day
+        self.precision = precision
+
+    @classmethod
+    def from_values(cls, dates, values, precision=HLL_PRECISION):
+        hashes = _hashes(values)
+        index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+        day_rows, days = pd.factorize(_to_days(dates), sort=True)
+        registers = np.zeros((len(days), 1 << precision), dtype=np.uint8)
+        np.maximum.at(registers, (day_rows, index), _ranks(hashes, precision))
+        return cls(days, registers, precision)
+
+    def merge(self, other):
+        if isinstance(other, DailyDistinct):
+            other = other.sketches(self.precision)
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        days = np.union1d(self.days, other.days)
+        registers = np.zeros((len(days), self.registers.shape[1]), dtype=np.uint8)
+        registers[np.searchsorted(days, self.days)] = self.registers
+        rows = np.searchsorted(days, other.days)
+        registers[rows] = np.maximum(registers[rows], other.registers)
+        return DailySketches(days, registers, self.precision)
+
+    def count(self, start=None, end=None):
+        """Estimate the distinct values on the days in [start, end)"""
+        window = np.ones(len(self.days), dtype=bool)
+        if start is not None:
+            window &= self.days >= np.datetime64(pd.Timestamp(start), "D")
+        if end is not None:
+            window &= self.days < np.datetime64(pd.Timestamp(end), "D")
+        if not window.any():
+            return 0
+        return _estimate(self.registers[window].max(axis=0))
+
+class DailyDistinct:
+    """The exact distinct values of each day, with the interface of DailySketches.
+
+    With a `limit`, bounded() turns pairs beyond it into sketches, and
+    merging does the same.
+    """
+
+    exact = True
+
+    def __init__(self, pairs, limit=None):
+        self.pairs = pairs  # distinct (day, value) rows
+        self.limit = limit
+
+    @classmethod
+    def from_values(cls, dates, values, limit=None):
+        return cls(pd.DataFrame({'day': _to_days(dates), 'value': np.asarray(values)}).drop_duplicates(), limit)
+
+    def sketches(self, precision=HLL_PRECISION):
+        return DailySketches.from_values(self.pairs['day'], self.pairs['value'], precision)
+
+    def bounded(self):
+        """Return these pairs, or their sketches when there are more than `limit`"""
+        return self.sketches() if self.limit is not None and len(self.pairs) > self.limit else self
+
+    def merge(self, other):
+        if isinstance(other, DailySketches):
+            return self.sketches(other.precision).merge(other)
+        return DailyDistinct(pd.concat([self.pairs, other.pairs], ignore_index=True).drop_duplicates(),
+                             self.limit).bounded()
+
+    def count(self, start=None, end=None):
+        """Count the distinct values on the days in [start, end)"""
+        window = pd.Series(True, index=self.pairs.index)
+        if start is not None:
+            window &= self.pairs['day'] >= pd.Timestamp(start)
+        if end is not None:
+            window &= self.pairs['day'] < pd.Timestamp(end)
+        return int(self.pairs.loc[window, 'value'].nunique())
+
+def distinct_by_day(dates, values, mode=None):
+    """Return the mergeable distinct values per day of DISTINCT_COUNT (or `mode`) mode;
+    their `exact` attribute tells whether counts are exact or estimates"""
+    mode = mode or DISTINCT_COUNT
+    if mode == "sketch":
+        return DailySketches.from_values(dates, values)
+    limit = EXACT_DISTINCT_PAIRS if mode == "auto" else None
+    return DailyDistinct.from_values(dates, values, limit).bounded()
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from utils.csv_tail import prefix_checksum
+from utils.metrics import increment
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Every committed write publishes a new snapshot manifest: a version number
+# plus the identity of each table file and a checksum of its content, so
+# readers can tell whether the set of files they just read belongs to one
+# snapshot. A table only appended to since (sales rows written by the
+# point of sale) still belongs to it.
+MANIFEST_NAME = "_snapshot.json"
+WRITER_LOCK_NAME = "_snapshot.lock"
+SNAPSHOT_RETRIES = 5
+RETRY_DELAY = 0.02
+
+_local = threading.local()
+
+def table_file(data_dir, name):
+    """Return the CSV path of a table in a data directory"""
+    return os.path.join(data_dir, f"{name}.csv")
+
+@contextmanager
+def file_lock(lock_path):
+    """Hold an exclusive lock on lock_path, shared across processes"""
+    with open(lock_path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _temp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def _write_temp(path, write, binary=False):
+    """Write to a temp file next to path, fsync it and return its name"""
+    tmp_path = _temp_path(path)
+    options = {"mode": "wb"} if binary else {"mode": "w", "encoding": "utf-8", "newline": ""}
+    with open(tmp_path, **options) as tmp_file:
+        write(tmp_file)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    return tmp_path
+
+def atomic_write(path, write, binary=False):
+    """Write a file through a temp file and rename it into place.
+
+    Readers see either the old or the new file, never a truncated one.
+    """
+    os.replace(_write_temp(path, write, binary), path)
+
+def file_signature(path):
+    """Identify one version of a file (None if it does not exist)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+def _published_signature(path):
+    """file_signature() plus a checksum of the file's content, as the manifest keeps it"""
+    signature = file_signature(path)
+    with open(path, "rb") as table:
+        return [*signature, prefix_checksum(table, signature[1])]
+
+def _unchanged_since(path, published):
+    """Whether a file is still the one published in the manifest, or that file with rows appended"""
+    signature = file_signature(path)
+    if signature == published[:3]:
+        return True
+    if signature is None or len(published) < 4 or signature[0] != published[0] or signature[1] < published[1]:
+        return False
+    try:
+        with open(path, "rb") as table:
+            return prefix_checksum(table, published[1]) == published[3]
+    except FileNotFoundError:
+        return False
+
+def read_manifest(data_dir):
+    """Return the current snapshot manifest, or None if no snapshot was published"""
+    try:
+        with open(os.path.join(data_dir, MANIFEST_NAME), "r", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def snapshot_version(data_dir):
+    """Return the version of the current snapshot (0 if none was published)"""
+    manifest = read_manifest(data_dir)
+    return manifest["version"] if manifest else 0
+
+def commit_tables(data_dir, writers):
+    """Atomically replace several tables and publish them as one new snapshot.
+
+    `writers` maps table name -> callable writing the table to a text file.
+    Files are staged first, then renamed and the manifest published under
+    the writer lock. Returns the new snapshot version.
+    """
+    staged = {}
+    try:
+        for name, write in writers.items():
+            staged[name] = _write_temp(table_file(data_dir, name), write)
+
+        with file_lock(os.path.join(data_dir, WRITER_LOCK_NAME)):
+            manifest = read_manifest(data_dir) or {"version": 0, "tables": {}}
+            for name, tmp_path in staged.items():
+                os.replace(tmp_path, table_file(data_dir, name))
+                manifest["tables"][name] = _published_signature(table_file(data_dir, name))
+            manifest["version"] += 1
+            atomic_write(os.path.join(data_dir, MANIFEST_NAME),
+                         lambda f: json.dump(manifest, f))
+            return manifest["version"]
+    finally:
+        for tmp_path in staged.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def save_table(name, df, data_dir="data"):
+    """Write a DataFrame as a table.
+
+    Inside table_transaction() the write is staged and published together
+    with the rest of the transaction; otherwise it is committed on its own.
+    """
+    write = lambda f: df.to_csv(f, index=False)
+    transaction = getattr(_local, "transaction", None)
+    if transaction is not None and transaction["data_dir"] == data_dir:
+        transaction["writers"][name] = write
+    else:
+        commit_tables(data_dir, {name: write})
+
+@contextmanager
+def table_transaction(data_dir="data"):
+    """Group every save_table() in the block into a single snapshot"""
+    if getattr(_local, "transaction", None) is not None:
+        # Nested: the outer transaction publishes everything
+        yield
+        return
+    _local.transaction = {"data_dir": data_dir, "writers": {}}
+    try:
+        yield
+        writers = _local.transaction["writers"]
+    finally:
+        _local.transaction = None
+    if writers:
+        commit_tables(data_dir, writers)
+
+def read_snapshot(data_dir, names, read, executor=None):
+    """Read several tables so that they all come from the same snapshot.
+
+    `read(name)` loads one table; with an executor the tables are read
+    concurrently on it. No lock is taken: after reading, each file
+    is checked against the manifest and the read is retried if a writer
+    replaced anything in between. While no new snapshot was published, only
+    the tables that failed the check are read again. A file that was only
+    appended to since it was published passes the check. Tables the
+    manifest does not know (or a missing manifest) are accepted as they
+    are, since every file is still replaced atomically. A mismatch left
+    after the last retry is counted as "snapshot_mismatch" (utils/metrics.py).
+    Returns (frames, version).
+    """
+    frames, stale, version = {}, list(names), None
+    for attempt in range(SNAPSHOT_RETRIES):
+        if attempt:
+            time.sleep(RETRY_DELAY)
+        manifest = read_manifest(data_dir)
+        if (manifest["version"] if manifest else 0) != version:
+            # A new snapshot: none of the tables read so far belong to it
+            stale = list(names)
+        frames.update(zip(stale, (executor.map if executor else map)(read, stale)))
+        if manifest is None:
+            return frames, 0
+
+        version = manifest["version"]
+        tables = manifest["tables"]
+        stale = [name for name in names
+                 if name in tables and not _unchanged_since(table_file(data_dir, name), tables[name])]
+        if not stale and snapshot_version(data_dir) == version:
+            return frames, version
+
+    # A writer outside the snapshot protocol replaced a file; every file is
+    # still whole, so serve the latest read rather than failing the page
+    increment("snapshot_mismatch", tables="+".join(stale) or "manifest")
+    return frames, version
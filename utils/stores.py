@@ -0,0 +1,28 @@
+import os
+from utils.data_loader import DATA_DIR
+
+ALL_STORES = "All stores"
+
+def _parse_stores(spec):
+    """Parse "name=data_dir,name=data_dir" into an ordered name -> data_dir dict"""
+    stores = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, data_dir = entry.partition("=")
+        if not data_dir:
+            raise ValueError(f"DASHBOARD_STORES entry '{entry}' is not name=data_dir")
+        stores[name.strip()] = data_dir.strip()
+    return stores
+
+# Each store is a shard: its own data directory with the full set of tables.
+# The first store is the one the single-store pages (Inventory, Purchase,
+# Sales, Performance, Report) work on.
+STORES = _parse_stores(os.environ.get("DASHBOARD_STORES", "")) or {"Main Store": DATA_DIR}
+
+def store_names():
+    return list(STORES)
+
+def store_dirs(scope=ALL_STORES):
+    """Return the data directories of a store, or of every store for ALL_STORES"""
+    if scope == ALL_STORES:
+        return list(STORES.values())
+    return [STORES[scope]]
@@ -1,492 +1,44 @@
 import streamlit as st
 import plotly.graph_objects as go
+import hashlib
+import os
+import re
+import time
+from functools import lru_cache
+from utils.image_handler import get_asset_data_uri, get_avatar_data_uri
+from utils.scopes import scope_label
+from utils.watcher import generation
 
-def apply_custom_styling():
-    """Apply custom styling to the entire application"""
-    # Define CSS variables for easy color theming
-    st.markdown("""
-    <style>
-    :root {
-        --primary-color: #1e88e5;
-        --primary-dark: #1565c0;
-        --primary-light: #e3f2fd;
-        --secondary-color: #28a745;
-        --secondary-dark: #218838;
-        --warning-color: #ffc107;
-        --danger-color: #dc3545;
-        --success-color: #28a745;
-        --background-color: #f8f9fa;
-        --card-background: #ffffff;
-        --text-color: #212529;
-        --text-muted: #6c757d;
-        --border-color: #dee2e6;
-    }
-
-    /* Main Page Background */
-    .main .block-container {
-        padding-top: 0.75rem;
-        padding-bottom: 0.75rem;
-        max-width: 98%;
-    }
-    
-    .stApp {
-        background-color: var(--background-color);
-        color: var(--text-color);
-        font-family: 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-        font-size: 0.9rem;
-    }
-    
-    /* Headings */
-    h1, h2, h3, h4, h5, h6 {
-        color: var(--text-color);
-        font-family: 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-        font-weight: 600;
-        margin-bottom: 0.75rem;
-    }
-    
-    h1 {
-        font-size: 1.8rem;
-        font-weight: 700;
-        margin-bottom: 1rem;
-        color: var(--primary-color);
-    }
-    
-    h2 {
-        font-size: 1.4rem;
-        border-bottom: 1px solid var(--border-color);
-        padding-bottom: 0.5rem;
-        margin-top: 1.5rem;
-        margin-bottom: 1rem;
-        color: #37474f;
-    }
-    
-    h3 {
-        font-size: 1.2rem;
-        margin-top: 1.25rem;
-        color: #455a64;
-    }
-    
-    /* Better Cards and containers */
-    .card {
-        background-color: var(--card-background);
-        border-radius: 6px;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.05);
-        padding: 1rem;
-        height: 100%;
-        transition: transform 0.2s ease, box-shadow 0.2s ease;
-        border-top: 3px solid var(--primary-color);
-        margin-bottom: 1rem;
-    }
-    
-    .card:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-    }
-    
-    .card-title {
-        color: var(--text-color);
-        font-size: 1rem;
-        font-weight: 600;
-        margin-bottom: 0.75rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 1px solid var(--border-color);
-    }
-    
-    .card-content {
-        color: var(--text-color);
-        font-size: 0.85rem;
-    }
-    
-    /* KPI Container */
-    .kpi-container {
-        background-color: var(--card-background);
-        border-radius: 6px;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.05);
-        padding: 0.9rem 1.1rem;
-        height: 100%;
-        transition: all 0.2s ease;
-        border-top: 3px solid var(--primary-color);
-        margin-bottom: 1rem;
-        display: flex;
-        flex-direction: column;
-    }
-    
-    .kpi-container:hover {
-        box-shadow: 0 4px 10px rgba(0,0,0,0.08);
-        transform: translateY(-3px);
-    }
-    
-    .kpi-title {
-        color: var(--text-muted);
-        font-size: 0.75rem;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        font-weight: 600;
-        margin-bottom: 0.5rem;
-    }
-    
-    .kpi-value {
-        color: var(--text-color);
-        font-size: 1.8rem;
-        font-weight: 700;
-        margin: 0;
-        line-height: 1.1;
-        margin-bottom: 0.4rem;
-    }
-    
-    .trend-up {
-        color: var(--success-color);
-        font-size: 0.75rem;
-        font-weight: 600;
-        margin-top: 0.25rem;
-        display: flex;
-        align-items: center;
-    }
-    
-    .trend-down {
-        color: var(--danger-color);
-        font-size: 0.75rem;
-        font-weight: 600;
-        margin-top: 0.25rem;
-        display: flex;
-        align-items: center;
-    }
-    
-    /* Sidebar Styling */
-    .css-1d391kg, .css-1lcbmhc {
-        background-color: var(--card-background);
-    }
-    
-    .sidebar .sidebar-content {
-        background-color: var(--card-background);
-    }
-    
-    /* Header & Banners */
-    .app-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        background-color: var(--card-background);
-        border-radius: 6px;
-        padding: 0.8rem 1.25rem;
-        margin-bottom: 1.25rem;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.05);
-        border-left: none;
-        border-top: 3px solid var(--primary-color);
-    }
-    
-    .app-title {
-        color: var(--primary-color);
-        font-size: 1.4rem;
-        font-weight: 700;
-        margin: 0;
-    }
-    
-    .user-info {
-        display: flex;
-        align-items: center;
-        color: var(--text-color);
-        font-weight: 500;
-        background-color: var(--primary-light);
-        padding: 0.3rem 0.8rem;
-        border-radius: 18px;
-        font-size: 0.85rem;
-    }
-    
-    .user-icon {
-        margin-right: 0.4rem;
-        color: var(--primary-color);
-    }
-    
-    .info-banner {
-        background-color: #e3f2fd;
-        border-radius: 6px;
-        padding: 0.6rem 1rem;
-        margin-bottom: 1rem;
-        border-left: 3px solid var(--primary-color);
-        color: var(--text-color);
-        font-size: 0.85rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.04);
-    }
-    
-    .warning-banner {
-        background-color: #fff3cd;
-        border-radius: 6px;
-        padding: 0.6rem 1rem;
-        margin-bottom: 1rem;
-        border-left: 3px solid var(--warning-color);
-        color: var(--text-color);
-        font-size: 0.85rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.04);
-    }
-    
-    .error-banner {
-        background-color: #f8d7da;
-        border-radius: 6px;
-        padding: 0.6rem 1rem;
-        margin-bottom: 1rem;
-        border-left: 3px solid var(--danger-color);
-        color: var(--text-color);
-        font-size: 0.85rem;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.04);
-    }
-    
-    /* Button styles */
-    .stButton button {
-        background-color: var(--primary-color);
-        color: white;
-        border-radius: 4px;
-        padding: 0.4rem 0.9rem;
-        font-weight: 600;
-        border: none;
-        transition: all 0.2s ease;
-        width: 100%;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.08);
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-        font-size: 0.75rem;
-    }
-    
-    .stButton button:hover {
-        background-color: var(--primary-dark);
-        box-shadow: 0 2px 6px rgba(0,0,0,0.12);
-        transform: translateY(-1px);
-    }
-    
-    .secondary-button button {
-        background-color: var(--secondary-color);
-    }
-    
-    .secondary-button button:hover {
-        background-color: var(--secondary-dark);
-    }
-    
-    .warning-button button {
-        background-color: var(--warning-color);
-    }
-    
-    .danger-button button {
-        background-color: var(--danger-color);
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0;
-        background-color: #f8f9fa;
-        border-radius: 6px 6px 0 0;
-        padding: 0 8px;
-        border: 1px solid var(--border-color);
-        border-bottom: none;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background-color: transparent;
-        border-radius: 6px 6px 0 0;
-        border: none;
-        border-bottom: 2px solid transparent;
-        padding: 0.6rem 1rem;
-        font-weight: 500;
-        color: var(--text-muted);
-        transition: all 0.2s ease;
-        font-size: 0.85rem;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background-color: transparent;
-        border-bottom: 2px solid var(--primary-color);
-        color: var(--primary-color);
-        font-weight: 600;
-    }
-    
-    .stTabs [data-baseweb="tab-panel"] {
-        background-color: white;
-        border-radius: 0 0 6px 6px;
-        padding: 1rem;
-        border: 1px solid var(--border-color);
-        border-top: none;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.04);
-    }
-    
-    /* Table styles */
-    .dataframe {
-        border-collapse: collapse;
-        width: 100%;
-        border: 1px solid var(--border-color);
-        border-radius: 6px;
-        overflow: hidden;
-        margin: 0.75rem 0;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.04);
-        font-size: 0.8rem;
-    }
-    
-    .dataframe thead th {
-        background-color: #f8f9fa;
-        padding: 0.6rem 0.75rem;
-        text-align: left;
-        font-weight: 600;
-        color: var(--text-color);
-        border-bottom: 1px solid var(--border-color);
-    }
-    
-    .dataframe tbody tr {
-        border-bottom: 1px solid var(--border-color);
-        transition: background-color 0.2s ease;
-    }
-    
-    .dataframe tbody tr:nth-of-type(even) {
-        background-color: #f8f9fa;
-    }
-    
-    .dataframe tbody tr:hover {
-        background-color: #e3f2fd;
-    }
-    
-    .dataframe tbody td {
-        padding: 0.6rem 0.75rem;
-        color: var(--text-color);
-    }
-    
-    /* Radio buttons and checkboxes */
-    .stRadio > div {
-        background-color: var(--card-background);
-        border-radius: 6px;
-        padding: 0.75rem;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.04);
-    }
-    
-    /* Text inputs, selects, and number inputs */
-    .stTextInput > div > div, .stSelectbox > div, .stNumberInput > div {
-        background-color: var(--card-background);
-        border-radius: 4px;
-        box-shadow: 0 1px 2px rgba(0,0,0,0.04);
-    }
-    
-    .stTextInput > label, .stSelectbox > label, .stNumberInput > label {
-        background-color: transparent;
-        color: var(--text-color);
-        font-weight: 500;
-        font-size: 0.85rem;
-    }
-    
-    /* Footer */
-    .footer {
-        background-color: var(--card-background);
-        padding: 0.8rem 1.2rem;
-        margin-top: 2rem;
-        border-radius: 6px;
-        text-align: center;
-        color: var(--text-muted);
-        font-size: 0.75rem;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.04);
-        border-top: 3px solid var(--primary-color);
-    }
-    
-    /* Scrollbar styling */
-    ::-webkit-scrollbar {
-        width: 6px;
-        height: 6px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: #f1f1f1;
-        border-radius: 8px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: #c1c1c1;
-        border-radius: 8px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: #a8a8a8;
-    }
-    
-    /* Stat Row Component */
-    .stat-row {
-        display: flex;
-        justify-content: space-between;
-        padding: 0.6rem 0;
-        border-bottom: 1px solid var(--border-color);
-        align-items: center;
-        font-size: 0.85rem;
-    }
-    
-    .stat-row:last-child {
-        border-bottom: none;
-    }
-    
-    .stat-label {
-        color: var(--text-color);
-        font-weight: 500;
-        display: flex;
-        align-items: center;
-    }
-    
-    .stat-value {
-        color: var(--primary-color);
-        font-weight: 600;
-    }
-    
-    .stat-icon {
-        margin-right: 0.4rem;
-    }
-
-    /* Plot styling */
-    .js-plotly-plot {
-        border-radius: 6px;
-        box-shadow: 0 1px 6px rgba(0,0,0,0.05);
-        padding: 0.4rem;
-        background: white;
-        margin-bottom: 1rem;
-    }
-
-    /* Login page styling */
-    .login-container {
-        background-color: white;
-        border-radius: 6px;
-        box-shadow: 0 2px 12px rgba(0,0,0,0.08);
-        padding: 1.5rem;
-        border-top: 3px solid var(--primary-color);
-    }
-
-    .login-header {
-        color: var(--primary-color);
-        font-size: 1.3rem;
-        text-align: center;
-        margin-bottom: 1rem;
-        font-weight: 600;
-    }
+STYLESHEET_PATH = "assets/styles.css"
 
-    /* Navbar styling */
-    .nav-link {
-        padding: 0.5rem 0.8rem;
-        margin-bottom: 0.4rem;
-        border-radius: 6px;
-        color: var(--text-color);
-        text-decoration: none;
-        transition: all 0.2s ease;
-        font-weight: 500;
-        display: flex;
-        align-items: center;
-        font-size: 0.85rem;
-    }
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # Whitespace around these tokens is never significant
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # Only the space after a colon is safe to drop; a space before one is a descendant selector
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
 
-    .nav-link:hover {
-        background-color: var(--primary-light);
-        color: var(--primary-color);
-    }
+@lru_cache(maxsize=None)
+def get_stylesheet():
+    """Load, minify and fingerprint the application stylesheet once per process.
 
-    .nav-link.active {
-        background-color: var(--primary-color);
-        color: white;
-    }
+    Returns a (fingerprint, html) tuple; the html is a single <style> element
+    that is shared by every session instead of being rebuilt on each rerun.
+    """
+    with open(STYLESHEET_PATH, "r", encoding="utf-8") as css_file:
+        css = minify_css(css_file.read())
+    
+    fingerprint = hashlib.sha256(css.encode("utf-8")).hexdigest()[:12]
+    html = f'<style id="app-styles-{fingerprint}">{css}</style>'
+    return fingerprint, html
 
-    .nav-icon {
-        margin-right: 0.6rem;
-        font-size: 1rem;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+def apply_custom_styling():
+    """Apply custom styling to the entire application"""
+    st.markdown(get_stylesheet()[1], unsafe_allow_html=True)
 
 def kpi_metric(title, value, trend="neutral", trend_value="", prefix="", suffix=""):
     """Generate HTML for a KPI metric"""
@@ -549,13 +101,20 @@ def stat_row(label, value, icon="", value_color=""):
     </div>
     """
 
-def display_header(title_text):
+def display_header(title_text, username=None):
     """Display the application header with user info"""
+    if username:
+        # The avatar is inlined once per page, here; the sidebar's reuses it
+        avatar_css = f'.user-avatar, .sidebar-avatar {{ background-image: url("{get_avatar_data_uri(username)}"); }}'
+        user_icon = f'<style>{avatar_css}</style><span class="user-avatar"></span>'
+    else:
+        user_icon = '<span class="user-icon">👤</span>'
+    
     st.markdown(f"""
     <div class="app-header">
         <h1 class="app-title">Business Management Dashboard</h1>
         <div class="user-info">
-            <span class="user-icon">👤</span> {title_text}
+            {user_icon} {title_text}
         </div>
     </div>
     """, unsafe_allow_html=True)
@@ -563,8 +122,8 @@ def display_header(title_text):
 def create_sidebar():
     """Create the navigation sidebar and return the selected page"""
     st.sidebar.markdown("""
-    <div style="text-align: center; margin-bottom: 20px;">
-        <h3 style="color: var(--primary-color); margin-bottom: 15px; font-size: 1.2rem;">Navigation</h3>
+    <div class="sidebar-nav-heading">
+        <h3>Navigation</h3>
     </div>
     """, unsafe_allow_html=True)
     
@@ -579,24 +138,27 @@ def create_sidebar():
     }
     
     # Create navigation buttons with better styling
-    selected_page = None
-    
+    # The page is kept in session state so widgets on a page (filters,
+    # export buttons) rerun that page instead of falling back to Dashboard
+    selected_page = st.session_state.get("current_page", "Dashboard")
+
     for page, icon in pages.items():
-        if st.sidebar.button(f"{icon} {page}", key=f"nav_{page}", 
+        if st.sidebar.button(f"{icon} {page}", key=f"nav_{page}",
                             help=f"Navigate to {page}"):
             selected_page = page
-    
-    # If nothing selected, default to Dashboard
-    if selected_page is None:
-        selected_page = "Dashboard"
+
+    st.session_state.current_page = selected_page
     
     # Show user role info in sidebar
     st.sidebar.markdown("---")
     st.sidebar.markdown(f"""
-    <div style="background-color: #e3f2fd; padding: 10px; border-radius: 6px; margin-top: 20px; box-shadow: 0 1px 3px rgba(0,0,0,0.04); font-size: 0.85rem;">
-        <p style="margin-bottom: 5px; font-weight: 600;">User Information</p>
+    <div class="sidebar-user-box">
+        <div class="sidebar-user">
+            <span class="sidebar-avatar"></span>
+            <p>{st.session_state.username}</p>
+        </div>
         <strong>Role:</strong> {st.session_state.role}<br>
-        <strong>Access:</strong> Full
+        <strong>Access:</strong> {scope_label(st.session_state.get("scope", {}))}
     </div>
     """, unsafe_allow_html=True)
     
@@ -604,20 +166,68 @@ def create_sidebar():
 
 def create_footer():
     """Create a footer for the application"""
-    st.markdown("""
-    <div class="footer" style="margin-top: 50px; padding: 20px; border-top: 1px solid #e9ecef; text-align: center; color: #6c757d; font-size: 0.9rem;">
-        <p style="margin-bottom: 10px;">Business Management Dashboard © 2025 | All data is for demonstration purposes only</p>
+    linkedin_icon = get_asset_data_uri("assets/linkedin.svg")
+    
+    st.markdown(f"""
+    <div class="footer app-footer">
+        <p>Business Management Dashboard © 2025 | All data is for demonstration purposes only</p>
         <p>Version 1.0.0 | Last updated: March 2025 | 
-           <a href="https://www.linkedin.com/in/yashjeet-singh/" target="_blank" style="color: #1E3A8A; text-decoration: none; font-weight: 500;">
-             <svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="#0077B5" style="vertical-align: middle; margin-right: 4px;">
-               <path d="M19 0h-14c-2.761 0-5 2.239-5 5v14c0 2.761 2.239 5 5 5h14c2.762 0 5-2.239 5-5v-14c0-2.761-2.238-5-5-5zm-11 19h-3v-11h3v11zm-1.5-12.268c-.966 0-1.75-.79-1.75-1.764s.784-1.764 1.75-1.764 1.75.79 1.75 1.764-.783 1.764-1.75 1.764zm13.5 12.268h-3v-5.604c0-3.368-4-3.113-4 0v5.604h-3v-11h3v1.765c1.396-2.586 7-2.777 7 2.476v6.759z"/>
-             </svg>
+           <a href="https://www.linkedin.com/in/yashjeet-singh/" target="_blank">
+             <img src="{linkedin_icon}" width="16" height="16" alt="">
              Connect with Yashjeet Singh
            </a>
         </p>
     </div>
     """, unsafe_allow_html=True)
 
+def _job_progress(job):
+    """Show a running job's progress and rerun the page once it is done"""
+    if job.done():
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+
+def _wait_for_job(job):
+    """Block on a job, updating a progress bar (no fragment support)"""
+    progress_bar = st.progress(0.0)
+    while not job.done():
+        progress_bar.progress(job.progress, text=job.message)
+        time.sleep(0.2)
+    progress_bar.empty()
+
+# Only the progress block re-runs while a job is running
+show_job_progress = st.fragment(run_every=0.5)(_job_progress) if hasattr(st, "fragment") else _wait_for_job
+
+def job_result(job):
+    """Return a background job's result, or show its progress and return None.
+
+    The progress block reruns the page when the job finishes, so a page
+    that gets None should simply stop rendering.
+    """
+    if not job.done():
+        show_job_progress(job)
+        if not job.done():
+            return None
+    return job.result()
+
+# Seconds between checks for changed tables in each open session;
+# DASHBOARD_AUTO_REFRESH=0 leaves open pages as they are until the next rerun
+REFRESH_INTERVAL = 2
+AUTO_REFRESH = os.environ.get("DASHBOARD_AUTO_REFRESH", "1") != "0"
+
+def _rerun_on_change(tables, data_dirs, seen):
+    """Rerun the page once one of `tables` changed in `data_dirs` since it was rendered"""
+    if generation(tables, data_dirs) != seen:
+        st.rerun()
+
+# A cheap in-memory check on a timer; the page itself only reruns on a change
+_watch_tables = st.fragment(run_every=REFRESH_INTERVAL)(_rerun_on_change) if hasattr(st, "fragment") else None
+
+def refresh_on_change(tables, data_dirs):
+    """Keep the page fresh: rerun it when the watcher sees one of `tables`
+    change in one of the stores it shows (`data_dirs`)"""
+    if AUTO_REFRESH and _watch_tables is not None:
+        _watch_tables(tuple(tables), tuple(data_dirs), generation(tables, data_dirs))
+
 def create_plotly_template():
     """Create a consistent Plotly template for all charts"""
     template = go.layout.Template()
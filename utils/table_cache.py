@@ -0,0 +1,161 @@
+import os
+import threading
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:  # without pyarrow, tables are always parsed from CSV
+    feather = None
+
+# Parsed tables are kept as uncompressed Arrow IPC files, one file per
+# table version (<table>/<version>.<format>.arrow) under each store's data
+# directory, so worker processes and a restarted server map them instead of
+# parsing and converting the CSV files again. A new version of one table
+# leaves the others cached. DASHBOARD_TABLE_CACHE_DIR moves the caches of
+# every store elsewhere.
+CACHE_DIR_NAME = "_table_cache"
+CACHE_ROOT = os.environ.get("DASHBOARD_TABLE_CACHE_DIR")
+# Part of every cache file name; bump it when the loader changes the columns
+# it returns (e.g. DERIVED_COLUMNS), so older cache files are never read
+CACHE_FORMAT = 4
+# Converted tables kept per process by read_retained_table(); a key holds
+# one version of a table, so newer versions push older ones out
+RETAINED_TABLES = 32
+# A version that only added rows to the cached one is written as a delta file
+# holding just those rows, which names its base version in its metadata.
+# After MAX_DELTAS deltas in a row the whole table is written again
+MAX_DELTAS = 8
+
+def cache_dir(data_dir):
+    """Return the table cache directory of a data directory"""
+    if CACHE_ROOT:
+        return os.path.join(CACHE_ROOT, os.path.abspath(data_dir).strip(os.sep).replace(os.sep, "_"))
+    return os.path.join(data_dir, CACHE_DIR_NAME)
+
+def cached_path(name, version, data_dir="data"):
+    """Return the cache file of one version of a table"""
+    return os.path.join(cache_dir(data_dir), name, f"{version}.{CACHE_FORMAT}.arrow")
+
+def _base_of(schema):
+    """Return (base version, delta depth) of a cache file's schema, (None, 0) for a whole table"""
+    metadata = schema.metadata or {}
+    if b"base" not in metadata:
+        return None, 0
+    return metadata[b"base"].decode(), int(metadata[b"depth"])
+
+def cache_chain(path):
+    """Return the cache files holding one version of a table, its own file first.
+
+    A delta file is followed by the files of its base versions, down to the
+    one holding the whole table. Raises OSError if any of them is missing.
+    """
+    chain = [path]
+    while True:
+        with pa.memory_map(chain[-1]) as source:
+            base, _ = _base_of(pa.ipc.open_file(source).schema)
+        if base is None:
+            return chain
+        chain.append(os.path.join(os.path.dirname(path), f"{base}.{CACHE_FORMAT}.arrow"))
+
+def read_cached_table(path, filters=()):
+    """Map one cached table and convert the rows that pass `filters` to a DataFrame.
+
+    `filters` is a sequence of (column, allowed values). They are applied to
+    the mapped Arrow data, so rows outside them are never converted or copied.
+    """
+    tables = [feather.read_table(chain_path, memory_map=True) for chain_path in reversed(cache_chain(path))]
+    table = pa.concat_tables(tables, promote_options="permissive") if len(tables) > 1 else tables[0]
+    for column, values in filters:
+        allowed = pa.array(values, type=table.schema.field(column).type)
+        table = table.filter(pc.is_in(table[column], value_set=allowed))
+    df = table.to_pandas()
+    if len(tables) > 1:
+        # The newest file holds the categories of the whole table, in their order
+        for field in tables[-1].schema:
+            if pa.types.is_dictionary(field.type):
+                df[field.name] = df[field.name].cat.set_categories(tables[-1][field.name].chunk(0).dictionary.to_pandas())
+    return df
+
+@lru_cache(maxsize=RETAINED_TABLES)
+def read_retained_table(path, filters=()):
+    """read_cached_table(), keeping the frame for the life of the version.
+
+    Every caller gets the same frame: do not modify it in place.
+    """
+    return read_cached_table(path, filters)
+
+def read_cached_tables(versions, data_dir="data", read=read_cached_table, filters=None):
+    """Return the cached tables of `versions` (name -> version), or None if any is missing.
+
+    `filters` maps table names to the row filters of read_cached_table().
+    """
+    if feather is None:
+        return None
+    filters = filters or {}
+    try:
+        return tuple(read(cached_path(name, version, data_dir), filters.get(name, ()))
+                     for name, version in versions.items())
+    except OSError:
+        # Not cached yet, or removed because a newer version was cached
+        return None
+
+def discard_stale_versions(name, version, data_dir="data"):
+    """Remove the cached versions of a table other than `version` and its base versions.
+
+    Readers that still map an older version keep its pages until they close it.
+    """
+    directory = os.path.join(cache_dir(data_dir), name)
+    if not os.path.isdir(directory):
+        return
+    try:
+        keep = {os.path.basename(path) for path in cache_chain(cached_path(name, version, data_dir))}
+    except OSError:
+        keep = {f"{version}.{CACHE_FORMAT}.arrow"}
+    for entry in os.listdir(directory):
+        if entry not in keep and not entry.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(directory, entry))
+            except FileNotFoundError:
+                pass
+
+def _delta_table(df, base_version, base_rows, data_dir, name):
+    """Return the rows of df after the first base_rows as a delta on base_version, or None.
+
+    None means the whole table has to be written: the base is gone, or it
+    already ends a chain of MAX_DELTAS deltas.
+    """
+    if base_rows >= len(df):
+        return None
+    try:
+        with pa.memory_map(cached_path(name, base_version, data_dir)) as source:
+            _, depth = _base_of(pa.ipc.open_file(source).schema)
+    except OSError:
+        return None
+    if depth >= MAX_DELTAS:
+        return None
+    table = pa.Table.from_pandas(df.iloc[base_rows:].reset_index(drop=True), preserve_index=False)
+    return table.replace_schema_metadata({**table.schema.metadata, b"base": base_version.encode(),
+                                          b"depth": str(depth + 1).encode()})
+
+def write_cached_tables(versions, frames, data_dir="data", appended=None):
+    """Cache tables read at `versions` (name -> version) and drop their older versions.
+
+    `appended` maps a table name to the (version, row count) of a cached
+    version whose rows are the first rows of its frame: only the rows after
+    them are written, as a delta file (see MAX_DELTAS).
+    """
+    if feather is None:
+        return
+    appended = appended or {}
+    for (name, version), df in zip(versions.items(), frames):
+        path = cached_path(name, version, data_dir)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        delta = _delta_table(df, *appended[name], data_dir, name) if name in appended else None
+        feather.write_feather(df if delta is None else delta, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        discard_stale_versions(name, version, data_dir)
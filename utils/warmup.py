@@ -0,0 +1,60 @@
+import os
+import threading
+import traceback
+from utils.data_loader import FACT_DIMENSIONS, load_tables
+from utils.metrics import timed
+from utils.offload import map_tables, page_jobs
+from utils.report_snapshots import load_snapshot
+from utils.stores import store_dirs
+
+# Every table a page loads; mapped (or parsed and cached) before the server reports ready
+WARM_TABLES = (*FACT_DIMENSIONS, "inventory", "expenses")
+
+# Created once warm-up has finished, for a readiness probe (e.g. `test -f`)
+READY_FILE = os.environ.get("DASHBOARD_READY_FILE")
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_thread = None
+
+if READY_FILE and os.path.exists(READY_FILE):
+    os.remove(READY_FILE)  # left by a previous run of the server
+
+def warm_up():
+    """Map the cached tables of every store at their current version, caching
+    any that are missing, and keep them in this process and in each page job
+    worker (started now, so the first page jobs do not wait for workers to
+    spawn and import pandas); then load the precomputed report snapshots"""
+    with timed("warm_up"):
+        data_dirs = store_dirs()
+        for data_dir in data_dirs:
+            load_tables(*WARM_TABLES, data_dir=data_dir)
+        with timed("warm_up_workers"):
+            page_jobs.prestart(map_tables, WARM_TABLES, data_dirs)
+        load_snapshot()
+
+def _run():
+    try:
+        warm_up()
+    except Exception:
+        # Pages load the data themselves; a failed warm-up only costs speed
+        traceback.print_exc()
+    _ready.set()
+    if READY_FILE:
+        with open(READY_FILE, "w") as ready_file:
+            ready_file.write(str(os.getpid()))
+
+def start_warm_up():
+    """Start warming this process up in the background, once"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="warm-up", daemon=True)
+            _thread.start()
+
+def is_ready():
+    return _ready.is_set()
+
+def wait_until_ready(timeout=None):
+    """Block until warm-up has finished; return whether it has"""
+    return _ready.wait(timeout)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+import traceback
+from collections import defaultdict
+from utils.data_loader import DATA_DIR, TABLE_NAMES, data_version, table_signature
+from utils.metrics import increment
+from utils.offload import page_jobs
+from utils.purchase_log import COMPACTING_NAME as PURCHASE_COMPACTING_NAME, LOG_NAME as PURCHASE_LOG_NAME
+from utils.report_engine import VIEW_TABLES
+from utils.stores import store_dirs
+from utils.table_cache import discard_stale_versions
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # no inotify (or equivalent) support: poll instead
+    FileSystemEventHandler = object
+    Observer = None
+
+POLL_INTERVAL = 2.0
+
+_lock = threading.Lock()
+_signatures = {}
+# Changes seen per (data_dir, table), so a change in one store only
+# reruns the pages showing that store
+_generations = defaultdict(int)
+_started = False
+
+def _table_of(path):
+    """Map a changed file to the table it belongs to, or None"""
+    filename = os.path.basename(path)
+    if filename in (PURCHASE_LOG_NAME, PURCHASE_COMPACTING_NAME):
+        return "purchases"
+    name, ext = os.path.splitext(filename)
+    return name if ext == ".csv" and name in TABLE_NAMES else None
+
+def _invalidate(tables, data_dir):
+    """Drop the cached results and table versions of one store that depend on `tables`"""
+    stale_views = {view for view, view_tables in VIEW_TABLES.items() if tables.intersection(view_tables)}
+    # Page job keys name their view first and hold the store's data_dir
+    page_jobs.invalidate(lambda key: key[0] in stale_views and data_dir in key)
+    for name in tables:
+        discard_stale_versions(name, data_version(name, data_dir=data_dir), data_dir)
+
+def check_tables(names=TABLE_NAMES, data_dir=DATA_DIR):
+    """Compare a store's tables with their last seen version and handle the changed ones.
+
+    Returns the set of changed tables. Called by the watcher; safe to call
+    directly after writing tables in this process.
+    """
+    with _lock:
+        changed = set()
+        for name in names:
+            signature = table_signature(name, data_dir)
+            if _signatures.get((data_dir, name), signature) != signature:
+                changed.add(name)
+                _generations[data_dir, name] += 1
+            _signatures[data_dir, name] = signature
+    if changed:
+        increment("tables_changed", amount=len(changed))
+        _invalidate(changed, data_dir)
+    return changed
+
+def generation(tables, data_dirs=(DATA_DIR,)):
+    """Return a token that changes whenever one of `tables` changed on disk in
+    one of the stores of `data_dirs`"""
+    with _lock:
+        return tuple(_generations[data_dir, name] for data_dir in data_dirs for name in tables)
+
+class _DataDirHandler(FileSystemEventHandler):
+    def __init__(self, data_dir):
+        super().__init__()
+        self.data_dir = data_dir
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        names = {name for name in map(_table_of, paths) if name}
+        if names:
+            try:
+                check_tables(names, self.data_dir)
+            except Exception:
+                traceback.print_exc()
+
+def _poll():
+    while True:
+        for data_dir in store_dirs():
+            try:
+                check_tables(data_dir=data_dir)
+            except Exception:
+                traceback.print_exc()
+        time.sleep(POLL_INTERVAL)
+
+def start_watcher():
+    """Start watching the data directory of every store, once per process.
+
+    Uses filesystem events (inotify on Linux) when watchdog is installed,
+    otherwise polls the table files every POLL_INTERVAL seconds.
+    """
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    for data_dir in store_dirs():
+        check_tables(data_dir=data_dir)  # the versions to compare against
+    if Observer is not None:
+        observer = Observer()
+        for data_dir in store_dirs():
+            observer.schedule(_DataDirHandler(data_dir), data_dir, recursive=False)
+        observer.daemon = True
+        observer.start()
+    else:
+        threading.Thread(target=_poll, name="data-watcher", daemon=True).start()